@@ -1,12 +1,13 @@
 import streamlit as st
 from datetime import datetime, timedelta
-import time
 import re
 
 from config import Config
 from models import TravelType, TripRequest
-from graph import run_trip_planner_stepwise
+from graph import run_trip_planner_events
+from comparison import compare_destinations
 from langsmith_monitor import monitor
+import metrics
 
 
 
@@ -18,6 +19,17 @@ st.set_page_config(
 )
 
 
+STEP_LABELS = {
+    "check_weather": "☁️ Checking weather",
+    "search_flights": "✈️ Searching flights",
+    "search_hotels": "🏨 Finding hotels",
+    "search_attractions": "🎯 Discovering attractions",
+    "check_flight_budget": "💰 Checking flight budget",
+    "generate_itinerary": "📋 Generating itinerary",
+    "suggest_alternatives": "🔄 Finding alternatives",
+}
+
+
 def init_session_state():
     if 'trip_planned' not in st.session_state:
         st.session_state['trip_planned'] = False
@@ -25,6 +37,8 @@ def init_session_state():
         st.session_state['final_state'] = None
     if 'planning_history' not in st.session_state:
         st.session_state['planning_history'] = []
+    if 'comparison' not in st.session_state:
+        st.session_state['comparison'] = None
 
 
 def validate_config():
@@ -81,11 +95,22 @@ def trip_input_form():
     with col1:
         st.markdown("#### 🗺️ Route Information")
         origin = st.text_input("Departure City", placeholder="e.g., New York", key="origin")
-        destination = st.text_input("Destination", placeholder="e.g., Tokyo", key="destination")
+        compare = st.checkbox("🔀 Compare several destinations", key="compare")
+        if compare:
+            candidates = st.text_area("Destinations (one per line)", placeholder="Lisbon\nRome\nAthens", key="destinations")
+            compare_destinations_list = [line.strip() for line in candidates.splitlines() if line.strip()]
+            destination = compare_destinations_list[0] if compare_destinations_list else ""
+        else:
+            destination = st.text_input("Destination", placeholder="e.g., Tokyo", key="destination")
+            compare_destinations_list = []
 
         st.markdown("#### 📅 Travel Dates")
         start_date = st.date_input("Departure Date", value=datetime.now() + timedelta(days=30), min_value=datetime.now(), key="start_date")
         duration = st.number_input("Duration (days)", min_value=1, max_value=30, value=7, step=1, key="duration")
+        flexible_days = st.number_input(
+            "Flexible dates (± days)", min_value=0, max_value=Config.FLEXIBLE_DAYS_MAX, value=0, step=1,
+            key="flexible_days", help="Also check departures this many days earlier or later and show the cheapest"
+        )
 
     with col2:
         st.markdown("#### 💰 Budget & Preferences")
@@ -106,7 +131,9 @@ def trip_input_form():
         "currency": currency,
         "travel_type": travel_type,
         "num_travelers": num_travelers,
-        "preferences": []
+        "preferences": [],
+        "flexible_days": flexible_days,
+        "compare_destinations": compare_destinations_list
     }
 
 def display_weather_step(weather):
@@ -246,6 +273,77 @@ def display_flight_card(flight, index):
         </div>
     """, unsafe_allow_html=True)
 
+def display_price_calendar(calendar, chosen_date):
+    """Cheapest fare per departure date, chosen date highlighted"""
+    st.markdown("#### 📅 Price Calendar")
+    fares = [fare for fare in calendar.values() if fare is not None]
+    cheapest = min(fares) if fares else None
+    for col, (day, fare) in zip(st.columns(len(calendar)), calendar.items()):
+        with col:
+            label = datetime.strptime(day, "%Y-%m-%d").strftime("%a %d %b")
+            if fare is None:
+                st.metric(label, "—")
+            else:
+                st.metric(f"✅ {label}" if day == chosen_date else label, f"${fare:,.0f}",
+                          delta="cheapest" if fare == cheapest else None, delta_color="off")
+
+def display_daily_weather(days):
+    """Weather for each trip day; days past the forecast horizon show typical or estimated weather"""
+    st.markdown("#### 📆 Day-by-day Weather")
+    for col, weather in zip(st.columns(min(len(days), 7)), days[:7]):
+        with col:
+            label = datetime.strptime(weather.date, "%Y-%m-%d").strftime("%a %d %b")
+            st.metric(label, f"{weather.temperature:.0f}°C",
+                      delta={"climatology": "typical", "extrapolated": "estimate"}.get(weather.source, weather.condition),
+                      delta_color="off")
+    if len(days) > 7:
+        st.caption(f"+ {len(days) - 7} more day(s) in the itinerary")
+
+def display_comparison(rows):
+    """Ranked destination comparison with the planned itineraries underneath"""
+    st.markdown("## 🏆 Destination Comparison")
+    status_labels = {"planned": "✅ Planned", "feasible": "🟡 Feasible", "pruned": "✂️ Pruned", "failed": "❌ Failed"}
+    st.dataframe([
+        {
+            "Rank": row.rank,
+            "Destination": row.destination,
+            "Status": status_labels.get(row.status, row.status),
+            "Weather": f"{row.temperature:.0f}°C {row.condition}" if row.temperature is not None else "—",
+            "Cheapest flight": f"${row.cheapest_flight:,.0f}" if row.cheapest_flight is not None else "—",
+            "Hotel / night": f"${row.hotel_per_night:,.0f}" if row.hotel_per_night is not None else "—",
+            "Estimated cost": f"${row.estimated_cost:,.0f}" if row.estimated_cost is not None else "—",
+            "Notes": row.reason or ""
+        }
+        for row in rows
+    ], hide_index=True, use_container_width=True)
+
+    for row in rows:
+        if row.itinerary is not None:
+            with st.expander(f"{row.rank}. {row.destination} · ${row.itinerary.estimated_cost:,.0f}", expanded=row.rank == 1):
+                display_itinerary_section(row.itinerary)
+
+def display_alternatives(alternatives, explanation):
+    """Alternative destinations picked when weather or flights rule out the trip"""
+    st.markdown("""
+        <div style='background: linear-gradient(135deg, #ffa94d 0%, #f76707 100%); 
+                    padding: 1rem; border-radius: 10px; margin-bottom: 1rem;'>
+            <h3 style='color: white; margin: 0;'>💡 Alternative Destinations</h3>
+        </div>
+    """, unsafe_allow_html=True)
+
+    st.dataframe([
+        {
+            "Destination": f"{alt.name}, {alt.country}",
+            "Weather now": f"{alt.weather.temperature:.0f}°C {alt.weather.condition}" if alt.weather else "—",
+            "Typical": f"{alt.typical_temperature:.0f}°C, {alt.rain_days:.0f} rainy days",
+            "Fares": f"${alt.fare_low:,.0f}–${alt.fare_high:,.0f}",
+            "Est. trip cost": f"${alt.estimated_cost:,.0f}"
+        }
+        for alt in alternatives
+    ], hide_index=True, use_container_width=True)
+    if explanation:
+        st.markdown(explanation)
+
 def display_budget_breakdown(itinerary, hotels, flights, attractions):
     """Display detailed budget breakdown with visual bars"""
     import re
@@ -492,6 +590,9 @@ def main():
     if not validate_config():
         st.stop()
 
+    if Config.METRICS_PORT:
+        metrics.start_metrics_server()
+
     # Sidebar
     with st.sidebar:
         st.markdown("### ⚙️ Configuration")
@@ -517,6 +618,7 @@ def main():
         if st.button("🔄 Start New Trip", use_container_width=True):
             st.session_state.trip_planned = False
             st.session_state.final_state = None
+            st.session_state.comparison = None
             st.rerun()
         
         st.divider()
@@ -554,60 +656,81 @@ def main():
             plan_button = st.button("🚀 Plan My Trip", type="primary", use_container_width=True)
 
         if plan_button:
+            destinations = trip_data.pop("compare_destinations")
             if not trip_data['origin']:
                 st.error("❌ Please enter departure city")
             elif not trip_data['destination']:
                 st.error("❌ Please enter destination")
+            elif destinations:
+                try:
+                    trip_request = TripRequest(**trip_data)
+                    with st.spinner(f"🔀 Comparing {len(destinations)} destinations..."):
+                        rows = compare_destinations(trip_request, destinations)
+
+                    if Config.METRICS_DUMP_PATH:
+                        metrics.dump_json()
+
+                    st.session_state.comparison = rows
+                    st.session_state.final_state = None
+                    st.session_state.trip_planned = True
+                    st.session_state.planning_history.append({
+                        "timestamp": datetime.now().isoformat(),
+                        "destination": " vs ".join(row.destination for row in rows)
+                    })
+
+                    st.rerun()
+
+                except Exception as e:
+                    st.error(f"❌ Error: {str(e)}")
+                    st.exception(e)
             else:
                 try:
                     trip_request = TripRequest(**trip_data)
 
                     progress_placeholder = st.empty()
                     status_placeholder = st.empty()
+                    timings_placeholder = st.empty()
+                    preview_placeholder = st.empty()
 
                     final_state = None
+                    finished_steps = []
 
-                    for state in run_trip_planner_stepwise(trip_request):
-                        current_step = state.get("current_step", "")
-
-                        if current_step == "check_weather":
-                            progress_placeholder.progress(20)
-                            status_placeholder.info("☁️ Checking weather...")
-                            time.sleep(0.5)
+                    for event in run_trip_planner_events(trip_request):
+                        progress_placeholder.progress(event.fraction)
+                        eta_text = f" · about {event.eta:.0f}s left" if event.eta is not None else ""
 
-                        elif current_step == "search_flights":
-                            progress_placeholder.progress(40)
-                            status_placeholder.info("✈️ Searching flights...")
-                            time.sleep(0.5)
+                        if event.kind == "finish":
+                            finished_steps.append(f"✅ {STEP_LABELS.get(event.node, event.node)} ({event.duration or 0:.1f}s)")
+                            timings_placeholder.caption(" · ".join(finished_steps))
 
-                        elif current_step == "search_hotels":
-                            progress_placeholder.progress(60)
-                            status_placeholder.info("🏨 Finding hotels...")
-                            time.sleep(0.5)
+                        if event.kind in ("start", "finish") and event.running:
+                            running = " · ".join(STEP_LABELS.get(node, node) for node in event.running)
+                            status_placeholder.info(f"{running}...{eta_text}")
 
-                        elif current_step == "search_attractions":
-                            progress_placeholder.progress(80)
-                            status_placeholder.info("🎯 Discovering attractions...")
-                            time.sleep(0.5)
+                        elif event.kind == "partial":
+                            # Partial itinerary: show the days written so far
+                            itinerary = event.state["itinerary"]
+                            total_days = trip_request.duration_days or len(itinerary.daily_plans)
+                            done = min(len(itinerary.daily_plans), total_days)
+                            status_placeholder.info(f"📋 Writing itinerary... day {done} of {total_days}{eta_text}")
+                            with preview_placeholder.container():
+                                display_itinerary_section(itinerary)
 
-                        elif current_step == "generate_itinerary":
-                            progress_placeholder.progress(95)
-                            status_placeholder.info("📋 Generating itinerary...")
-                            time.sleep(0.5)
-
-                        final_state = state
-
-                    progress_placeholder.progress(100)
-                    status_placeholder.success("✅ Complete!")
-                    time.sleep(1)
+                        final_state = event.state
 
                     progress_placeholder.empty()
                     status_placeholder.empty()
+                    timings_placeholder.empty()
+                    preview_placeholder.empty()
 
                     if Config.LANGSMITH_API_KEY:
                         monitor.track_planning_session(trip_request.model_dump(), final_state)
 
+                    if Config.METRICS_DUMP_PATH:
+                        metrics.dump_json()
+
                     st.session_state.final_state = final_state
+                    st.session_state.comparison = None
                     st.session_state.trip_planned = True
                     st.session_state.planning_history.append({
                         "timestamp": datetime.now().isoformat(),
@@ -621,7 +744,16 @@ def main():
                     st.exception(e)
 
     else:
-        if st.session_state.final_state:
+        if st.session_state.comparison:
+            display_comparison(st.session_state.comparison)
+
+            st.divider()
+            if st.button("🔄 Plan New Trip", use_container_width=True):
+                st.session_state.trip_planned = False
+                st.session_state.comparison = None
+                st.rerun()
+
+        elif st.session_state.final_state:
             final_state = st.session_state.final_state
 
             st.markdown("## 📊 Your Trip Plan")
@@ -629,6 +761,13 @@ def main():
             # Weather
             if "weather_data" in final_state and final_state["weather_data"]:
                 display_weather_step(final_state["weather_data"])
+                if final_state.get("daily_weather"):
+                    display_daily_weather(final_state["daily_weather"])
+                st.markdown("<br>", unsafe_allow_html=True)
+
+            # Alternatives, when the trip could not go ahead
+            if final_state.get("alternatives"):
+                display_alternatives(final_state["alternatives"], final_state.get("alternatives_explanation") or "")
                 st.markdown("<br>", unsafe_allow_html=True)
 
             # Flights
@@ -639,6 +778,9 @@ def main():
                 </div>
             """, unsafe_allow_html=True)
 
+            if final_state.get("price_calendar"):
+                display_price_calendar(final_state["price_calendar"], final_state["trip_request"].start_date)
+
             if "flights" in final_state and final_state["flights"]:
                 for idx, flight in enumerate(final_state["flights"][:3], 1):
                     display_flight_card(flight, idx)
@@ -0,0 +1,194 @@
+"""
+Headless batch planning: plan every trip in a JSONL file without the UI.
+
+    python batch.py trips.jsonl -o results.jsonl --concurrency 8
+    cat trips.jsonl | python batch.py - -o results.jsonl
+
+Each input line is a TripRequest as JSON plus an "id" (line numbers are used
+when it is missing). One result line is written per trip as soon as it
+finishes, so output is in completion order. Rerunning with the same output
+file resumes: trips whose id already has a result are skipped.
+"""
+from typing import Any, Dict, IO, Iterator, Optional, Set, Tuple
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from pydantic import ValidationError
+from config import Config
+from models import TripRequest
+from graph import arun_trip_planner
+from tools.http_client import aclose_async_client
+import metrics
+
+# Results with these statuses are not planned again on resume
+DONE_STATUSES = {"planned", "alternatives"}
+
+
+def read_requests(stream: IO[str]) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """(id, record) per non-empty line; unparsable lines come back as {"_error": ...}"""
+    for number, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield f"line-{number}", {"_error": f"Invalid JSON: {e}"}
+            continue
+        if not isinstance(record, dict):
+            yield f"line-{number}", {"_error": "Expected a JSON object"}
+            continue
+        yield str(record.pop("id", None) or f"line-{number}"), record
+
+
+def completed_ids(path: str, retry_failed: bool = False) -> Set[str]:
+    """Ids that already have a result in an existing output file"""
+    done: Set[str] = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+            except json.JSONDecodeError:
+                # Partially written last line from a crash; that trip runs again
+                continue
+            if not retry_failed or result.get("status") in DONE_STATUSES:
+                done.add(str(result.get("id")))
+    return done
+
+
+def result_record(request_id: str, state: Optional[Dict[str, Any]], duration: float,
+                  error: Optional[str] = None) -> Dict[str, Any]:
+    """One output line for a finished trip"""
+    if state is None:
+        return {"id": request_id, "status": "failed", "duration": round(duration, 3), "errors": [error]}
+
+    itinerary = state.get("itinerary")
+    if itinerary is not None:
+        status = "planned"
+    elif state.get("current_step") == "alternatives_suggested":
+        status = "alternatives"
+    else:
+        status = "failed"
+
+    return {
+        "id": request_id,
+        "status": status,
+        "duration": round(duration, 3),
+        "current_step": state.get("current_step"),
+        "errors": state.get("errors", []),
+        "messages": state.get("messages", []),
+        "itinerary": itinerary.model_dump(mode="json") if itinerary is not None else None
+    }
+
+
+async def plan_one(request_id: str, record: Dict[str, Any], parallel: bool) -> Dict[str, Any]:
+    started = time.perf_counter()
+    if "_error" in record:
+        return result_record(request_id, None, 0.0, record["_error"])
+    try:
+        trip_request = TripRequest(**record)
+    except ValidationError as e:
+        return result_record(request_id, None, 0.0, f"Invalid trip request: {e}")
+
+    try:
+        state = await arun_trip_planner(trip_request, parallel)
+    except Exception as e:
+        return result_record(request_id, None, time.perf_counter() - started, f"{type(e).__name__}: {e}")
+    return result_record(request_id, dict(state), time.perf_counter() - started)
+
+
+async def run_batch(source: IO[str], sink: IO[str], concurrency: int = Config.BATCH_CONCURRENCY,
+                    skip: Set[str] = frozenset(), parallel: bool = Config.PARALLEL_SEARCHES) -> Dict[str, int]:
+    """
+    Plan every request from source with at most `concurrency` in flight.
+    Input is read lazily, so files of any size use bounded memory. Each result
+    is flushed to sink as it completes; returns counts per status.
+    """
+    slots = asyncio.Semaphore(max(1, concurrency))
+    counts: Dict[str, int] = {"skipped": 0}
+    pending: Set[asyncio.Task] = set()
+    requests = read_requests(source)
+
+    async def worker(request_id: str, record: Dict[str, Any]) -> None:
+        try:
+            result = await plan_one(request_id, record, parallel)
+            sink.write(json.dumps(result, ensure_ascii=False) + "\n")
+            sink.flush()
+            counts[result["status"]] = counts.get(result["status"], 0) + 1
+            print(f"{'✅' if result['status'] in DONE_STATUSES else '❌'} {request_id}: "
+                  f"{result['status']} in {result['duration']:.1f}s", file=sys.stderr)
+        finally:
+            slots.release()
+
+    while True:
+        # Reading off the loop keeps in-flight plans moving while stdin waits
+        item = await asyncio.to_thread(next, requests, None)
+        if item is None:
+            break
+        request_id, record = item
+        if request_id in skip:
+            counts["skipped"] += 1
+            continue
+        await slots.acquire()
+        task = asyncio.create_task(worker(request_id, record))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+
+    if pending:
+        await asyncio.gather(*pending)
+    await aclose_async_client()
+    return counts
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description="Plan trips from a JSONL file of trip requests")
+    parser.add_argument("input", help="JSONL file of trip requests, or - for stdin")
+    parser.add_argument("-o", "--output", help="JSONL results file (appended to and used to resume); stdout if omitted")
+    parser.add_argument("-c", "--concurrency", type=int, default=Config.BATCH_CONCURRENCY,
+                        help=f"plans in flight at once (default {Config.BATCH_CONCURRENCY})")
+    parser.add_argument("--sequential", action="store_true", help="run the searches one after another inside each plan")
+    parser.add_argument("--retry-failed", action="store_true", help="on resume, plan failed trips again")
+    args = parser.parse_args(argv)
+
+    Config.validate()
+
+    skip = completed_ids(args.output, args.retry_failed) if args.output else set()
+    if skip:
+        print(f"↩️  Resuming: {len(skip)} trip(s) already have results", file=sys.stderr)
+
+    source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    sink = open(args.output, "a", encoding="utf-8") if args.output else sys.stdout
+    if args.output and sink.tell() > 0:
+        with open(args.output, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                # Terminate a line cut off by a crash so the next result starts clean
+                sink.write("\n")
+    started = time.perf_counter()
+    try:
+        # Planner progress goes to stderr so stdout carries only results
+        stdout, sys.stdout = sys.stdout, sys.stderr
+        try:
+            counts = asyncio.run(run_batch(source, sink, args.concurrency, skip, Config.PARALLEL_SEARCHES and not args.sequential))
+        finally:
+            sys.stdout = stdout
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if sink is not sys.stdout:
+            sink.close()
+
+    summary = ", ".join(f"{status}: {count}" for status, count in sorted(counts.items()))
+    print(f"🏁 Batch finished in {time.perf_counter() - started:.1f}s ({summary})", file=sys.stderr)
+    if Config.METRICS_DUMP_PATH:
+        metrics.dump_json(Config.METRICS_DUMP_PATH)
+    return 0 if counts.get("failed", 0) == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
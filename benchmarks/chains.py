@@ -0,0 +1,165 @@
+'''
+Micro-benchmark of the per-call cost of the tool and node Runnable chains.
+
+    python -m benchmarks.chains -n 300
+
+Every upstream call is served from a warm cache, so what remains is the chain
+itself. "build" is constructing the chain alone, the overhead every call used
+to pay; "rebuilt" builds a fresh chain for each call, as before, and "reused"
+invokes the chain the tool or node keeps. Chains whose model call cannot be
+served from a cache are timed on construction only.
+'''
+from typing import Any, Callable, Dict, List, Optional
+from pathlib import Path
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from benchmarks.run import STANDIN_DEFAULTS
+
+# Upstream answers stay cached for the whole run
+CACHE_OVERRIDES = {
+    "RESULT_CACHE_ENABLED": "true",
+    "WEATHER_CACHE_TTL": "3600",
+    "METRICS_ENABLED": "false",
+}
+
+
+def _per_call_us(calls: List[Callable[[], Any]], iterations: int) -> List[float]:
+    '''
+    Median wall time of one call of each, in microseconds. The calls take
+    turns, so drift during the run affects them alike.
+    '''
+    timings: List[List[float]] = [[] for _ in calls]
+    for _ in range(iterations):
+        for call, samples in zip(calls, timings):
+            started = time.perf_counter()
+            call()
+            samples.append(time.perf_counter() - started)
+    return [round(statistics.median(samples) * 1e6, 1) for samples in timings]
+
+
+def _cases() -> List[Dict[str, Any]]:
+    '''Builder for every chain, and rebuilt/reused calls where the whole call can be served warm'''
+    from nodes.weather_check import weather_tool
+    from nodes.flight_search import flight_tool
+    from nodes.hotel_search import hotel_tool
+    from nodes.attraction_search import attraction_tool
+    from nodes.itinerary_generation import ITINERARY_PROMPT, _itinerary_chain
+    from nodes.alternative_suggestion import _explanation_chain, _suggestion_chain
+    from tools.airport_lookup import _airport_code_chain, airport_index
+    from benchmarks.corpus import TRIPS
+
+    # The corpus trip to Paris, so every call is one the stand-ins can answer
+    trip = TRIPS[0]["request"]
+    start, end = trip["start_date"], trip["end_date"]
+    weather_inputs = {"city": "Paris", "date": start}
+    flight_inputs = flight_tool._flight_params(airport_index.lookup("New York") or "", airport_index.lookup("Paris") or "",
+                                               start, 3000, end)
+    hotel_inputs = hotel_tool._hotel_params("Paris", start, end, 3000, 1)
+    attraction_inputs = {"destination": "Paris"}
+    itinerary_inputs = {name: "Paris" for name in ITINERARY_PROMPT.input_variables}
+    itinerary_inputs.update({"first_day": 1, "day_count": 3, "duration": 3, "start_date": start})
+
+    def build_attractions():
+        # The extraction chain inside used to be rebuilt on every call as well
+        attraction_tool._build_extraction_chain()
+        return attraction_tool._build_attractions_runnable()
+
+    def build_itinerary():
+        # The prompt template used to be created for every request too
+        from langchain_core.prompts import ChatPromptTemplate
+        from llm_provider import cached_completion
+        prompt = ChatPromptTemplate.from_messages([
+            (role, message.prompt.template) for role, message in zip(("system", "user"), ITINERARY_PROMPT.messages)
+        ])
+        return prompt | cached_completion("itinerary", namespace="itinerary")
+
+    def rebuilt_attractions():
+        attraction_tool._extraction = None
+        return attraction_tool._build_attractions_runnable().invoke(attraction_inputs)
+
+    return [
+        {"name": "weather", "build": weather_tool._build_weather_runnable,
+         "rebuilt": lambda: weather_tool._build_weather_runnable().invoke(weather_inputs),
+         "reused": lambda: weather_tool.get_weather_runnable().invoke(weather_inputs)},
+        {"name": "flights", "build": flight_tool._build_flights_runnable,
+         "rebuilt": lambda: flight_tool._build_flights_runnable().invoke(flight_inputs),
+         "reused": lambda: flight_tool.search_flights_runnable().invoke(flight_inputs)},
+        {"name": "hotels", "build": hotel_tool._build_hotels_runnable,
+         "rebuilt": lambda: hotel_tool._build_hotels_runnable().invoke(hotel_inputs),
+         "reused": lambda: hotel_tool.search_hotels_runnable().invoke(hotel_inputs)},
+        {"name": "attractions", "build": build_attractions,
+         "rebuilt": rebuilt_attractions,
+         "reused": lambda: attraction_tool.search_attractions_runnable().invoke(attraction_inputs)},
+        {"name": "itinerary", "build": build_itinerary,
+         "rebuilt": lambda: build_itinerary().invoke(itinerary_inputs),
+         "reused": lambda: _itinerary_chain(3).invoke(itinerary_inputs)},
+        {"name": "alternatives_explanation", "build": _explanation_chain.__wrapped__},
+        {"name": "alternatives_suggestion", "build": _suggestion_chain.__wrapped__},
+        {"name": "airport_code", "build": _airport_code_chain.__wrapped__},
+    ]
+
+
+def run_chain_benchmark(iterations: int) -> Dict[str, Any]:
+    from benchmarks.corpus import SyntheticStore
+    from tools.fixtures import set_fixture_store
+    from tools.standin_server import start_standin_server
+
+    set_fixture_store(SyntheticStore())
+    start_standin_server()
+
+    results: Dict[str, Any] = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        cases = _cases()
+        for case in cases:
+            if "rebuilt" not in case:
+                continue
+            # Untimed calls fill the caches and warm the shared chain
+            case["rebuilt"]()
+            case["reused"]()
+
+    for case in cases:
+        with contextlib.redirect_stdout(io.StringIO()):
+            row = {"build_us": _per_call_us([case["build"]], iterations)[0]}
+            if "rebuilt" in case:
+                rebuilt, reused = _per_call_us([case["rebuilt"], case["reused"]], iterations)
+                row.update({"rebuilt_us": rebuilt, "reused_us": reused,
+                            "saved_pct": round((1 - reused / rebuilt) * 100, 1) if rebuilt else 0.0})
+        results[case["name"]] = row
+    return results
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description="Per-call overhead of rebuilt vs reused Runnable chains")
+    parser.add_argument("-n", "--iterations", type=int, default=300, help="timed calls per chain and mode")
+    parser.add_argument("-o", "--output", help="also write the results as JSON")
+    args = parser.parse_args(argv)
+
+    for key, value in STANDIN_DEFAULTS.items():
+        os.environ.setdefault(key, value)
+    os.environ.update(CACHE_OVERRIDES)
+    # A throwaway result cache, so the run neither reads nor pollutes the real one
+    os.environ.setdefault("CACHE_DB_PATH", str(Path(tempfile.mkdtemp()) / "chains.sqlite3"))
+
+    results = run_chain_benchmark(args.iterations)
+
+    print(f"{'chain':<26}{'build':>10}{'rebuilt':>12}{'reused':>12}{'saved':>8}", file=sys.stderr)
+    for name, row in results.items():
+        line = f"{name:<26}{row['build_us']:>7.0f} us"
+        if "rebuilt_us" in row:
+            line += f"{row['rebuilt_us']:>9.0f} us{row['reused_us']:>9.0f} us{row['saved_pct']:>7.0f}%"
+        print(line, file=sys.stderr)
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,183 @@
+'''
+Representative trips for the benchmark, each with the "world" the stand-ins
+answer with: weather at the destination, flight prices and hotel rates.
+'''
+from typing import Any, Dict, List, Optional
+from datetime import date, datetime, timedelta
+import json
+import re
+import time
+from tools.airport_lookup import airport_index, normalize_place
+
+# Trips start this many days from today and a week apart, so the corpus never
+# asks for past dates and keeps the same spread between the forecast horizon
+# and the climatology whenever it runs
+FIRST_TRIP_DAYS_AHEAD = 14
+TRIP_SPACING_DAYS = 7
+
+
+def trip_dates(slot: int, nights: int) -> Dict[str, str]:
+    """start_date and end_date for the corpus trip in the given slot"""
+    start = date.today() + timedelta(days=FIRST_TRIP_DAYS_AHEAD + TRIP_SPACING_DAYS * slot)
+    return {"start_date": start.isoformat(), "end_date": (start + timedelta(days=nights)).isoformat()}
+
+
+TRIPS: List[Dict[str, Any]] = [
+    {
+        "name": "short_cheap",
+        "request": {"origin": "New York", "destination": "Paris", **trip_dates(0, 3),
+                    "duration_days": 3, "budget": 3000},
+        "world": {"temp": 18, "condition": "Clouds", "flight_prices": [430, 520, 610], "hotel_rates": [95, 120, 180]},
+        "expect": "itinerary_complete"
+    },
+    {
+        "name": "short_expensive",
+        "request": {"origin": "Los Angeles", "destination": "Tokyo", **trip_dates(1, 6),
+                    "duration_days": 6, "budget": 12000, "num_travelers": 2},
+        "world": {"temp": 21, "condition": "Clear", "flight_prices": [1150, 1480, 2100], "hotel_rates": [240, 310, 450]},
+        "expect": "itinerary_complete"
+    },
+    {
+        "name": "long",
+        "request": {"origin": "London", "destination": "Rome", **trip_dates(2, 14),
+                    "duration_days": 14, "budget": 7000},
+        "world": {"temp": 23, "condition": "Clear", "flight_prices": [180, 240], "hotel_rates": [85, 110, 150]},
+        "expect": "itinerary_complete"
+    },
+    {
+        "name": "weather_fail",
+        "request": {"origin": "New York", "destination": "Reykjavik", **trip_dates(3, 4),
+                    "duration_days": 4, "budget": 3500},
+        "world": {"temp": -2, "condition": "Snow", "flight_prices": [520], "hotel_rates": [160]},
+        "expect": "alternatives_suggested"
+    },
+    {
+        "name": "flight_fail",
+        "request": {"origin": "New York", "destination": "Sydney", **trip_dates(4, 7),
+                    "duration_days": 7, "budget": 1800},
+        "world": {"temp": 26, "condition": "Clear", "flight_prices": [1750, 2300], "hotel_rates": [140]},
+        "expect": "alternatives_suggested"
+    },
+]
+
+
+class SyntheticStore:
+    '''
+    Deterministic API and LLM responses generated from the corpus, served by
+    the stand-in server and the replay chat model in place of recordings.
+    Response sizes follow the real services so parsing costs stay realistic.
+    '''
+
+    def __init__(self, trips: List[Dict[str, Any]] = TRIPS):
+        self.by_city: Dict[str, Dict[str, Any]] = {}
+        self.by_airport: Dict[str, Dict[str, Any]] = {}
+        for trip in trips:
+            destination = trip["request"]["destination"]
+            self.by_city[normalize_place(destination)] = trip["world"]
+            self.by_airport[airport_index.lookup(destination) or ""] = trip["world"]
+
+    def _city_world(self, text: str) -> Optional[Dict[str, Any]]:
+        return self.by_city.get(normalize_place(text))
+
+    def load_http(self, endpoint: str, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        if endpoint == "weather":
+            world = self._city_world(params.get("q", ""))
+            if world is None:
+                return None
+            body = {
+                "main": {"temp": world["temp"], "humidity": 60},
+                "weather": [{"main": world["condition"]}],
+                "wind": {"speed": 4.2}
+            }
+        elif endpoint == "forecast":
+            world = self._city_world(params.get("q", ""))
+            if world is None:
+                return None
+            # Five days of 3-hourly slots from the current hour, like the real endpoint
+            start = int(time.time()) // 10800 * 10800
+            body = {
+                "city": {"name": params.get("q", ""), "timezone": 0},
+                "list": [
+                    {"dt": start + 10800 * i, "main": {"temp": world["temp"], "humidity": 60},
+                     "weather": [{"main": world["condition"]}], "wind": {"speed": 4.2}, "pop": 0.05}
+                    for i in range(40)
+                ]
+            }
+        elif params.get("engine") == "google_flights":
+            world = self.by_airport.get(params.get("arrival_id", ""))
+            if world is None:
+                return None
+            departure = params.get("outbound_date", "")
+            body = {"best_flights": [self._flight(i, price, departure) for i, price in enumerate(world["flight_prices"])]}
+        elif params.get("engine") == "google_hotels":
+            world = self._city_world(params.get("q", "").replace("hotels in ", "", 1))
+            if world is None:
+                return None
+            body = {"properties": [self._hotel(i, rate) for i, rate in enumerate(world["hotel_rates"])]}
+        else:
+            destination = params.get("q", "").replace("top tourist attractions in ", "", 1)
+            body = {"organic_results": [
+                {"title": f"{destination} Sight {i}", "snippet": f"A well known sight number {i} in {destination}."}
+                for i in range(1, 11)
+            ]}
+        return {"status": 200, "body": body}
+
+    def _flight(self, index: int, price: float, departure: str) -> Dict[str, Any]:
+        return {
+            "price": price,
+            "total_duration": 420 + 35 * index,
+            "flights": [{
+                "airline": ["Delta", "Air France", "United"][index % 3],
+                "departure_airport": {"time": f"{departure} 08:00"},
+                "arrival_airport": {"time": f"{departure} 21:00"}
+            }],
+            "booking_token": f"token-{index}"
+        }
+
+    def _hotel(self, index: int, rate: float) -> Dict[str, Any]:
+        return {
+            "name": f"Hotel {chr(65 + index)}",
+            "description": "Central location close to public transport",
+            "rate_per_night": {"lowest": f"${rate}"},
+            "overall_rating": 4.0 + index / 10,
+            "amenities": ["Free Wi-Fi", "Breakfast", "Air conditioning", "Gym", "Bar", "Spa"],
+            "link": f"https://example.com/hotel-{index}"
+        }
+
+    def load_llm(self, model: str, prompt: str) -> str:
+        if "Extract top 5 attractions" in prompt:
+            destination = re.search(r"Destination: (.+)", prompt).group(1).strip()
+            return json.dumps([
+                {"name": f"{destination} Sight {i}", "description": f"Sight number {i}", "category": "Landmark", "rating": 4.5}
+                for i in range(1, 6)
+            ])
+        if "daily_plans" in prompt:
+            return self._itinerary(prompt)
+        return "\n".join(
+            f"{i}. Alternative {i} - better conditions, similar budget, top attractions A, B and C."
+            for i in range(1, 4)
+        )
+
+    def _itinerary(self, prompt: str) -> str:
+        day_count = int(re.search(r"Include ALL (\d+) days", prompt).group(1))
+        first_day = int(re.search(r'"day": (\d+),', prompt).group(1))
+        start = datetime.strptime(re.search(r'"date": "(\d{4}-\d{2}-\d{2})"', prompt).group(1), "%Y-%m-%d")
+        plans = []
+        for offset in range(day_count):
+            plans.append({
+                "day": first_day + offset,
+                "date": (start + timedelta(days=offset)).strftime("%Y-%m-%d"),
+                "activities": [
+                    {"time_of_day": slot, "description": f"Visit sight {first_day + offset}-{n} and explore the area",
+                     "travel_time": "15 minutes by metro", "estimated_cost": f"${15 + 5 * n} per person"}
+                    for n, slot in enumerate(["Morning (9:00 AM - 12:00 PM)", "Afternoon (2:00 PM - 5:00 PM)",
+                                              "Evening (7:00 PM - 10:00 PM)"])
+                ],
+                "meals": [
+                    {"type": meal, "suggestion": f"Local {meal.lower()} spot - regional specialties",
+                     "estimated_cost": f"${cost} per person"}
+                    for meal, cost in [("Breakfast", 15), ("Lunch", 25), ("Dinner", 45)]
+                ],
+                "notes": "Book popular sights in advance."
+            })
+        return json.dumps({"daily_plans": plans}, indent=2)
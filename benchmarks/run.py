@@ -0,0 +1,255 @@
+'''
+End-to-end benchmark of the planning graph against deterministic local stand-ins.
+
+    python -m benchmarks.run -n 5 -o bench.json
+    python -m benchmarks.run -n 5 -o new.json --baseline bench.json
+
+Every corpus trip is planned with run_trip_planner and run_trip_planner_stepwise.
+The report holds end-to-end and per-node p50/p95, time to first yield, peak RSS
+and traced allocations. Budgets and the allowed slowdown against a baseline come
+from benchmarks/thresholds.json; any breach is listed and the exit code is 1.
+'''
+from typing import Any, Dict, List, Optional
+from pathlib import Path
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+THRESHOLDS_PATH = Path(__file__).parent / "thresholds.json"
+
+# Stand-in behaviour used unless the environment says otherwise
+STANDIN_DEFAULTS = {
+    "API_MODE": "replay",
+    "STANDIN_PORT": "8766",
+    "STANDIN_LATENCY_MS": "80",
+    "STANDIN_JITTER_MS": "0",
+    "STANDIN_ERROR_RATE": "0",
+    "STANDIN_RATE_LIMIT": "0",
+    "STANDIN_LLM_LATENCY_MS": "300",
+    "STANDIN_LLM_MS_PER_KCHAR": "100",
+    # Every run does the full work: no result cache, no weather reuse
+    "RESULT_CACHE_ENABLED": "false",
+    "WEATHER_CACHE_TTL": "0",
+    "METRICS_ENABLED": "true",
+    # Corpus trips are weeks out, past the forecast horizon; their "world" is today's weather
+    "WEATHER_MODE": "current",
+}
+
+
+def _summary(values: List[float]) -> Dict[str, float]:
+    from metrics import Summary
+
+    summary = Summary(max(len(values), 1))
+    for value in values:
+        summary.observe(value)
+    quantiles = summary.quantiles()
+    return {
+        "n": summary.count,
+        "mean": round(summary.sum / summary.count, 4) if summary.count else 0.0,
+        "p50": round(quantiles[0.5], 4),
+        "p95": round(quantiles[0.95], 4),
+        "max": round(summary.max, 4)
+    }
+
+
+def _peak_rss_mb() -> Optional[float]:
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=Path(__file__).parent, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run_benchmark(iterations: int, trips: List[Dict[str, Any]], quiet: bool = True) -> Dict[str, Any]:
+    # Imported after the environment is set, since Config reads it at import time
+    from config import Config
+    from graph import run_trip_planner, run_trip_planner_stepwise
+    from metrics import registry
+    from models import TripRequest
+    from tools.fixtures import set_fixture_store
+    from tools.standin_server import start_standin_server
+    from benchmarks.corpus import SyntheticStore
+
+    set_fixture_store(SyntheticStore(trips))
+    start_standin_server()
+    output = io.StringIO if quiet else None
+
+    def plan(trip: Dict[str, Any], stepwise: bool) -> Dict[str, Any]:
+        request = TripRequest(**trip["request"])
+        started = time.perf_counter()
+        first_yield = None
+        with contextlib.redirect_stdout(output()) if output else contextlib.nullcontext():
+            if stepwise:
+                final = None
+                for state in run_trip_planner_stepwise(request):
+                    if first_yield is None:
+                        first_yield = time.perf_counter() - started
+                    final = state
+            else:
+                final = run_trip_planner(request)
+        return {"seconds": time.perf_counter() - started, "first_yield": first_yield, "state": final}
+
+    # One untimed pass so imports, clients and the stand-in are warm
+    for trip in trips:
+        plan(trip, stepwise=False)
+    registry.reset()
+
+    scenarios: Dict[str, Any] = {}
+    for trip in trips:
+        e2e: List[float] = []
+        stepwise_e2e: List[float] = []
+        first_yields: List[float] = []
+        outcomes = set()
+        for _ in range(iterations):
+            result = plan(trip, stepwise=False)
+            e2e.append(result["seconds"])
+            outcomes.add(result["state"]["current_step"])
+
+            result = plan(trip, stepwise=True)
+            stepwise_e2e.append(result["seconds"])
+            if result["first_yield"] is not None:
+                first_yields.append(result["first_yield"])
+
+        # Allocation profile from a separate run, since tracing slows everything down
+        tracemalloc.start()
+        plan(trip, stepwise=False)
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        scenarios[trip["name"]] = {
+            "e2e_seconds": _summary(e2e),
+            "stepwise_e2e_seconds": _summary(stepwise_e2e),
+            "ttfy_seconds": _summary(first_yields),
+            "alloc_peak_kb": round(peak / 1024, 1),
+            "alloc_retained_kb": round(current / 1024, 1),
+            "outcomes": sorted(outcomes),
+            "expected_outcome": trip.get("expect")
+        }
+        print(f"  {trip['name']:<16} p50 {scenarios[trip['name']]['e2e_seconds']['p50']:.3f}s  "
+              f"p95 {scenarios[trip['name']]['e2e_seconds']['p95']:.3f}s  "
+              f"ttfy p95 {scenarios[trip['name']]['ttfy_seconds']['p95']:.3f}s", file=sys.stderr)
+
+    snapshot = registry.to_dict()
+    nodes = {
+        row["labels"]["node"]: {key: round(row[key], 4) for key in ("p50", "p95", "max")} | {"n": row["count"]}
+        for row in snapshot["summaries"].get("trip_node_duration_seconds", [])
+    }
+    tools = {
+        row["labels"]["tool"]: {key: round(row[key], 4) for key in ("p50", "p95", "max")} | {"n": row["count"]}
+        for row in snapshot["summaries"].get("trip_tool_call_duration_seconds", [])
+    }
+
+    return {
+        "meta": {
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "git": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "iterations": iterations,
+            "parallel_searches": Config.PARALLEL_SEARCHES,
+            "standin": {key: os.environ[key] for key in STANDIN_DEFAULTS}
+        },
+        "scenarios": scenarios,
+        "nodes": nodes,
+        "tools": tools,
+        "peak_rss_mb": _peak_rss_mb()
+    }
+
+
+def _budget(budgets: Dict[str, Any], metric: str, scenario: str) -> Optional[float]:
+    limits = budgets.get(metric)
+    if isinstance(limits, dict):
+        return limits.get(scenario, limits.get("default"))
+    return limits
+
+
+def check_thresholds(report: Dict[str, Any], thresholds: Dict[str, Any],
+                     baseline: Optional[Dict[str, Any]] = None) -> List[str]:
+    '''Human readable list of budget breaches and regressions against the baseline'''
+    problems: List[str] = []
+    budgets = thresholds.get("budgets", {})
+    tolerance = thresholds.get("tolerance", 0.2)
+    min_delta = thresholds.get("min_delta_seconds", 0.05)
+
+    for name, result in report["scenarios"].items():
+        if result["expected_outcome"] and result["outcomes"] != [result["expected_outcome"]]:
+            problems.append(f"{name}: ended in {result['outcomes']}, expected {result['expected_outcome']}")
+
+        for metric, key in (("e2e_p95_seconds", "e2e_seconds"), ("ttfy_p95_seconds", "ttfy_seconds")):
+            limit = _budget(budgets, metric, name)
+            value = result[key]["p95"]
+            if limit is not None and value > limit:
+                problems.append(f"{name}: {key} p95 {value:.3f}s over budget {limit:.3f}s")
+
+        limit = _budget(budgets, "alloc_peak_kb", name)
+        if limit is not None and result["alloc_peak_kb"] > limit:
+            problems.append(f"{name}: peak allocations {result['alloc_peak_kb']:.0f} KB over budget {limit:.0f} KB")
+
+        previous = (baseline or {}).get("scenarios", {}).get(name)
+        if previous:
+            for key in ("e2e_seconds", "stepwise_e2e_seconds", "ttfy_seconds"):
+                for quantile in ("p50", "p95"):
+                    old, new = previous[key][quantile], result[key][quantile]
+                    # Small absolute differences are noise, whatever the ratio
+                    if new > old * (1 + tolerance) and new - old > min_delta:
+                        problems.append(f"{name}: {key} {quantile} {old:.3f}s -> {new:.3f}s "
+                                        f"(+{(new / old - 1) * 100:.0f}%, tolerance {tolerance * 100:.0f}%)")
+
+    limit = budgets.get("peak_rss_mb")
+    if limit is not None and report["peak_rss_mb"] is not None and report["peak_rss_mb"] > limit:
+        problems.append(f"peak RSS {report['peak_rss_mb']:.0f} MB over budget {limit:.0f} MB")
+    return problems
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the trip planning graph against local stand-ins")
+    parser.add_argument("-n", "--iterations", type=int, default=5, help="timed runs per trip and mode")
+    parser.add_argument("-o", "--output", default="benchmark_results.json")
+    parser.add_argument("--baseline", help="earlier report to compare against")
+    parser.add_argument("--thresholds", default=str(THRESHOLDS_PATH))
+    parser.add_argument("--trip", action="append", help="only run the named corpus trip(s)")
+    parser.add_argument("--verbose", action="store_true", help="keep the planner's own output")
+    args = parser.parse_args(argv)
+
+    for key, value in STANDIN_DEFAULTS.items():
+        os.environ.setdefault(key, value)
+
+    from benchmarks.corpus import TRIPS
+
+    trips = [trip for trip in TRIPS if not args.trip or trip["name"] in args.trip]
+    print(f"⏱️  Benchmarking {len(trips)} trip(s), {args.iterations} run(s) each", file=sys.stderr)
+    report = run_benchmark(args.iterations, trips, quiet=not args.verbose)
+
+    thresholds = json.loads(Path(args.thresholds).read_text(encoding="utf-8"))
+    baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8")) if args.baseline else None
+    problems = check_thresholds(report, thresholds, baseline)
+    report["problems"] = problems
+
+    Path(args.output).write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"📄 Report written to {args.output} (peak RSS {report['peak_rss_mb']} MB)", file=sys.stderr)
+    for problem in problems:
+        print(f"❌ {problem}", file=sys.stderr)
+    if not problems:
+        print("✅ Within budgets" + (" and baseline" if baseline else ""), file=sys.stderr)
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,202 @@
+"""
+Multi-destination comparison: one trip request planned against several
+candidate cities, returned as a ranked table.
+
+The weather and flight checks run for every candidate at once and prune the
+infeasible ones before any expensive work. Hotels, attractions and the
+itinerary are generated only for the top-K survivors by flight price.
+"""
+from typing import List
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import time
+from config import Config
+from models import DestinationComparison, TripRequest
+from state_types import TripPlannerState
+from graph import initial_state
+from tools.airport_lookup import get_airport_code, aget_airport_code
+from metrics import track
+from nodes import (
+    weather_check_node,
+    weather_decision_node,
+    flight_search_node,
+    flight_budget_decision,
+    hotel_search_node,
+    attraction_search_node,
+    itinerary_generation_node,
+    aweather_check_node,
+    aflight_search_node,
+    ahotel_search_node,
+    aattraction_search_node,
+    aitinerary_generation_node
+)
+
+PRUNE_REASONS = {
+    "unfavorable_weather": "Unfavorable weather",
+    "no_flights_available": "No flights within the flight budget",
+    "flights_too_expensive": "Flights over 60% of the budget"
+}
+
+
+def candidate_destinations(destinations: List[str]) -> List[str]:
+    """Distinct non-empty destinations in the given order, at most COMPARE_MAX_DESTINATIONS"""
+    seen = set()
+    candidates = []
+    for destination in destinations:
+        name = destination.strip()
+        if name and name.casefold() not in seen:
+            seen.add(name.casefold())
+            candidates.append(name)
+    if not candidates:
+        raise ValueError("No destinations to compare")
+    return candidates[:Config.COMPARE_MAX_DESTINATIONS]
+
+
+def _candidate_state(trip_request: TripRequest, destination: str) -> TripPlannerState:
+    return initial_state(trip_request.model_copy(update={"destination": destination}))
+
+
+def _passed_gates(state: TripPlannerState) -> bool:
+    return state.get("alternative_reason") is None and bool(state.get("flights"))
+
+
+def _gate(state: TripPlannerState) -> TripPlannerState:
+    """Weather, then flights only if the weather is good"""
+    weather_check_node(state)
+    if weather_decision_node(state) == "proceed_to_flights":
+        flight_search_node(state)
+        flight_budget_decision(state)
+    return state
+
+
+async def _agate(state: TripPlannerState) -> TripPlannerState:
+    """Async variant of _gate"""
+    await aweather_check_node(state)
+    if weather_decision_node(state) == "proceed_to_flights":
+        await aflight_search_node(state)
+        flight_budget_decision(state)
+    return state
+
+
+def _plan(state: TripPlannerState) -> TripPlannerState:
+    """Hotels and attractions side by side (they write different keys), then the itinerary"""
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        list(executor.map(lambda node: node(state), (hotel_search_node, attraction_search_node)))
+    return itinerary_generation_node(state)
+
+
+async def _aplan(state: TripPlannerState) -> TripPlannerState:
+    """Async variant of _plan"""
+    await asyncio.gather(ahotel_search_node(state), aattraction_search_node(state))
+    return await aitinerary_generation_node(state)
+
+
+def _select(states: List[TripPlannerState], top_k: int) -> List[TripPlannerState]:
+    """Survivors of the gates with the cheapest flights"""
+    survivors = [state for state in states if _passed_gates(state)]
+    survivors.sort(key=lambda state: min(f.price for f in state["flights"]))
+    return survivors[:max(0, top_k)]
+
+
+def _row(state: TripPlannerState, planned: bool) -> DestinationComparison:
+    trip_request = state["trip_request"]
+    weather = state.get("weather_data")
+    flights = state.get("flights") or []
+    hotels = state.get("hotels") or []
+    itinerary = state.get("itinerary")
+
+    if planned and itinerary is not None:
+        status, reason = "planned", None
+    elif planned:
+        status, reason = "failed", state["errors"][-1] if state.get("errors") else "Itinerary not generated"
+    elif _passed_gates(state):
+        status, reason = "feasible", "Not among the cheapest candidates"
+    elif weather is None and state.get("errors"):
+        status, reason = "failed", state["errors"][-1]
+    else:
+        status = "pruned"
+        reason = PRUNE_REASONS.get(state.get("alternative_reason") or "", "Did not pass the checks")
+        if state.get("expensive_flight_price"):
+            reason += f" (${state['expensive_flight_price']:,.0f})"
+
+    return DestinationComparison(
+        destination=trip_request.destination,
+        rank=0,
+        status=status,
+        reason=reason,
+        temperature=weather.temperature if weather else None,
+        condition=weather.condition if weather else None,
+        cheapest_flight=min(f.price for f in flights) if flights else None,
+        hotel_per_night=min(h.price_per_night for h in hotels) if hotels else None,
+        estimated_cost=itinerary.estimated_cost if itinerary else None,
+        itinerary=itinerary
+    )
+
+
+def rank_candidates(rows: List[DestinationComparison], budget: float) -> List[DestinationComparison]:
+    """
+    Planned trips first, within budget before over budget and cheapest first;
+    then feasible ones by flight price; pruned and failed ones keep input order
+    """
+    def key(row: DestinationComparison):
+        if row.status == "planned":
+            return (0, (row.estimated_cost or 0) > budget, row.estimated_cost or 0)
+        if row.status == "feasible":
+            return (1, False, row.cheapest_flight or 0)
+        return (2, False, 0)
+
+    ranked = sorted(rows, key=key)
+    for rank, row in enumerate(ranked, 1):
+        row.rank = rank
+    return ranked
+
+
+def _finish(trip_request: TripRequest, states: List[TripPlannerState],
+            chosen: List[TripPlannerState], started: float) -> List[DestinationComparison]:
+    rows = rank_candidates([_row(state, any(state is c for c in chosen)) for state in states], trip_request.budget)
+    print(f"\n🏆 Compared {len(rows)} destinations in {time.perf_counter() - started:.1f}s")
+    for row in rows:
+        cost = f"${row.estimated_cost:,.0f}" if row.estimated_cost is not None else "-"
+        print(f"   {row.rank}. {row.destination}: {row.status} {cost}{f' - {row.reason}' if row.reason else ''}")
+    return rows
+
+
+def compare_destinations(trip_request: TripRequest, destinations: List[str],
+                         top_k: int = Config.COMPARE_TOP_K) -> List[DestinationComparison]:
+    """Plan `trip_request` for each destination and return the ranked comparison"""
+    candidates = candidate_destinations(destinations)
+    started = time.perf_counter()
+    print(f"🔀 Comparing {len(candidates)} destinations: {', '.join(candidates)}")
+
+    # Resolved once up front so the concurrent gates share the cached code
+    # instead of each falling back to the LLM for an unknown origin
+    get_airport_code(trip_request.origin)
+
+    states = [_candidate_state(trip_request, destination) for destination in candidates]
+    with ThreadPoolExecutor(max_workers=len(states), thread_name_prefix="compare") as executor:
+        with track("trip_compare_stage", {"stage": "gates"}):
+            list(executor.map(_gate, states))
+        chosen = _select(states, top_k)
+        print(f"✂️  {len(chosen)} of {len(states)} destinations go on to full planning")
+        with track("trip_compare_stage", {"stage": "plans"}):
+            list(executor.map(_plan, chosen))
+    return _finish(trip_request, states, chosen, started)
+
+
+async def acompare_destinations(trip_request: TripRequest, destinations: List[str],
+                                top_k: int = Config.COMPARE_TOP_K) -> List[DestinationComparison]:
+    """Async variant of compare_destinations"""
+    candidates = candidate_destinations(destinations)
+    started = time.perf_counter()
+    print(f"🔀 Comparing {len(candidates)} destinations: {', '.join(candidates)}")
+
+    await aget_airport_code(trip_request.origin)
+
+    states = [_candidate_state(trip_request, destination) for destination in candidates]
+    with track("trip_compare_stage", {"stage": "gates"}):
+        await asyncio.gather(*(_agate(state) for state in states))
+    chosen = _select(states, top_k)
+    print(f"✂️  {len(chosen)} of {len(states)} destinations go on to full planning")
+    with track("trip_compare_stage", {"stage": "plans"}):
+        await asyncio.gather(*(_aplan(state) for state in chosen))
+    return _finish(trip_request, states, chosen, started)
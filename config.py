@@ -8,6 +8,30 @@ class Config:
     GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
     SERPAPI_KEY = os.getenv("SERPAPI_KEY")
     
+    # "live" calls the real APIs, "record" also saves every response under FIXTURE_DIR,
+    # "replay" answers SerpAPI/OpenWeather from the local stand-in server and Gemini from fixtures
+    API_MODE = os.getenv("API_MODE", "live").lower()
+    FIXTURE_DIR = os.getenv("FIXTURE_DIR", "fixtures")
+    STANDIN_HOST = os.getenv("STANDIN_HOST", "127.0.0.1")
+    STANDIN_PORT = int(os.getenv("STANDIN_PORT", "8765"))
+    STANDIN_AUTOSTART = os.getenv("STANDIN_AUTOSTART", "true").lower() == "true"
+    # Injected behaviour of the stand-in: per-request latency, failure share, requests/sec (0 = unlimited)
+    STANDIN_LATENCY_MS = float(os.getenv("STANDIN_LATENCY_MS", "0"))
+    STANDIN_JITTER_MS = float(os.getenv("STANDIN_JITTER_MS", "0"))
+    STANDIN_ERROR_RATE = float(os.getenv("STANDIN_ERROR_RATE", "0"))
+    STANDIN_RATE_LIMIT = float(os.getenv("STANDIN_RATE_LIMIT", "0"))
+    STANDIN_LLM_LATENCY_MS = float(os.getenv("STANDIN_LLM_LATENCY_MS", "0"))
+    STANDIN_LLM_MS_PER_KCHAR = float(os.getenv("STANDIN_LLM_MS_PER_KCHAR", "0"))
+    
+    SERPAPI_BASE_URL = os.getenv(
+        "SERPAPI_BASE_URL",
+        f"http://{STANDIN_HOST}:{STANDIN_PORT}/search" if API_MODE == "replay" else "https://serpapi.com/search"
+    )
+    OPENWEATHER_BASE_URL = os.getenv(
+        "OPENWEATHER_BASE_URL",
+        f"http://{STANDIN_HOST}:{STANDIN_PORT}/data/2.5" if API_MODE == "replay" else "http://api.openweathermap.org/data/2.5"
+    )
+    
     LANGSMITH_API_KEY = os.getenv("LANGSMITH_API_KEY")
     LANGSMITH_PROJECT = os.getenv("LANGSMITH_PROJECT", "trip-planner-agent")
     LANGSMITH_TRACING = os.getenv("LANGSMITH_TRACING", "true")
@@ -15,14 +39,115 @@ class Config:
     MODEL_NAME = 'gemini-2.5-flash'
     TEMPERATURE = 0.7
     MAX_TOKENS = 2000
+    ITINERARY_MAX_TOKENS = int(os.getenv("ITINERARY_MAX_TOKENS", "16384"))
+    # Process-wide cap on Gemini requests (0 disables the limiter)
+    LLM_REQUESTS_PER_SECOND = float(os.getenv("LLM_REQUESTS_PER_SECOND", "0"))
+    # Cached chains generate at temperature 0 so identical prompts give identical answers
+    LLM_DETERMINISTIC = os.getenv("LLM_DETERMINISTIC", "false").lower() == "true"
+    
+    # Trips this long are generated as day blocks in parallel instead of one response
+    ITINERARY_CHUNK_MIN_DAYS = int(os.getenv("ITINERARY_CHUNK_MIN_DAYS", "10"))
+    ITINERARY_CHUNK_DAYS = int(os.getenv("ITINERARY_CHUNK_DAYS", "4"))
+    ITINERARY_MAX_WORKERS = int(os.getenv("ITINERARY_MAX_WORKERS", "4"))
+    ITINERARY_CHUNK_RETRIES = int(os.getenv("ITINERARY_CHUNK_RETRIES", "2"))
     
     DEFAULT_CURRENCY = "USD"
     MAX_HOTEL_RESULTS = 10
     MAX_FLIGHT_RESULTS = 5
     
+    # Run flight, hotel and attraction searches side by side after the weather check
+    PARALLEL_SEARCHES = os.getenv("PARALLEL_SEARCHES", "true").lower() == "true"
+    
+    # Flexible dates: at most this many days either side of the departure date,
+    # with this many date searches in flight at once
+    FLEXIBLE_DAYS_MAX = int(os.getenv("FLEXIBLE_DAYS_MAX", "3"))
+    FLEXIBLE_SEARCH_CONCURRENCY = int(os.getenv("FLEXIBLE_SEARCH_CONCURRENCY", "4"))
+    
+    # Destination comparison: full itineraries only for the best few candidates
+    COMPARE_TOP_K = int(os.getenv("COMPARE_TOP_K", "2"))
+    COMPARE_MAX_DESTINATIONS = int(os.getenv("COMPARE_MAX_DESTINATIONS", "6"))
+    
+    # Alternatives: candidates from the destination index checked against live
+    # weather, how many to suggest, and whether the LLM writes the explanation
+    ALTERNATIVE_CANDIDATES = int(os.getenv("ALTERNATIVE_CANDIDATES", "6"))
+    ALTERNATIVE_COUNT = int(os.getenv("ALTERNATIVE_COUNT", "3"))
+    ALTERNATIVE_LLM_EXPLANATIONS = os.getenv("ALTERNATIVE_LLM_EXPLANATIONS", "true").lower() == "true"
+    
+    # Start the flight search during the weather check instead of after it;
+    # a failed weather gate throws the speculative search away
+    SPECULATIVE_FLIGHTS = os.getenv("SPECULATIVE_FLIGHTS", "false").lower() == "true"
+    PREFETCH_WORKERS = int(os.getenv("PREFETCH_WORKERS", "8"))
+    
+    # Plans in flight at once for the batch CLI (batch.py)
+    BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "4"))
+    
+    # Progress display: node latencies kept per node for the remaining-time estimate
+    PROGRESS_HISTORY_WINDOW = int(os.getenv("PROGRESS_HISTORY_WINDOW", "50"))
+    SHOW_PROGRESS_ETA = os.getenv("SHOW_PROGRESS_ETA", "true").lower() == "true"
+    
+    # "current" checks today's conditions; "forecast" uses the 5 day forecast for the
+    # trip dates and typical monthly weather beyond it
+    WEATHER_MODE = os.getenv("WEATHER_MODE", "current").lower()
+    
+    # Weather responses are reused across sessions for this long (seconds)
+    WEATHER_CACHE_TTL = int(os.getenv("WEATHER_CACHE_TTL", "1800"))
+    WEATHER_CACHE_MAX_ENTRIES = int(os.getenv("WEATHER_CACHE_MAX_ENTRIES", "512"))
+    
+    # Bulk weather lookups (many cities at once): requests in flight, and request
+    # starts per second across the process (0 = no pacing)
+    WEATHER_BULK_CONCURRENCY = int(os.getenv("WEATHER_BULK_CONCURRENCY", "16"))
+    WEATHER_RATE_LIMIT = float(os.getenv("WEATHER_RATE_LIMIT", "0"))
+    
+    # Shared HTTP transport for SerpAPI and OpenWeather
+    HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "3.05"))
+    HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "30"))
+    HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "2"))
+    HTTP_BACKOFF_FACTOR = float(os.getenv("HTTP_BACKOFF_FACTOR", "0.5"))
+    HTTP_BACKOFF_JITTER = float(os.getenv("HTTP_BACKOFF_JITTER", "0.5"))
+    HTTP_POOL_HOSTS = int(os.getenv("HTTP_POOL_HOSTS", "4"))
+    HTTP_MAX_CONNECTIONS_PER_HOST = int(os.getenv("HTTP_MAX_CONNECTIONS_PER_HOST", "16"))
+    
+    # SQLite result cache shared by all worker processes on the host
+    RESULT_CACHE_ENABLED = os.getenv("RESULT_CACHE_ENABLED", "true").lower() == "true"
+    CACHE_DB_PATH = os.getenv("CACHE_DB_PATH", ".cache/trip_planner.sqlite3")
+    CACHE_TTLS = {
+        "flights": int(os.getenv("CACHE_TTL_FLIGHTS", "3600")),
+        "hotels": int(os.getenv("CACHE_TTL_HOTELS", "21600")),
+        "attractions": int(os.getenv("CACHE_TTL_ATTRACTIONS", "604800")),
+        "itinerary": int(os.getenv("CACHE_TTL_ITINERARY", "86400")),
+        "llm": int(os.getenv("CACHE_TTL_LLM", "604800")),
+    }
+    CACHE_MAX_ENTRIES = {
+        "flights": 5000,
+        "hotels": 5000,
+        "attractions": 2000,
+        "itinerary": 2000,
+        "llm": 5000,
+    }
+    
+    # Local instrumentation: latency summaries keep quantiles over this many recent samples
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    METRICS_WINDOW = int(os.getenv("METRICS_WINDOW", "2048"))
+    # Prometheus/JSON endpoint (0 keeps it off) and optional JSON dump after each plan
+    METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+    METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+    METRICS_DUMP_PATH = os.getenv("METRICS_DUMP_PATH", "")
+    
+    # LangSmith session traces are exported from a background queue; batches that
+    # cannot be sent are kept in a local spill file and retried later
+    TRACE_QUEUE_SIZE = int(os.getenv("TRACE_QUEUE_SIZE", "1000"))
+    TRACE_BATCH_SIZE = int(os.getenv("TRACE_BATCH_SIZE", "50"))
+    TRACE_FLUSH_INTERVAL = float(os.getenv("TRACE_FLUSH_INTERVAL", "2.0"))
+    TRACE_SPILL_PATH = os.getenv("TRACE_SPILL_PATH", ".cache/trace_spill.jsonl")
+    TRACE_SPILL_MAX_BYTES = int(os.getenv("TRACE_SPILL_MAX_BYTES", str(50 * 1024 * 1024)))
+    
     @classmethod
     def validate(cls):
         '''Validate that required API keys are present'''
+        if cls.API_MODE == "replay":
+            # Replay never reaches the real services
+            return True
+        
         required_keys = {
             "OPENWEATHERMAP_API_KEY": cls.OPENWEATHERMAP_API_KEY,
             "GEMINI_API_KEY": cls.GEMINI_API_KEY,
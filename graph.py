@@ -1,7 +1,15 @@
 from langgraph.graph import StateGraph, END
+from langgraph.config import get_stream_writer
+from langchain_core.runnables import RunnableLambda
 from state_types import TripPlannerState
 from models import TripRequest
-from typing import cast, Generator
+from config import Config
+from progress import ProgressEvent, ProgressTracker, latency_history
+from metrics import track
+from typing import cast, Callable, Dict, Any, List, Generator, AsyncGenerator, Awaitable, Optional
+from functools import lru_cache
+import time
+import uuid
 
 from nodes import (
     weather_check_node,
@@ -11,66 +19,204 @@ from nodes import (
     attraction_search_node,
     itinerary_generation_node,
     alternative_suggestion_node,
-    flight_budget_decision
+    flight_budget_decision,
+    aweather_check_node,
+    ahotel_search_node,
+    aflight_search_node,
+    aattraction_search_node,
+    aitinerary_generation_node,
+    aalternative_suggestion_node
 )
 
+# Searches that only need a favorable weather check, run side by side in parallel mode
+SEARCH_BRANCHES = ["search_flights", "search_hotels", "search_attractions"]
 
-def create_trip_planner_graph():
+# State keys each node is allowed to write back. Parallel branches must not
+# touch each other's keys or LangGraph rejects the concurrent update.
+NODE_OUTPUT_KEYS = {
+    "check_weather": ["weather_data", "daily_weather", "should_replan", "alternative_reason", "current_step"],
+    "search_flights": ["flights", "price_calendar", "current_step"],
+    "search_hotels": ["hotels", "current_step"],
+    "search_attractions": ["attractions", "current_step"],
+    "check_flight_budget": ["alternative_reason", "expensive_flight_price"],
+    "generate_itinerary": ["itinerary", "current_step"],
+    "suggest_alternatives": ["alternatives", "alternatives_explanation", "current_step"],
+}
+
+
+def flight_budget_gate_node(state: TripPlannerState) -> TripPlannerState:
+    """Join point for the searches: records why flights fail the budget check"""
+    flight_budget_decision(state)
+    return state
+
+
+def _as_graph_node(name: str,
+                   node: Callable[[TripPlannerState], TripPlannerState],
+                   anode: Optional[Callable[[TripPlannerState], Awaitable[TripPlannerState]]] = None):
+    """
+    Run a node on a private copy of the state and return only its own updates.
+    Errors and messages are returned as the newly appended entries so the
+    list reducers do not duplicate them.
+
+    Start and finish (with the measured duration) are reported on the custom
+    stream, and every duration feeds the latency history used for estimates
+    and the trip_node metrics.
+
+    Async runs (ainvoke/astream) await `anode`; nodes without one are cheap
+    and run inline on the event loop.
+    """
+    keys = NODE_OUTPUT_KEYS[name]
+
+    def local_copy(state: TripPlannerState) -> TripPlannerState:
+        local = cast(TripPlannerState, dict(state))
+        local["errors"] = list(state.get("errors", []))
+        local["messages"] = list(state.get("messages", []))
+        return local
+
+    def own_update(state: TripPlannerState, result: TripPlannerState) -> Dict[str, Any]:
+        update: Dict[str, Any] = {key: result.get(key) for key in keys if key in result}
+        update["errors"] = result["errors"][len(state.get("errors", [])):]
+        update["messages"] = result["messages"][len(state.get("messages", [])):]
+        return update
+
+    def run(state: TripPlannerState) -> Dict[str, Any]:
+        local = local_copy(state)
+        write = get_stream_writer()
+        write({"progress": "start", "node": name})
+        started = time.perf_counter()
+        with track("trip_node", {"node": name}) as status:
+            result = node(local)
+            if len(result["errors"]) > len(state.get("errors", [])):
+                status["outcome"] = "error"
+        duration = time.perf_counter() - started
+        latency_history.record(name, duration)
+        write({"progress": "finish", "node": name, "duration": duration})
+        return own_update(state, result)
+
+    async def arun(state: TripPlannerState) -> Dict[str, Any]:
+        if anode is None:
+            return run(state)
+        local = local_copy(state)
+        write = get_stream_writer()
+        write({"progress": "start", "node": name})
+        started = time.perf_counter()
+        with track("trip_node", {"node": name}) as status:
+            result = await anode(local)
+            if len(result["errors"]) > len(state.get("errors", [])):
+                status["outcome"] = "error"
+        duration = time.perf_counter() - started
+        latency_history.record(name, duration)
+        write({"progress": "finish", "node": name, "duration": duration})
+        return own_update(state, result)
+
+    return RunnableLambda(run, afunc=arun, name=name)
+
+
+def _merge_update(state: TripPlannerState, update: Dict[str, Any]) -> TripPlannerState:
+    """Apply a node update to a state dict the same way the graph reducers do"""
+    for key, value in update.items():
+        if key in ("errors", "messages"):
+            state[key] = state.get(key, []) + value
+        else:
+            state[key] = value
+    return state
+
+
+def pipeline_stages(parallel: bool = Config.PARALLEL_SEARCHES) -> List[List[str]]:
+    """Expected node order for a successful plan; nodes in one stage run together"""
+    if parallel:
+        return [["check_weather"], list(SEARCH_BRANCHES), ["check_flight_budget"], ["generate_itinerary"]]
+    return [["check_weather"], ["search_flights"], ["check_flight_budget"],
+            ["search_hotels"], ["search_attractions"], ["generate_itinerary"]]
+
+
+def _route_after_weather(state: TripPlannerState) -> str | List[str]:
+    """Fan out to all searches when the weather gate passes"""
+    if weather_decision_node(state) == "proceed_to_flights":
+        return SEARCH_BRANCHES
+    return "suggest_alternatives"
+
+
+def create_trip_planner_graph(parallel: bool = Config.PARALLEL_SEARCHES):
     """
     Create and configure LangGraph workflow
-    Order: Weather -> Flights -> Hotels -> Attractions -> Itinerary -> Alternatives
+    Sequential: Weather -> Flights -> Hotels -> Attractions -> Itinerary -> Alternatives
+    Parallel:   Weather -> (Flights | Hotels | Attractions) -> Budget check -> Itinerary -> Alternatives
     """
     workflow = StateGraph(TripPlannerState)
 
     # Add all nodes
-    workflow.add_node("check_weather", weather_check_node)
-    workflow.add_node("search_flights", flight_search_node)
-    workflow.add_node("search_hotels", hotel_search_node)
-    workflow.add_node("search_attractions", attraction_search_node)
-    workflow.add_node("generate_itinerary", itinerary_generation_node)
-    workflow.add_node("suggest_alternatives", alternative_suggestion_node)
+    workflow.add_node("check_weather", _as_graph_node("check_weather", weather_check_node, aweather_check_node))
+    workflow.add_node("search_flights", _as_graph_node("search_flights", flight_search_node, aflight_search_node))
+    workflow.add_node("search_hotels", _as_graph_node("search_hotels", hotel_search_node, ahotel_search_node))
+    workflow.add_node("search_attractions", _as_graph_node("search_attractions", attraction_search_node, aattraction_search_node))
+    workflow.add_node("check_flight_budget", _as_graph_node("check_flight_budget", flight_budget_gate_node))
+    workflow.add_node("generate_itinerary", _as_graph_node("generate_itinerary", itinerary_generation_node, aitinerary_generation_node))
+    workflow.add_node("suggest_alternatives", _as_graph_node("suggest_alternatives", alternative_suggestion_node, aalternative_suggestion_node))
 
     # Set entry point to weather check
     workflow.set_entry_point("check_weather")
-    
-    # After weather check: favorable → flights, unfavorable → alternatives
-    workflow.add_conditional_edges(
-        "check_weather",
-        weather_decision_node,
-        {
-            "proceed_to_flights": "search_flights",
-            "suggest_alternatives": "suggest_alternatives"
-        }
-    )
-
-    # After flights: available & affordable → hotels, otherwise → alternatives
-    workflow.add_conditional_edges(
-        "search_flights",
-        flight_budget_decision,
-        {
-            "proceed_to_hotels": "search_hotels",
-            "suggest_alternatives": "suggest_alternatives"
-        }
-    )
-
-    # Continue normal flow
-    workflow.add_edge("search_hotels", "search_attractions")
-    workflow.add_edge("search_attractions", "generate_itinerary")
+
+    if parallel:
+        # After weather check: favorable → all searches at once, unfavorable → alternatives
+        workflow.add_conditional_edges(
+            "check_weather",
+            _route_after_weather,
+            SEARCH_BRANCHES + ["suggest_alternatives"]
+        )
+
+        # Wait for every search before judging the flights
+        workflow.add_edge(SEARCH_BRANCHES, "check_flight_budget")
+
+        # Available & affordable → itinerary, otherwise → alternatives
+        workflow.add_conditional_edges(
+            "check_flight_budget",
+            flight_budget_decision,
+            {
+                "proceed_to_hotels": "generate_itinerary",
+                "suggest_alternatives": "suggest_alternatives"
+            }
+        )
+    else:
+        # After weather check: favorable → flights, unfavorable → alternatives
+        workflow.add_conditional_edges(
+            "check_weather",
+            weather_decision_node,
+            {
+                "proceed_to_flights": "search_flights",
+                "suggest_alternatives": "suggest_alternatives"
+            }
+        )
+
+        # After flights: available & affordable → hotels, otherwise → alternatives
+        workflow.add_edge("search_flights", "check_flight_budget")
+        workflow.add_conditional_edges(
+            "check_flight_budget",
+            flight_budget_decision,
+            {
+                "proceed_to_hotels": "search_hotels",
+                "suggest_alternatives": "suggest_alternatives"
+            }
+        )
+
+        # Continue normal flow
+        workflow.add_edge("search_hotels", "search_attractions")
+        workflow.add_edge("search_attractions", "generate_itinerary")
+
     workflow.add_edge("generate_itinerary", END)
     workflow.add_edge("suggest_alternatives", END)
-    
+
     app = workflow.compile()
     return app
 
-def run_trip_planner(trip_request: TripRequest) -> dict:
-    """
-    Execute the trip planner workflow
-    """
-    app = create_trip_planner_graph()
 
-    initial_state = {
+def initial_state(trip_request: TripRequest) -> TripPlannerState:
+    """Empty planner state for a new request, with its own run id"""
+    return cast(TripPlannerState, {
+        "run_id": uuid.uuid4().hex,
         "trip_request": trip_request,
         "weather_data": None,
+        "daily_weather": [],
         "hotels": [],
         "flights": [],
         "attractions": [],
@@ -80,124 +226,119 @@ def run_trip_planner(trip_request: TripRequest) -> dict:
         "should_replan": False,
         "messages": [],
         "alternative_reason": None,
-        "expensive_flight_price": None
-    }
+        "expensive_flight_price": None,
+        "price_calendar": None,
+        "alternatives": [],
+        "alternatives_explanation": None
+    })
 
-    initial_state = TripPlannerState(**initial_state)
-    final_state = app.invoke(initial_state)
+
+@lru_cache(maxsize=None)
+def get_compiled_graph(parallel: bool = Config.PARALLEL_SEARCHES):
+    """
+    Process-wide compiled workflow, built on first use and shared by all requests
+    """
+    return create_trip_planner_graph(parallel)
+
+
+def run_trip_planner(trip_request: TripRequest, parallel: bool = Config.PARALLEL_SEARCHES) -> dict:
+    """
+    Execute the trip planner workflow
+    """
+    app = get_compiled_graph(parallel)
+
+    final_state = app.invoke(initial_state(trip_request))
 
     return final_state
 
-def run_trip_planner_stepwise(trip_request: TripRequest) -> Generator[TripPlannerState, None, None]:
+
+async def arun_trip_planner(trip_request: TripRequest, parallel: bool = Config.PARALLEL_SEARCHES) -> dict:
+    """
+    Async variant of run_trip_planner: tool calls and LLM requests await on the
+    event loop, so many plans can run concurrently in one process
+    """
+    app = get_compiled_graph(parallel)
+    return await app.ainvoke(initial_state(trip_request))
+
+
+class _EventAssembler:
+    """Turns the graph's (mode, chunk) stream into progress events for one run"""
+
+    def __init__(self, trip_request: TripRequest, parallel: bool):
+        self.state = initial_state(trip_request)
+        self.tracker = ProgressTracker(pipeline_stages(parallel))
+        self.durations: Dict[str, float] = {}
+
+    def events(self, mode: str, chunk: Any) -> List[ProgressEvent]:
+        tracker = self.tracker
+        if mode == "custom":
+            if not isinstance(chunk, dict):
+                return []
+            if chunk.get("progress") == "start":
+                tracker.start(chunk["node"])
+                return [tracker.event("start", chunk["node"], cast(Dict[str, Any], dict(self.state)))]
+            if chunk.get("progress") == "finish":
+                # Reported with the update that follows, once the state is merged
+                self.durations[chunk["node"]] = chunk["duration"]
+            elif "itinerary" in chunk:
+                partial = cast(TripPlannerState, dict(self.state))
+                partial["itinerary"] = chunk["itinerary"]
+                partial["current_step"] = "generating_itinerary"
+                return [tracker.event("partial", "generate_itinerary", cast(Dict[str, Any], partial))]
+            return []
+
+        finished = []
+        for node_name, update in chunk.items():
+            self.state = _merge_update(self.state, update or {})
+            self.state["current_step"] = node_name
+            duration = self.durations.pop(node_name, None)
+            tracker.finish(node_name, duration)
+            finished.append(tracker.event("finish", node_name, cast(Dict[str, Any], dict(self.state)), duration))
+        return finished
+
+
+def run_trip_planner_events(trip_request: TripRequest, parallel: bool = Config.PARALLEL_SEARCHES) -> Generator[ProgressEvent, None, None]:
+    """
+    Stream a run as progress events: "start" when a node begins, "finish" with
+    its measured duration and the merged state, and "partial" for each partial
+    itinerary while days are still being written. Every event carries the
+    elapsed time, the estimated time left and the share of the run done.
+    """
+    app = get_compiled_graph(parallel)
+    assembler = _EventAssembler(trip_request, parallel)
+
+    for mode, chunk in app.stream(assembler.state, stream_mode=["updates", "custom"]):
+        yield from assembler.events(mode, chunk)
+
+
+async def arun_trip_planner_events(trip_request: TripRequest, parallel: bool = Config.PARALLEL_SEARCHES) -> AsyncGenerator[ProgressEvent, None]:
+    """Async variant of run_trip_planner_events"""
+    app = get_compiled_graph(parallel)
+    assembler = _EventAssembler(trip_request, parallel)
+
+    async for mode, chunk in app.astream(assembler.state, stream_mode=["updates", "custom"]):
+        for event in assembler.events(mode, chunk):
+            yield event
+
+
+def run_trip_planner_stepwise(trip_request: TripRequest, parallel: bool = Config.PARALLEL_SEARCHES) -> Generator[TripPlannerState, None, None]:
     """
-    Yield intermediate states after each node with proper decision logic.
-    Order: Weather -> Flights -> Hotels -> Attractions -> Itinerary (or Alternatives)
+    Yield intermediate states after each node as the compiled graph streams them.
+    current_step is set to the name of the node that just finished, so parallel
+    searches are yielded one by one in the order they complete.
+
+    While the itinerary is being written, states with current_step
+    "generating_itinerary" carry a partial itinerary holding the days parsed so far.
 
     This allows UI to update in real-time after each step.
     """
-    state: TripPlannerState = cast(TripPlannerState, {
-        "trip_request": trip_request,
-        "weather_data": None,
-        "hotels": [],
-        "flights": [],
-        "attractions": [],
-        "itinerary": None,
-        "errors": [],
-        "current_step": "init",
-        "should_replan": False,
-        "messages": [],
-        "alternative_reason": None,
-        "expensive_flight_price": None
-    })
+    for event in run_trip_planner_events(trip_request, parallel):
+        if event.kind != "start":
+            yield cast(TripPlannerState, event.state)
+
 
-    # Step 1: Weather Check
-    try:
-        from nodes import weather_check_node, weather_decision_node
-
-        state = weather_check_node(state)
-        state["current_step"] = "check_weather"
-        yield state
-
-        # Check weather decision
-        weather_decision = weather_decision_node(state)
-
-        if weather_decision == "suggest_alternatives":
-            # Weather is bad - go to alternatives
-            state["alternative_reason"] = "unfavorable_weather"
-            state["current_step"] = "weather_unfavorable"
-
-            try:
-                from nodes import alternative_suggestion_node
-                state = alternative_suggestion_node(state)
-                state["current_step"] = "alternatives_suggested"
-                yield state
-            except Exception as e:
-                state["errors"].append(f"Alternative suggestion failed: {str(e)}")
-                yield state
-            return
-
-    except Exception as e:
-        state["errors"].append(f"Weather step failed: {str(e)}")
-        yield state
-        return
-
-    # Step 2: Flight Search (only if weather is good)
-    try:
-        from nodes import flight_search_node, flight_budget_decision
-
-        state = flight_search_node(state)
-        state["current_step"] = "search_flights"
-        yield state
-
-        # Check flight availability and budget
-        flight_decision = flight_budget_decision(state)
-
-        if flight_decision == "suggest_alternatives":
-            # Flights are unavailable or too expensive
-            state["current_step"] = "flights_issue"
-
-            try:
-                from nodes import alternative_suggestion_node
-                state = alternative_suggestion_node(state)
-                state["current_step"] = "alternatives_suggested"
-                yield state
-            except Exception as e:
-                state["errors"].append(f"Alternative suggestion failed: {str(e)}")
-                yield state
-            return
-
-    except Exception as e:
-        state["errors"].append(f"Flight step failed: {str(e)}")
-        state["messages"].append("❌ Flight search failed. Cannot proceed with itinerary.")
-        yield state
-        return
-
-    # Step 3: Hotel Search (only if flights are good)
-    try:
-        from nodes import hotel_search_node
-        state = hotel_search_node(state)
-        state["current_step"] = "search_hotels"
-        yield state
-    except Exception as e:
-        state["errors"].append(f"Hotel step failed: {str(e)}")
-        yield state
-
-    # Step 4: Attractions
-    try:
-        from nodes import attraction_search_node
-        state = attraction_search_node(state)
-        state["current_step"] = "search_attractions"
-        yield state
-    except Exception as e:
-        state["errors"].append(f"Attraction step failed: {str(e)}")
-        yield state
-
-    # Step 5: Itinerary Generation (final step)
-    try:
-        from nodes import itinerary_generation_node
-        state = itinerary_generation_node(state)
-        state["current_step"] = "generate_itinerary"
-        yield state
-    except Exception as e:
-        state["errors"].append(f"Itinerary step failed: {str(e)}")
-        yield state
\ No newline at end of file
+async def arun_trip_planner_stepwise(trip_request: TripRequest, parallel: bool = Config.PARALLEL_SEARCHES) -> AsyncGenerator[TripPlannerState, None]:
+    """Async variant of run_trip_planner_stepwise"""
+    async for event in arun_trip_planner_events(trip_request, parallel):
+        if event.kind != "start":
+            yield cast(TripPlannerState, event.state)
@@ -1,9 +1,15 @@
 import os
 from config import Config
+from metrics import registry as local_metrics
 from langsmith import Client
-from langsmith.run_helpers import traceable
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
+from collections import deque
+from datetime import datetime, timezone
+from pathlib import Path
+import atexit
 import json
+import threading
+import uuid
 
 if Config.LANGSMITH_API_KEY:
     os.environ["LANGSMITH_API_KEY"] = Config.LANGSMITH_API_KEY
@@ -15,16 +21,216 @@ else:
     langsmith_client = None
     print("⚠️ LangSmith not configured. Tracing disabled.")
 
+def _json_safe(value: Any) -> Any:
+    '''Plain JSON data, so a run looks the same whether it is sent or spilled to disk'''
+    return json.loads(json.dumps(value, default=lambda o: getattr(o, "value", str(o))))
+
+
+def make_root_run(name: str, inputs: Dict, outputs: Optional[Dict] = None,
+                  error: Optional[str] = None, start_time: Optional[datetime] = None) -> Dict:
+    '''A complete single-run trace in the shape LangSmith's batch ingest expects'''
+    run_id = str(uuid.uuid4())
+    start = start_time or datetime.now(timezone.utc)
+    run = {
+        "id": run_id,
+        "trace_id": run_id,
+        "dotted_order": f"{start.strftime('%Y%m%dT%H%M%S%fZ')}{run_id}",
+        "session_name": Config.LANGSMITH_PROJECT,
+        "name": name,
+        "run_type": "chain",
+        "start_time": start.isoformat(),
+        "end_time": datetime.now(timezone.utc).isoformat(),
+        "inputs": _json_safe(inputs),
+        "outputs": _json_safe(outputs or {}),
+    }
+    if error:
+        run["error"] = error
+    return run
+
+
+class TraceExporter:
+    '''
+    Ships trace runs to LangSmith from a background thread.
+
+    submit() only appends to a bounded in-memory queue (the oldest run is
+    dropped when full), so callers never wait on the collector. The worker
+    sends batches through batch_ingest_runs; a batch that cannot be sent is
+    appended to a local JSONL spill file and replayed on a later flush; past
+    spill_max_bytes the oldest spilled runs are dropped first.
+    '''
+
+    def __init__(self, client: Client, max_queue: int = Config.TRACE_QUEUE_SIZE,
+                 batch_size: int = Config.TRACE_BATCH_SIZE,
+                 flush_interval: float = Config.TRACE_FLUSH_INTERVAL,
+                 spill_path: str = Config.TRACE_SPILL_PATH,
+                 spill_max_bytes: int = Config.TRACE_SPILL_MAX_BYTES):
+        self.client = client
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.spill_path = Path(spill_path)
+        self.spill_max_bytes = spill_max_bytes
+        self._queue: deque = deque()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self.exported = 0
+        self.dropped = 0
+        self.spilled = 0
+        self.replayed = 0
+        self.failed_flushes = 0
+        self.corrupt = 0
+
+    def submit(self, run: Dict) -> None:
+        '''Queue a run for export; never blocks on I/O'''
+        with self._cond:
+            if self._closed:
+                return
+            if len(self._queue) >= self.max_queue:
+                self._queue.popleft()
+                self.dropped += 1
+                local_metrics.inc("trip_trace_export_total", {"result": "dropped"})
+            self._queue.append(run)
+            if len(self._queue) >= self.batch_size:
+                self._cond.notify()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+                self._thread.start()
+
+    def _next_batch(self) -> List[Dict]:
+        with self._cond:
+            if len(self._queue) < self.batch_size and not self._closed:
+                self._cond.wait(timeout=self.flush_interval)
+            return [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+
+    def _run(self) -> None:
+        while True:
+            batch = self._next_batch()
+            if batch:
+                self._export(batch)
+            elif self._closed:
+                return
+
+    def _export(self, batch: List[Dict]) -> None:
+        try:
+            self._replay_spill()
+            self.client.batch_ingest_runs(create=batch)
+            self.exported += len(batch)
+            local_metrics.inc("trip_trace_export_total", {"result": "exported"}, len(batch))
+        except Exception as e:
+            self.failed_flushes += 1
+            print(f"⚠️ Trace export failed, keeping {len(batch)} run(s) on disk: {e}")
+            self._spill(batch)
+
+    def _spill(self, batch: List[Dict]) -> None:
+        try:
+            self.spill_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.spill_path, "a", encoding="utf-8") as f:
+                for run in batch:
+                    f.write(json.dumps(run) + "\n")
+            self.spilled += len(batch)
+            local_metrics.inc("trip_trace_export_total", {"result": "spilled"}, len(batch))
+            if self.spill_path.stat().st_size > self.spill_max_bytes:
+                self._trim_spill()
+        except OSError as e:
+            self.dropped += len(batch)
+            print(f"⚠️ Could not spill traces to {self.spill_path}: {e}")
+
+    def _trim_spill(self) -> None:
+        '''Drop the oldest spilled runs until the file fits spill_max_bytes, as the queue does'''
+        with open(self.spill_path, encoding="utf-8") as f:
+            lines = f.readlines()
+        size = sum(len(line.encode("utf-8")) for line in lines)
+        oldest = 0
+        while oldest < len(lines) and size > self.spill_max_bytes:
+            size -= len(lines[oldest].encode("utf-8"))
+            oldest += 1
+        self._rewrite_spill(lines[oldest:])
+        self.dropped += oldest
+        local_metrics.inc("trip_trace_export_total", {"result": "dropped"}, oldest)
+
+    def _replay_spill(self) -> None:
+        '''
+        Send runs left on disk by earlier failures; raises if the collector is
+        still down. The file is cut down after every chunk that got through,
+        so a failure part way only leaves the unsent runs to retry.
+        '''
+        if not self.spill_path.exists():
+            return
+        lines: List[str] = []
+        runs: List[Dict] = []
+        corrupt = 0
+        with open(self.spill_path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    runs.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # A line cut short by a crash mid-write; it can never be sent
+                    corrupt += 1
+                    continue
+                lines.append(line)
+        if corrupt:
+            self.corrupt += corrupt
+            local_metrics.inc("trip_trace_export_total", {"result": "corrupt"}, corrupt)
+            self._rewrite_spill(lines)
+        for start in range(0, len(runs), self.batch_size):
+            chunk = runs[start:start + self.batch_size]
+            self.client.batch_ingest_runs(create=chunk)
+            self.replayed += len(chunk)
+            local_metrics.inc("trip_trace_export_total", {"result": "replayed"}, len(chunk))
+            self._rewrite_spill(lines[start + self.batch_size:])
+
+    def _rewrite_spill(self, lines: List[str]) -> None:
+        '''Replace the spill file with the given lines, removing it when none are left'''
+        if not lines:
+            self.spill_path.unlink(missing_ok=True)
+            return
+        partial = self.spill_path.with_name(self.spill_path.name + ".tmp")
+        with open(partial, "w", encoding="utf-8") as f:
+            f.writelines(lines)
+        os.replace(partial, self.spill_path)
+
+    def close(self, timeout: float = 5.0) -> None:
+        '''Stop accepting runs and give the worker a bounded time to drain the queue'''
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            queued = len(self._queue)
+        return {
+            "queued": queued,
+            "exported": self.exported,
+            "dropped": self.dropped,
+            "spilled": self.spilled,
+            "replayed": self.replayed,
+            "failed_flushes": self.failed_flushes,
+            "corrupt": self.corrupt
+        }
+
+
 class TripPlanningMonitor:
     """Monitor and track trip planner executions"""
     
     def __init__(self):
         self.client = langsmith_client
         self.runs = []
+        self.exporter = TraceExporter(langsmith_client) if langsmith_client else None
+        if self.exporter:
+            atexit.register(self.exporter.close)
+    
+    def _export(self, name: str, inputs: Dict, outputs: Dict) -> None:
+        if self.exporter:
+            self.exporter.submit(make_root_run(name, inputs, outputs))
         
-    @traceable(name="trip_planning_session")
     def track_planning_session(self, trip_request: Dict, final_state: Dict) -> Dict:
-        '''Track a planning session'''
+        '''Track a planning session; the trace is exported in the background'''
         session_data = {
             "trip_request": trip_request,
             "destination": trip_request.get("destination"),
@@ -35,18 +241,20 @@ class TripPlanningMonitor:
             "steps_completed": final_state.get("current_step"),
             "messages": final_state.get("messages", [])
         }
+        self._export("trip_planning_session", {"trip_request": trip_request}, session_data)
         return session_data
     
-    @traceable(name="weather_check")
     def track_weather_check(self, destination: str, weather_data: Dict) -> Dict:
-        '''Track Weather API call'''
-        return {
+        '''Track Weather API call; the trace is exported in the background'''
+        weather_summary = {
             "destination": destination,
             "temperature": weather_data.get("temperature"),
             "condition": weather_data.get("condition"),
             "is_favorable": weather_data.get("is_favorable"),
             "alert": weather_data.get("alert")
         }
+        self._export("weather_check", {"destination": destination}, weather_summary)
+        return weather_summary
         
     def get_session_metrics(self, session_id: str | None = None) -> Dict:
         """Retrieve metrics for a planning session"""
@@ -60,10 +268,17 @@ class TripPlanningMonitor:
                 limit=10
             ))
             
+            # Latency is wall time in seconds; runs still in progress have no end time
+            latencies = [
+                (r.end_time - r.start_time).total_seconds()
+                for r in runs if r.start_time and r.end_time
+            ]
+            
             metrics = {
                 "total_runs": len(runs),
                 "successful_runs": sum(1 for r in runs if not r.error),
-                "avg_latency": sum(r.total_tokens or 0 for r in runs) / len(runs) if runs else 0,
+                "avg_latency": sum(latencies) / len(latencies) if latencies else 0,
+                "avg_total_tokens": sum(r.total_tokens or 0 for r in runs) / len(runs) if runs else 0,
             }
             
             return metrics
@@ -71,4 +286,8 @@ class TripPlanningMonitor:
         except Exception as e:
             return {"error": str(e)}
     
+    def get_local_metrics(self) -> Dict:
+        """Node, tool, HTTP, LLM and cache metrics recorded in this process (no LangSmith needed)"""
+        return local_metrics.to_dict()
+    
 monitor = TripPlanningMonitor()
\ No newline at end of file
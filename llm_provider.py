@@ -0,0 +1,216 @@
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple
+from uuid import UUID
+import threading
+import time
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.outputs import LLMResult
+from langchain_core.prompt_values import PromptValue
+from langchain_core.rate_limiters import InMemoryRateLimiter
+from langchain_core.runnables import Runnable, RunnableConfig, RunnableLambda
+from tools.disk_cache import get_cache, make_key
+from tools.fixtures import FixtureRecorder, ReplayChatModel
+from config import Config
+from metrics import registry
+
+# Named LLM settings; anything a profile leaves out comes from Config
+LLM_PROFILES: Dict[str, Dict[str, Any]] = {
+    "default": {},
+    # Short factual answers such as IATA codes
+    "lookup": {"temperature": 0.0},
+    # Multi-day JSON itineraries need far more output than the default cap
+    "itinerary": {"max_tokens": Config.ITINERARY_MAX_TOKENS},
+}
+
+
+class LLMUsageTracker(BaseCallbackHandler):
+    """Per-client call, token and latency counters fed by LangChain callbacks, mirrored into metrics"""
+
+    def __init__(self, label: str):
+        self.label = label
+        self._lock = threading.Lock()
+        self._started: Dict[UUID, float] = {}
+        self.calls = 0
+        self.errors = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages: List[Any], *, run_id: UUID, **kwargs: Any) -> None:
+        with self._lock:
+            self._started[run_id] = time.perf_counter()
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        input_tokens = output_tokens = 0
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                input_tokens += usage.get("input_tokens", 0)
+                output_tokens += usage.get("output_tokens", 0)
+
+        with self._lock:
+            latency = time.perf_counter() - self._started.pop(run_id, time.perf_counter())
+            self.calls += 1
+            self.input_tokens += input_tokens
+            self.output_tokens += output_tokens
+            self.total_latency += latency
+            self.max_latency = max(self.max_latency, latency)
+
+        labels = {"client": self.label}
+        registry.observe("trip_llm_call_duration_seconds", labels, latency)
+        registry.inc("trip_llm_tokens_total", {**labels, "type": "input"}, input_tokens)
+        registry.inc("trip_llm_tokens_total", {**labels, "type": "output"}, output_tokens)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        with self._lock:
+            self._started.pop(run_id, None)
+            self.errors += 1
+        registry.inc("trip_llm_errors_total", {"client": self.label, "error": type(error).__name__})
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "client": self.label,
+                "calls": self.calls,
+                "errors": self.errors,
+                "input_tokens": self.input_tokens,
+                "output_tokens": self.output_tokens,
+                "avg_latency": self.total_latency / self.calls if self.calls else 0.0,
+                "max_latency": self.max_latency
+            }
+
+
+_clients: Dict[Tuple[str, float, Optional[int]], Any] = {}
+_trackers: Dict[Tuple[str, float, Optional[int]], LLMUsageTracker] = {}
+_clients_lock = threading.Lock()
+
+# One limiter for every client, so the whole process stays under the Gemini quota
+rate_limiter = (
+    InMemoryRateLimiter(requests_per_second=Config.LLM_REQUESTS_PER_SECOND)
+    if Config.LLM_REQUESTS_PER_SECOND > 0 else None
+)
+
+
+def get_llm(profile: str = "default", **overrides: Any):
+    """
+    Shared Gemini chat client for a profile. Clients are created on first use and
+    cached per (model, temperature, max_tokens), so their connections are reused.
+    API_MODE=record saves every completion as a fixture; replay answers from them.
+    """
+    settings = {
+        "model": Config.MODEL_NAME,
+        "temperature": Config.TEMPERATURE,
+        "max_tokens": Config.MAX_TOKENS,
+    }
+    settings.update(LLM_PROFILES[profile])
+    settings.update(overrides)
+    key = (settings["model"], float(settings["temperature"]), settings["max_tokens"])
+
+    client = _clients.get(key)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(key)
+            if client is None:
+                tracker = LLMUsageTracker(f"{key[0]} t={key[1]} max={key[2]}")
+                if Config.API_MODE == "replay":
+                    client = ReplayChatModel(
+                        model=key[0],
+                        latency=Config.STANDIN_LLM_LATENCY_MS / 1000,
+                        latency_per_kchar=Config.STANDIN_LLM_MS_PER_KCHAR / 1000,
+                        callbacks=[tracker]
+                    )
+                else:
+                    # Imported here so modules that never call the LLM don't pay for it
+                    from langchain_google_genai import ChatGoogleGenerativeAI
+
+                    callbacks: List[BaseCallbackHandler] = [tracker]
+                    if Config.API_MODE == "record":
+                        callbacks.append(FixtureRecorder(key[0]))
+                    client = ChatGoogleGenerativeAI(
+                        model=key[0],
+                        temperature=key[1],
+                        max_tokens=key[2],
+                        api_key=Config.GEMINI_API_KEY,
+                        callbacks=callbacks,
+                        rate_limiter=rate_limiter
+                    )
+                _trackers[key] = tracker
+                _clients[key] = client
+    return client
+
+
+def llm_stats() -> List[Dict[str, Any]]:
+    """Token and latency counters for every client created so far"""
+    return [tracker.stats() for tracker in list(_trackers.values())]
+
+
+def cached_completion(profile: str = "default",
+                      namespace: str = "llm",
+                      validate: Optional[Callable[[str], bool]] = None,
+                      llm: Any = None,
+                      **overrides: Any) -> Runnable:
+    """
+    Drop-in replacement for `llm | StrOutputParser()` in a chain that serves
+    repeated prompts from the persistent result cache.
+
+    The key is a hash of the rendered prompt plus the model parameters, so any
+    change to inputs, template or model is a miss. With LLM_DETERMINISTIC on,
+    generation runs at temperature 0 so a cached answer is the answer the model
+    would give anyway. `validate` can keep unusable responses out of the cache.
+    An explicitly passed `llm` is used as-is instead of the profile client.
+    The runnable supports `.stream()` and `.astream()`; a cache hit arrives as a single chunk.
+    """
+    if llm is None:
+        if Config.LLM_DETERMINISTIC:
+            overrides["temperature"] = 0.0
+        llm = get_llm(profile, **overrides)
+    generate = llm | StrOutputParser()
+    cache = get_cache(namespace)
+
+    def complete(prompt_value: PromptValue, config: RunnableConfig) -> Iterator[str]:
+        # A generator, so the chain streams tokens as the model writes them
+        if cache is None:
+            yield from generate.stream(prompt_value, config)
+            return
+
+        key = make_key(llm._identifying_params, prompt_value.to_string())
+        cached = cache.get(key)
+        if cached is not None:
+            print(f"⚡ LLM response served from cache ({namespace})")
+            yield cached
+            return
+
+        chunks = []
+        for chunk in generate.stream(prompt_value, config):
+            chunks.append(chunk)
+            yield chunk
+
+        text = "".join(chunks)
+        if validate is None or validate(text):
+            cache.set(key, text)
+
+    async def acomplete(prompt_value: PromptValue, config: RunnableConfig) -> AsyncIterator[str]:
+        # Same as complete, but the model call runs on the event loop
+        if cache is None:
+            async for chunk in generate.astream(prompt_value, config):
+                yield chunk
+            return
+
+        key = make_key(llm._identifying_params, prompt_value.to_string())
+        cached = cache.get(key)
+        if cached is not None:
+            print(f"⚡ LLM response served from cache ({namespace})")
+            yield cached
+            return
+
+        chunks = []
+        async for chunk in generate.astream(prompt_value, config):
+            chunks.append(chunk)
+            yield chunk
+
+        text = "".join(chunks)
+        if validate is None or validate(text):
+            cache.set(key, text)
+
+    return RunnableLambda(complete, afunc=acomplete, name=f"cached_{profile}_llm")
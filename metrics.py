@@ -0,0 +1,214 @@
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+import json
+import math
+import os
+import threading
+import time
+from config import Config
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+LabelSet = Tuple[Tuple[str, str], ...]
+
+
+def _label_set(labels: Optional[Dict[str, Any]]) -> LabelSet:
+    return tuple(sorted((key, str(value)) for key, value in (labels or {}).items()))
+
+
+def _quantile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank quantile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(q * len(sorted_values)) - 1, 0)
+    return sorted_values[rank]
+
+
+class Summary:
+    """Count and sum of all observations, quantiles over the most recent window"""
+
+    def __init__(self, window: int):
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self.recent: Deque[float] = deque(maxlen=window)
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+        self.recent.append(value)
+
+    def quantiles(self) -> Dict[float, float]:
+        ordered = sorted(self.recent)
+        return {q: _quantile(ordered, q) for q in QUANTILES}
+
+
+class MetricsRegistry:
+    """
+    In-process counters and latency summaries, readable as Prometheus text
+    or JSON without any external service.
+    """
+
+    def __init__(self, window: int = 2048, enabled: bool = True):
+        self.window = window
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[LabelSet, float]] = {}
+        self._summaries: Dict[str, Dict[LabelSet, Summary]] = {}
+
+    def inc(self, name: str, labels: Optional[Dict[str, Any]] = None, value: float = 1) -> None:
+        if not self.enabled:
+            return
+        key = _label_set(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, labels: Optional[Dict[str, Any]], value: float) -> None:
+        if not self.enabled:
+            return
+        key = _label_set(labels)
+        with self._lock:
+            series = self._summaries.setdefault(name, {})
+            summary = series.get(key)
+            if summary is None:
+                summary = series[key] = Summary(self.window)
+            summary.observe(value)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._summaries.clear()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Snapshot with p50/p95/p99 per summary series"""
+        with self._lock:
+            counters = {
+                name: [{"labels": dict(key), "value": value} for key, value in sorted(series.items())]
+                for name, series in sorted(self._counters.items())
+            }
+            summaries = {}
+            for name, series in sorted(self._summaries.items()):
+                rows = []
+                for key, summary in sorted(series.items()):
+                    quantiles = summary.quantiles()
+                    rows.append({
+                        "labels": dict(key),
+                        "count": summary.count,
+                        "sum": summary.sum,
+                        "p50": quantiles[0.5],
+                        "p95": quantiles[0.95],
+                        "p99": quantiles[0.99],
+                        "max": summary.max
+                    })
+                summaries[name] = rows
+        return {"generated_at": time.time(), "counters": counters, "summaries": summaries}
+
+    def to_prometheus(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        lines: List[str] = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                lines.append(f"# TYPE {name} counter")
+                for key, value in sorted(series.items()):
+                    lines.append(f"{name}{_format_labels(key)} {_format_value(value)}")
+            for name, series in sorted(self._summaries.items()):
+                lines.append(f"# TYPE {name} summary")
+                for key, summary in sorted(series.items()):
+                    for q, value in summary.quantiles().items():
+                        lines.append(f"{name}{_format_labels(key + (('quantile', str(q)),))} {_format_value(value)}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {_format_value(summary.sum)}")
+                    lines.append(f"{name}_count{_format_labels(key)} {summary.count}")
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels: LabelSet) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        f'{key}="' + value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+        for key, value in labels
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value))
+
+
+registry = MetricsRegistry(window=Config.METRICS_WINDOW, enabled=Config.METRICS_ENABLED)
+
+
+@contextmanager
+def track(name: str, labels: Dict[str, Any]) -> Iterator[Dict[str, str]]:
+    """
+    Time a block as `<name>_duration_seconds` and count it in `<name>_total`
+    by outcome. Exceptions are counted by class in `<name>_errors_total` and
+    re-raised. The yielded dict lets the block report a soft outcome, e.g.
+    status["outcome"] = "empty".
+    """
+    status = {"outcome": "ok"}
+    started = time.perf_counter()
+    try:
+        yield status
+    except BaseException as e:
+        status["outcome"] = "error"
+        registry.inc(f"{name}_errors_total", {**labels, "error": type(e).__name__})
+        raise
+    finally:
+        registry.observe(f"{name}_duration_seconds", labels, time.perf_counter() - started)
+        registry.inc(f"{name}_total", {**labels, "outcome": status["outcome"]})
+
+
+def record_cache_lookup(cache: str, hit: bool) -> None:
+    registry.inc("trip_cache_lookups_total", {"cache": cache, "result": "hit" if hit else "miss"})
+
+
+def dump_json(path: str = Config.METRICS_DUMP_PATH) -> None:
+    """Write the current snapshot to a JSON file, replacing it atomically"""
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(registry.to_dict(), indent=2), encoding="utf-8")
+    os.replace(tmp, target)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] == "/metrics":
+            body = registry.to_prometheus().encode("utf-8")
+            content_type = "text/plain; version=0.0.4; charset=utf-8"
+        elif self.path.split("?")[0] == "/metrics.json":
+            body = json.dumps(registry.to_dict()).encode("utf-8")
+            content_type = "application/json"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_server: Optional[ThreadingHTTPServer] = None
+_server_lock = threading.Lock()
+
+
+def start_metrics_server(port: int = Config.METRICS_PORT, host: str = Config.METRICS_HOST) -> ThreadingHTTPServer:
+    """Serve /metrics (Prometheus) and /metrics.json from a daemon thread; safe to call repeatedly"""
+    global _server
+    with _server_lock:
+        if _server is None:
+            _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+            print(f"📈 Metrics on http://{host}:{_server.server_address[1]}/metrics")
+    return _server
+
@@ -22,6 +22,7 @@ class TripRequest(BaseModel):
     travel_type: TravelType = Field(default=TravelType.SIGHTSEEING)
     num_travelers: int = Field(default=1, description="Number of travelers")
     preferences: Optional[List[str]] = Field(default_factory=list)
+    flexible_days: int = Field(default=0, ge=0, description="Also search flights up to this many days before/after start_date")
 
 class WeatherData(BaseModel):
     '''Weather information for destination'''
@@ -34,6 +35,7 @@ class WeatherData(BaseModel):
     precipitation_chance: float
     is_favorable: bool
     alert: Optional[str] = None
+    source: str = "current"  # "current", "forecast", "climatology" or "extrapolated"
 
     
 class HotelOption(BaseModel):
@@ -93,6 +95,34 @@ class TripItinerary(BaseModel):
     notes: Optional[str] = None
 
 
+class AlternativeDestination(BaseModel):
+    """Alternative destination picked from the bundled destination index"""
+    name: str
+    country: str
+    score: float
+    typical_temperature: float
+    rain_days: float
+    fare_low: float
+    fare_high: float
+    estimated_cost: float
+    matches_travel_type: bool = False
+    weather: Optional[WeatherData] = Field(None, description="Live weather, when the check succeeded")
+
+
+class DestinationComparison(BaseModel):
+    """One candidate city in a multi-destination comparison"""
+    destination: str
+    rank: int
+    status: str = Field(..., description="planned, feasible (passed the checks but not planned), pruned or failed")
+    reason: Optional[str] = None
+    temperature: Optional[float] = None
+    condition: Optional[str] = None
+    cheapest_flight: Optional[float] = None
+    hotel_per_night: Optional[float] = None
+    estimated_cost: Optional[float] = None
+    itinerary: Optional[TripItinerary] = None
+
+
 class GraphState(BaseModel):
     """State for LangGraph workflow"""
     trip_request: Optional[TripRequest] = None
@@ -1,10 +1,10 @@
-from .weather_check import weather_check_node
+from .weather_check import weather_check_node, aweather_check_node
 from .weather_decision import weather_decision_node
-from .hotel_search import hotel_search_node
-from .flight_search import flight_search_node
-from .attraction_search import attraction_search_node
-from .itinerary_generation import itinerary_generation_node
-from .alternative_suggestion import alternative_suggestion_node
+from .hotel_search import hotel_search_node, ahotel_search_node
+from .flight_search import flight_search_node, aflight_search_node
+from .attraction_search import attraction_search_node, aattraction_search_node
+from .itinerary_generation import itinerary_generation_node, aitinerary_generation_node
+from .alternative_suggestion import alternative_suggestion_node, aalternative_suggestion_node
 from .flight_availability import flight_budget_decision
 
 __all__ = [
@@ -15,5 +15,11 @@ __all__ = [
     'attraction_search_node',
     'itinerary_generation_node',
     'alternative_suggestion_node',
-    'flight_budget_decision'
+    'flight_budget_decision',
+    'aweather_check_node',
+    'ahotel_search_node',
+    'aflight_search_node',
+    'aattraction_search_node',
+    'aitinerary_generation_node',
+    'aalternative_suggestion_node'
 ]
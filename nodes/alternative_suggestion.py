@@ -1,18 +1,14 @@
-from typing import Dict, Any, cast
+from typing import Dict, Any, List, Optional, cast
+from functools import lru_cache
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
-from langchain_google_genai import ChatGoogleGenerativeAI
+from llm_provider import get_llm
 from state_types import TripPlannerState
+from models import AlternativeDestination, WeatherData
+from nodes.weather_check import weather_tool
+from tools.destination_index import destination_index
 from config import Config
 
-langsmith_api_key = Config.GEMINI_API_KEY
-
-llm = ChatGoogleGenerativeAI(
-    model = "gemini-2.5-flash",
-    temperature=0.7,
-    api_key = langsmith_api_key
-)
-
 def alternative_suggestion_node(state: TripPlannerState) -> TripPlannerState:
     """Node to suggest alternatives - shows WHY alternatives are needed"""
     print("\\n" + "="*60)
@@ -20,63 +16,253 @@ def alternative_suggestion_node(state: TripPlannerState) -> TripPlannerState:
     print("="*60)
     
     try:
-        weather = state.get("weather_data")
-        if weather:
-            weather_desc = f"{weather.temperature}°C, {weather.condition}"
-            weather_favorable = weather.is_favorable
-        else:
-            weather_desc = "Weather data unavailable"
-            weather_favorable = False
-        flights = state.get("flights", [])
-        trip_request = state["trip_request"]
+        request = _prepare_alternatives(state)
+        if request is None:
+            return state
+        trip_request, reason_text, candidates = request
+        
+        # Live weather for every candidate in one bulk lookup
+        live = weather_tool.get_weather_many([c.name for c in candidates])
+        chosen = _pick_verified(candidates, live)
+        
+        chain, inputs = _explanation_request(trip_request, reason_text, chosen)
+        try:
+            response = chain.invoke(inputs) if chain is not None else _candidate_facts(chosen)
+        except Exception as e:
+            if not chosen:
+                raise
+            print(f"⚠️ Explanation failed, using the plain summary: {e}")
+            response = _candidate_facts(chosen)
+        _record_alternatives(state, trip_request, reason_text, response, chosen)
         
-        if trip_request is None:
-            state["errors"].append("Trip request is missing")
+    except Exception as e:
+        _record_alternative_error(state, e)
+    
+    return state
+
+
+async def aalternative_suggestion_node(state: TripPlannerState) -> TripPlannerState:
+    """Async variant of alternative_suggestion_node"""
+    print("\\n" + "="*60)
+    print("💡 ALTERNATIVE SUGGESTIONS")
+    print("="*60)
+    
+    try:
+        request = _prepare_alternatives(state)
+        if request is None:
             return state
+        trip_request, reason_text, candidates = request
         
-        # Determine WHY we're showing alternatives
-        reason = state.get("alternative_reason", "unknown")
+        live = await weather_tool.aget_weather_many([c.name for c in candidates])
+        chosen = _pick_verified(candidates, live)
         
-        print(f"\\n🎯 Original Destination: {trip_request.destination}")
-        print(f"💰 Budget: ${trip_request.budget:,.2f}")
+        chain, inputs = _explanation_request(trip_request, reason_text, chosen)
+        try:
+            response = await chain.ainvoke(inputs) if chain is not None else _candidate_facts(chosen)
+        except Exception as e:
+            if not chosen:
+                raise
+            print(f"⚠️ Explanation failed, using the plain summary: {e}")
+            response = _candidate_facts(chosen)
+        _record_alternatives(state, trip_request, reason_text, response, chosen)
         
-        # Display specific reason
-        if reason == "unfavorable_weather":
-            print(f"\\n⚠️  REASON: Weather conditions are unfavorable")
-            if weather and weather.alert:
-                print(f"   Alert: {weather.alert}")
-                print(f"   Temperature: {weather.temperature}°C")
-                print(f"   Condition: {weather.condition}")
-            reason_text = f"unfavorable weather conditions ({weather.condition}, {weather.temperature}°C)"
-            
-        elif reason == "no_flights_available":
-            print(f"\\n⚠️  REASON: No flights available")
-            print(f"   Route: {trip_request.origin} → {trip_request.destination}")
-            print(f"   Date: {trip_request.start_date}")
-            reason_text = "no flights available for this route"
-            
-        elif reason == "flights_too_expensive":
-            expensive_price = state.get("expensive_flight_price")
-            if expensive_price:
-                percentage = (expensive_price / trip_request.budget) * 100
-                print(f"\\n⚠️  REASON: Flights exceed budget")
-                print(f"   Cheapest flight: ${expensive_price:,.2f}")
-                print(f"   Budget usage: {percentage:.0f}%")
-                print(f"   Remaining for hotels/activities: ${trip_request.budget - expensive_price:,.2f}")
-                reason_text = f"flights are too expensive (${expensive_price:,.2f}, {percentage:.0f}% of budget)"
-            else:
-                reason_text = "flights exceed budget threshold"
-        else:
-            print(f"\\n⚠️  REASON: General availability issues")
-            reason_text = "availability issues"
+    except Exception as e:
+        _record_alternative_error(state, e)
+    
+    return state
+
+
+def _prepare_alternatives(state: TripPlannerState):
+    """Reason text and index candidates, or None when the request is missing"""
+    weather = state.get("weather_data")
+    if weather:
+        weather_desc = f"{weather.temperature}°C, {weather.condition}"
+        weather_favorable = weather.is_favorable
+    else:
+        weather_desc = "Weather data unavailable"
+        weather_favorable = False
+    flights = state.get("flights", [])
+    trip_request = state["trip_request"]
+    
+    if trip_request is None:
+        state["errors"].append("Trip request is missing")
+        return None
+    
+    # Determine WHY we're showing alternatives
+    reason = state.get("alternative_reason", "unknown")
+    
+    print(f"\\n🎯 Original Destination: {trip_request.destination}")
+    print(f"💰 Budget: ${trip_request.budget:,.2f}")
+    
+    # Display specific reason
+    if reason == "unfavorable_weather":
+        print(f"\\n⚠️  REASON: Weather conditions are unfavorable")
+        if weather and weather.alert:
+            print(f"   Alert: {weather.alert}")
+            print(f"   Temperature: {weather.temperature}°C")
+            print(f"   Condition: {weather.condition}")
+        reason_text = f"unfavorable weather conditions ({weather.condition}, {weather.temperature}°C)"
         
-        print(f"\\n🔍 Searching for better alternatives...")
+    elif reason == "no_flights_available":
+        print(f"\\n⚠️  REASON: No flights available")
+        print(f"   Route: {trip_request.origin} → {trip_request.destination}")
+        print(f"   Date: {trip_request.start_date}")
+        reason_text = "no flights available for this route"
         
-        # Use LLM to suggest alternatives
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", """You are a travel expert. Suggest 3 alternative destinations based on the issue.
+    elif reason == "flights_too_expensive":
+        expensive_price = state.get("expensive_flight_price")
+        if expensive_price:
+            percentage = (expensive_price / trip_request.budget) * 100
+            print(f"\\n⚠️  REASON: Flights exceed budget")
+            print(f"   Cheapest flight: ${expensive_price:,.2f}")
+            print(f"   Budget usage: {percentage:.0f}%")
+            print(f"   Remaining for hotels/activities: ${trip_request.budget - expensive_price:,.2f}")
+            reason_text = f"flights are too expensive (${expensive_price:,.2f}, {percentage:.0f}% of budget)"
+        else:
+            reason_text = "flights exceed budget threshold"
+    else:
+        print(f"\\n⚠️  REASON: General availability issues")
+        reason_text = "availability issues"
+    
+    print(f"\\n🔍 Searching for better alternatives...")
+    
+    candidates = destination_index.suggest(trip_request, limit=Config.ALTERNATIVE_CANDIDATES)
+    print(f"   {len(candidates)} candidate(s) from the destination index: {', '.join(c.name for c in candidates) or 'none'}")
+    
+    return trip_request, reason_text, candidates
+
+
+def _pick_verified(candidates: List[AlternativeDestination],
+                   live: List[Optional[WeatherData]]) -> List[AlternativeDestination]:
+    """
+    Candidates in score order with their live weather attached. Unfavorable
+    ones are dropped; unverified ones (lookup failed, or only an estimate)
+    only fill remaining slots.
+    """
+    verified, unverified = [], []
+    for candidate, weather in zip(candidates, live):
+        if weather is None or weather.source == "extrapolated":
+            unverified.append(candidate)
+        elif weather.is_favorable:
+            verified.append(candidate.model_copy(update={"weather": weather}))
+        else:
+            print(f"   ✂️ {candidate.name}: {weather.condition}, {weather.temperature}°C right now")
+    return (verified + unverified)[:Config.ALTERNATIVE_COUNT]
+
+
+def _candidate_facts(candidates: List[AlternativeDestination]) -> str:
+    lines = []
+    for i, c in enumerate(candidates, 1):
+        weather = (f"now {c.weather.temperature:.0f}°C, {c.weather.condition}" if c.weather
+                   else "live weather unavailable")
+        lines.append(
+            f"{i}. {c.name}, {c.country}: {weather}; typically {c.typical_temperature:.0f}°C with "
+            f"{c.rain_days:.0f} rainy days this month; round-trip fares usually ${c.fare_low:,.0f}-${c.fare_high:,.0f}; "
+            f"estimated trip cost ${c.estimated_cost:,.0f}"
+            + ("; suits the travel style" if c.matches_travel_type else "")
+        )
+    return "\n".join(lines)
+
+
+def _explanation_request(trip_request, reason_text: str, candidates: List[AlternativeDestination]):
+    """
+    Chain and inputs that explain the chosen candidates, the original free-form
+    suggestion prompt when the index found none, or (None, None) when
+    explanations are switched off.
+    """
+    if candidates and not Config.ALTERNATIVE_LLM_EXPLANATIONS:
+        return None, None
+    
+    if candidates:
+        chain = _explanation_chain()
+        inputs = {
+            "destination": trip_request.destination,
+            "reason": reason_text,
+            "budget": trip_request.budget,
+            "travel_type": trip_request.travel_type.value,
+            "duration": trip_request.duration_days or 7,
+            "origin": trip_request.origin,
+            "candidates": _candidate_facts(candidates)
+        }
+        return chain, inputs
+    
+    # Use LLM to suggest alternatives
+    chain = _suggestion_chain()
+    
+    inputs = {
+        "destination": trip_request.destination,
+        "reason": reason_text,
+        "budget": trip_request.budget,
+        "travel_type": trip_request.travel_type.value,
+        "duration": trip_request.duration_days or 7,
+        "origin": trip_request.origin
+    }
+    
+    return chain, inputs
+
+
+def _record_alternatives(state: TripPlannerState, trip_request, reason_text: str, response: str,
+                         alternatives: List[AlternativeDestination]) -> None:
+    # Format the output
+    header = f"\\n{'─'*60}\\n"
+    header += f"💡 ALTERNATIVE DESTINATIONS\\n"
+    header += f"{'─'*60}\\n"
+    header += f"📍 Original: {trip_request.destination}\\n"
+    header += f"⚠️  Issue: {reason_text.capitalize()}\\n"
+    header += f"💰 Budget: ${trip_request.budget:,.2f}\\n"
+    header += f"{'─'*60}\\n\\n"
+    
+    full_message = header + response
+    
+    state["messages"].append(full_message)
+    state["alternatives"] = alternatives
+    state["alternatives_explanation"] = response
+    state["current_step"] = "alternatives_suggested"
+    
+    print(f"\\n✅ Alternative suggestions generated!")
+    print("="*60 + "\\n")
+
+
+def _record_alternative_error(state: TripPlannerState, e: Exception) -> None:
+    state["errors"].append(f"Alternative suggestion failed: {str(e)}")
+    state["messages"].append(f"❌ Could not generate alternatives: {str(e)}")
+    print(f"❌ Error: {str(e)}")
+
+
+@lru_cache(maxsize=None)
+def _explanation_chain():
+    """Chain that explains index candidates; built once and reused"""
+    prompt = ChatPromptTemplate.from_messages([
+        ("system", """You are a travel expert. The alternative destinations below were already selected and checked.
+Explain them using only the facts given; do not add or replace destinations."""),
+        ("user", """The trip to {destination} cannot proceed due to: {reason}.
+
+Budget: ${budget}
+Travel Type: {travel_type}
+Duration: {duration} days
+Origin: {origin}
+
+Alternatives:
+{candidates}
+
+For each alternative, in the same order, write 2-3 sentences covering:
+- Why it solves the problem
+- Expected weather
+- Approximate flight cost from {origin}
+- Top 2-3 attractions
+
+Format as a clear, numbered list.""")
+    ])
+    return prompt | get_llm() | StrOutputParser()
+
+
+@lru_cache(maxsize=None)
+def _suggestion_chain():
+    """Free-form suggestion chain for when the index has no candidates; built once and reused"""
+    prompt = ChatPromptTemplate.from_messages([
+        ("system", """You are a travel expert. Suggest 3 alternative destinations based on the issue.
 Focus on destinations that solve the specific problem (better weather, cheaper flights, or better availability)."""),
-            ("user", """The trip to {destination} cannot proceed due to: {reason}.
+        ("user", """The trip to {destination} cannot proceed due to: {reason}.
 
 Budget: ${budget}
 Travel Type: {travel_type}
@@ -95,40 +281,5 @@ For each alternative, provide:
 - Top 2-3 attractions
 
 Format as a clear, numbered list.""")
-        ])
-        
-        chain = prompt | llm | StrOutputParser()
-        
-        response = chain.invoke({
-            "destination": trip_request.destination,
-            "reason": reason_text,
-            "budget": trip_request.budget,
-            "travel_type": trip_request.travel_type.value,
-            "duration": trip_request.duration_days or 7,
-            "origin": trip_request.origin
-        })
-        
-        # Format the output
-        header = f"\\n{'─'*60}\\n"
-        header += f"💡 ALTERNATIVE DESTINATIONS\\n"
-        header += f"{'─'*60}\\n"
-        header += f"📍 Original: {trip_request.destination}\\n"
-        header += f"⚠️  Issue: {reason_text.capitalize()}\\n"
-        header += f"💰 Budget: ${trip_request.budget:,.2f}\\n"
-        header += f"{'─'*60}\\n\\n"
-        
-        full_message = header + response
-        
-        state["messages"].append(full_message)
-        state["current_step"] = "alternatives_suggested"
-        
-        print(f"\\n✅ Alternative suggestions generated!")
-        print("="*60 + "\\n")
-        
-    except Exception as e:
-        state["errors"].append(f"Alternative suggestion failed: {str(e)}")
-        state["messages"].append(f"❌ Could not generate alternatives: {str(e)}")
-        print(f"❌ Error: {str(e)}")
-    
-
-    return state
+    ])
+    return prompt | get_llm() | StrOutputParser()
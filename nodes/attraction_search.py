@@ -27,4 +27,27 @@ def attraction_search_node(state: TripPlannerState) -> TripPlannerState:
     except Exception as e:
         state["errors"].append(f"Attraction search failed: {str(e)}")
     
+    return state
+
+
+async def aattraction_search_node(state: TripPlannerState) -> TripPlannerState:
+    """Async variant of attraction_search_node"""
+    print("🎯 Finding attractions with SerpAPI + LLM...")
+    
+    try:
+        trip_request = state["trip_request"]
+        
+        if trip_request is None:
+            state["errors"].append("Trip request is missing")
+            return state
+        
+        attractions = await attraction_tool.asearch_attractions(trip_request.destination)
+        
+        state["attractions"] = attractions
+        state["current_step"] = "attractions_found"
+        state["messages"].append(f"🎯 Found {len(attractions)} attractions")
+        
+    except Exception as e:
+        state["errors"].append(f"Attraction search failed: {str(e)}")
+    
     return state
\ No newline at end of file
@@ -1,12 +1,19 @@
-from typing import Dict, Any, cast
-from tools.flight_tool import SerpAPIFlightTool
-from tools.airport_lookup import get_airport_code_llm
+from typing import Dict, Any, List, Optional, Union, cast
+from concurrent.futures import Future
+import asyncio
+from tools.flight_tool import SerpAPIFlightTool, price_calendar
+from tools.airport_lookup import get_airport_code, aget_airport_code
 from state_types import TripPlannerState
 from config import Config
+from models import FlightOption, TripRequest
+from tools.prefetch import flight_prefetch
 
 serp_api = cast(str, Config.SERPAPI_KEY)
 flight_tool = SerpAPIFlightTool(serp_api)
 
+# Flexible-date searches return flights per departure date
+FlightResult = Union[List[FlightOption], Dict[str, List[FlightOption]]]
+
 def flight_search_node(state: TripPlannerState) -> TripPlannerState:
     """Node to search for flights using SerpAPI Runnable"""
     print("✈️  Searching for flights with SerpAPI...")
@@ -23,69 +30,229 @@ def flight_search_node(state: TripPlannerState) -> TripPlannerState:
         print(f"📅 Departure: {trip_request.start_date}")
         print(f"💰 Budget: ${trip_request.budget:,.2f}")
         
-        # Get airport codes
-        origin_code = get_airport_code_llm(trip_request.origin)
-        dest_code = get_airport_code_llm(trip_request.destination)
+        found = _prefetched_flights(state, trip_request)
+        if found is None:
+            found = _find_flights(trip_request)
+        
+        window = _flexible_window(trip_request)
+        flights = _pick_flexible_date(state, trip_request, found, window) if window else found
+        _record_flights(state, trip_request, flights)
+        
+    except Exception as e:
+        _record_flight_error(state, e)
+    
+    return state
+
+
+async def aflight_search_node(state: TripPlannerState) -> TripPlannerState:
+    """Async variant of flight_search_node"""
+    print("✈️  Searching for flights with SerpAPI...")
+    
+    try:
+        trip_request = state["trip_request"]
         
-        print(f"\\n🔍 Searching flights: {origin_code} → {dest_code}")
+        if trip_request is None:
+            state["errors"].append("Trip request is missing")
+            return state
         
-        # Search flights
-        flights = flight_tool.search_flights(
+        print(f"🛫 Origin: {trip_request.origin}")
+        print(f"🛬 Destination: {trip_request.destination}")
+        print(f"📅 Departure: {trip_request.start_date}")
+        print(f"💰 Budget: ${trip_request.budget:,.2f}")
+        
+        found = await _aprefetched_flights(state, trip_request)
+        if found is None:
+            found = await _afind_flights(trip_request)
+        
+        window = _flexible_window(trip_request)
+        flights = _pick_flexible_date(state, trip_request, found, window) if window else found
+        _record_flights(state, trip_request, flights)
+        
+    except Exception as e:
+        _record_flight_error(state, e)
+    
+    return state
+
+
+def _find_flights(trip_request: TripRequest) -> FlightResult:
+    """Resolve airports and search; per-date results when flexible dates are on"""
+    origin_code = get_airport_code(trip_request.origin)
+    dest_code = get_airport_code(trip_request.destination)
+    
+    print(f"\\n🔍 Searching flights: {origin_code} → {dest_code}")
+    
+    window = _flexible_window(trip_request)
+    if window:
+        return flight_tool.search_flexible_dates(
+            origin=origin_code,
+            destination=dest_code,
+            date=trip_request.start_date or "",
+            return_date=trip_request.end_date or "",
+            window=window
+        )
+    return flight_tool.search_flights(
+        origin=origin_code,
+        destination=dest_code,
+        date=trip_request.start_date or "",
+        return_date=trip_request.end_date or "",
+        budget=trip_request.budget
+    )
+
+
+async def _afind_flights(trip_request: TripRequest) -> FlightResult:
+    """Async variant of _find_flights"""
+    # Both codes resolve concurrently; index hits never leave the process
+    origin_code, dest_code = await asyncio.gather(
+        aget_airport_code(trip_request.origin),
+        aget_airport_code(trip_request.destination)
+    )
+    
+    print(f"\\n🔍 Searching flights: {origin_code} → {dest_code}")
+    
+    window = _flexible_window(trip_request)
+    if window:
+        return await flight_tool.asearch_flexible_dates(
             origin=origin_code,
             destination=dest_code,
             date=trip_request.start_date or "",
             return_date=trip_request.end_date or "",
-            budget=trip_request.budget
+            window=window
         )
-        print("="*60)
-        print("DEBUG: Full SerpAPI Response:")
-        print(json.dumps(result, indent=2)[:1000])  # First 1000 chars
-        print("="*60)
+    return await flight_tool.asearch_flights(
+        origin=origin_code,
+        destination=dest_code,
+        date=trip_request.start_date or "",
+        return_date=trip_request.end_date or "",
+        budget=trip_request.budget
+    )
+
+
+flight_prefetch.set_search(_find_flights, _afind_flights)
+
+
+def _prefetched_flights(state: TripPlannerState, trip_request: TripRequest) -> Optional[FlightResult]:
+    """
+    The result of the search started during the weather check, counted as a
+    hit. None, counted as a miss, when there is none or it failed: a bad guess
+    must not fail the run, so the caller then searches as usual.
+    """
+    prefetched = flight_prefetch.take(state.get("run_id"), trip_request)
+    if isinstance(prefetched, Future):
+        try:
+            found = prefetched.result()
+        except Exception as e:
+            print(f"⚠️ Speculative flight search failed, searching again: {e}")
+        else:
+            flight_prefetch.count("hit")
+            print("⚡ Using the flight search started during the weather check")
+            return found
+    if prefetched is not None or Config.SPECULATIVE_FLIGHTS:
+        flight_prefetch.count("miss")
+    return None
+
+
+async def _aprefetched_flights(state: TripPlannerState, trip_request: TripRequest) -> Optional[FlightResult]:
+    """Async variant of _prefetched_flights"""
+    prefetched = flight_prefetch.take(state.get("run_id"), trip_request)
+    if prefetched is not None:
+        try:
+            found = await (prefetched if isinstance(prefetched, asyncio.Task) else asyncio.wrap_future(prefetched))
+        except Exception as e:
+            print(f"⚠️ Speculative flight search failed, searching again: {e}")
+        else:
+            flight_prefetch.count("hit")
+            print("⚡ Using the flight search started during the weather check")
+            return found
+    if prefetched is not None or Config.SPECULATIVE_FLIGHTS:
+        flight_prefetch.count("miss")
+    return None
+
+
+def _flexible_window(trip_request: TripRequest) -> int:
+    """Days to search either side of the departure date; 0 without a date"""
+    if not trip_request.start_date:
+        return 0
+    return min(trip_request.flexible_days, Config.FLEXIBLE_DAYS_MAX)
+
+
+def _pick_flexible_date(state: TripPlannerState, trip_request: TripRequest,
+                        by_date: Dict[str, List[FlightOption]], window: int) -> List[FlightOption]:
+    """
+    Record the price calendar and return the flights for the requested dates.
+    The trip is never moved: weather, and in parallel mode hotels and
+    attractions, were looked up for those dates. A cheaper departure in the
+    window is only suggested. When the requested date has no fare within the
+    flight budget, its flights are returned uncut so the budget check reports
+    the fare as too expensive.
+    """
+    calendar = price_calendar(by_date)
+    state["price_calendar"] = calendar
+    requested = trip_request.start_date or ""
+    max_price = trip_request.budget * 0.6
+    
+    print("\n📅 Price calendar:")
+    for day, fare in calendar.items():
+        marker = " ← requested" if day == requested else ""
+        print(f"   {day}: {'no flights' if fare is None else f'${fare:,.2f}'}{marker}")
+    
+    requested_flights = by_date.get(requested, [])
+    flights = [f for f in requested_flights if f.price <= max_price] or requested_flights
+    
+    affordable = [day for day, fare in calendar.items() if fare is not None and fare <= max_price]
+    best = min(affordable, key=lambda day: (calendar[day], day != requested), default=None)
+    if best is not None and best != requested:
+        was = f"${calendar[requested]:,.0f}" if calendar.get(requested) is not None else "no flights"
+        print(f"📅 Cheaper departure on {best}: ${calendar[best]:,.0f} (requested {requested}: {was})")
+        state["messages"].append(
+            f"📅 Flying on {best} would be cheaper (${calendar[best]:,.0f} vs {was} on {requested}); "
+            f"plan again with that date to use it"
+        )
+    return flights
+
+
+def _record_flights(state: TripPlannerState, trip_request, flights) -> None:
+    state["flights"] = flights[:3]
+    state["current_step"] = "flights_found"
+    
+    # Analyze flight availability and budget
+    if not flights or len(flights) == 0:
+        print("\\n❌ NO FLIGHTS FOUND")
+        print("   Will suggest alternative destinations")
+        state["messages"].append("❌ No flights available for this route")
+    else:
+        print(f"\\n✅ Found {len(flights)} flights")
         
-        state["flights"] = flights[:3]
-        state["current_step"] = "flights_found"
+        # Show top 3 flights
+        for idx, flight in enumerate(flights[:3], 1):
+            print(f"\\n  {idx}. {flight.airline}")
+            print(f"     Price: ${flight.price:,.2f}")
+            print(f"     Duration: {flight.duration}")
+            print(f"     Stops: {flight.stops}")
         
-        # Analyze flight availability and budget
-        if not flights or len(flights) == 0:
-            print("\\n❌ NO FLIGHTS FOUND")
-            print("   Will suggest alternative destinations")
-            state["messages"].append("❌ No flights available for this route")
-        else:
-            print(f"\\n✅ Found {len(flights)} flights")
-            
-            # Show top 3 flights
-            for idx, flight in enumerate(flights[:3], 1):
-                print(f"\\n  {idx}. {flight.airline}")
-                print(f"     Price: ${flight.price:,.2f}")
-                print(f"     Duration: {flight.duration}")
-                print(f"     Stops: {flight.stops}")
-            
-            # Check budget
-            cheapest = min(flights, key=lambda f: f.price)
-            flight_percentage = (cheapest.price / trip_request.budget) * 100
-            
-            print(f"\\n💵 Cheapest flight: ${cheapest.price:,.2f}")
-            print(f"📊 Budget usage: {flight_percentage:.1f}% of total budget")
-            
-            if flight_percentage > 60:
-                print(f"\\n⚠️  BUDGET ALERT: Flights consume {flight_percentage:.0f}% of budget")
-                print("   This leaves insufficient budget for accommodation and activities")
-                print("   Will suggest alternative destinations with cheaper flights")
-                state["messages"].append(
-                    f"⚠️ Flights too expensive: ${cheapest.price:,.2f} ({flight_percentage:.0f}% of budget)"
-                )
-            else:
-                print(f"\\n✅ Flights are WITHIN BUDGET - proceeding to hotels")
-                state["messages"].append(
-                    f"✅ Found {len(flights)} flights from {trip_request.origin}"
-                )
+        # Check budget
+        cheapest = min(flights, key=lambda f: f.price)
+        flight_percentage = (cheapest.price / trip_request.budget) * 100
         
-        print("="*60 + "\\n")
+        print(f"\\n💵 Cheapest flight: ${cheapest.price:,.2f}")
+        print(f"📊 Budget usage: {flight_percentage:.1f}% of total budget")
         
-    except Exception as e:
-        print(f"❌ Error searching flights: {str(e)}")
-        state["errors"].append(f"Flight search failed: {str(e)}")
-        state["messages"].append("⚠️ Flight search had issues")
+        if flight_percentage > 60:
+            print(f"\\n⚠️  BUDGET ALERT: Flights consume {flight_percentage:.0f}% of budget")
+            print("   This leaves insufficient budget for accommodation and activities")
+            print("   Will suggest alternative destinations with cheaper flights")
+            state["messages"].append(
+                f"⚠️ Flights too expensive: ${cheapest.price:,.2f} ({flight_percentage:.0f}% of budget)"
+            )
+        else:
+            print(f"\\n✅ Flights are WITHIN BUDGET - proceeding to hotels")
+            state["messages"].append(
+                f"✅ Found {len(flights)} flights from {trip_request.origin}"
+            )
     
+    print("="*60 + "\\n")
 
-    return state
+
+def _record_flight_error(state: TripPlannerState, e: Exception) -> None:
+    print(f"❌ Error searching flights: {str(e)}")
+    state["errors"].append(f"Flight search failed: {str(e)}")
+    state["messages"].append("⚠️ Flight search had issues")
@@ -34,4 +34,34 @@ def hotel_search_node(state: TripPlannerState) -> TripPlannerState:
         state["errors"].append(f"Hotel search failed: {str(e)}")
         state["messages"].append("❌ Hotel search encountered issues")
     
+    return state
+
+
+async def ahotel_search_node(state: TripPlannerState) -> TripPlannerState:
+    """Async variant of hotel_search_node"""
+    print("🏨 Searching for hotels with SerpAPI...")
+    
+    try:
+        trip_request = state["trip_request"]
+        
+        if trip_request is None:
+            state["errors"].append("Trip request is missing")
+            return state
+        
+        hotels = await hotel_tool.asearch_hotels(
+            destination=trip_request.destination,
+            check_in=trip_request.start_date or "",
+            check_out=trip_request.end_date or "",
+            budget=trip_request.budget,
+            adults=trip_request.num_travelers
+        )
+        
+        state["hotels"] = hotels[:5]
+        state["current_step"] = "hotels_found"
+        state["messages"].append(f"🏨 Found {len(hotels)} hotels within budget")
+        
+    except Exception as e:
+        state["errors"].append(f"Hotel search failed: {str(e)}")
+        state["messages"].append("❌ Hotel search encountered issues")
+    
     return state
\ No newline at end of file
@@ -1,20 +1,18 @@
-import os
+import asyncio
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from concurrent.futures import as_completed
+from datetime import datetime, timedelta
+from functools import lru_cache
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import StrOutputParser
-from langchain_core.runnables import RunnableLambda
-from langchain_google_genai import ChatGoogleGenerativeAI
-from models import DayPlan, TripItinerary
-from state_types import TripPlannerState
+from langchain_core.runnables import Runnable
+from langchain_core.runnables.config import ContextThreadPoolExecutor
+from langgraph.config import get_stream_writer
 from config import Config
+from llm_provider import cached_completion
+from models import Attraction, TripItinerary, WeatherData
+from state_types import TripPlannerState
 import json
-
-langsmith_api_key = Config.GEMINI_API_KEY
-
-llm = ChatGoogleGenerativeAI(
-    model = "gemini-2.5-flash", 
-    temperature=0.7,
-    api_key = langsmith_api_key
-)
+import re
 
 def parse_json_response(x: str) -> dict:
     """Parse JSON from LLM response, handling markdown code blocks"""
@@ -42,6 +40,74 @@ def parse_json_response(x: str) -> dict:
     print("⚠️ No JSON object found in response")
     return {"daily_plans": []}
 
+class DailyPlanStreamParser:
+    """
+    Incremental parser for a streamed itinerary response.
+    feed() takes the next text chunk and returns the daily_plans entries whose
+    closing brace has arrived, so each day can be shown while later days are
+    still being generated. Only the new part of the buffer is scanned per chunk.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.plans: List[Dict[str, Any]] = []
+        self._pos = -1          # scan position once the daily_plans array is found
+        self._depth = 0         # nesting inside the array
+        self._start = -1        # offset of the day object being read
+        self._in_string = False
+        self._escaped = False
+        self._done = False
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        self.buffer += chunk
+        if self._done:
+            return []
+
+        if self._pos < 0:
+            match = re.search(r'"daily_plans"\s*:\s*\[', self.buffer)
+            if not match:
+                return []
+            self._pos = match.end()
+
+        completed = []
+        buf = self.buffer
+        i = self._pos
+        while i < len(buf):
+            ch = buf[i]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == "\\":
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                if self._depth == 0 and ch == "{":
+                    self._start = i
+                self._depth += 1
+            elif ch in "}]":
+                if self._depth == 0:
+                    # End of the daily_plans array
+                    self._done = True
+                    break
+                self._depth -= 1
+                if self._depth == 0 and self._start >= 0:
+                    try:
+                        plan = json.loads(buf[self._start:i + 1])
+                        if isinstance(plan, dict):
+                            self.plans.append(plan)
+                            completed.append(plan)
+                    except json.JSONDecodeError as e:
+                        print(f"⚠️ Skipping unparseable day in stream: {e}")
+                    self._start = -1
+            i += 1
+
+        self._pos = i
+        return completed
+
+
 def calculate_activity_costs(daily_plans):
     """Extract and sum all activity and meal costs from the itinerary"""
     import re
@@ -68,6 +134,225 @@ def calculate_activity_costs(daily_plans):
     
     return total_cost
 
+def cost_breakdown(trip_request, hotels, flights, attractions, daily_plans) -> Dict[str, float]:
+    """Hotel, flight, attraction and activity/meal costs for an itinerary"""
+    breakdown = {
+        "hotels": sum(h.price_per_night for h in hotels[:1]) * (trip_request.duration_days or 7) if hotels else 0,
+        "flights": sum(f.price for f in flights[:1]) if flights else 0,
+        "attractions": sum(a.cost or 0 for a in attractions),
+        "activities_meals": calculate_activity_costs(daily_plans)
+    }
+    breakdown["total"] = sum(breakdown.values())
+    return breakdown
+
+def build_itinerary(trip_request, hotels, flights, attractions, weather, daily_plans) -> TripItinerary:
+    """Assemble the itinerary model from the search results and generated days"""
+    return TripItinerary(
+        destination=trip_request.destination,
+        start_date=trip_request.start_date or "TBD",
+        end_date=trip_request.end_date or "TBD",
+        total_budget=trip_request.budget,
+        estimated_cost=cost_breakdown(trip_request, hotels, flights, attractions, daily_plans)["total"],
+        hotels=hotels[:3],
+        flights=flights[:2],
+        daily_plans=daily_plans,
+        attractions=attractions,
+        weather_summary=f"{weather.temperature}°C, {weather.condition}" if weather else "N/A",
+        notes=f"Created for {trip_request.travel_type.value} travel"
+    )
+
+def _partial_writer() -> Callable[[Any], None]:
+    """LangGraph custom stream writer, or a no-op when run outside the graph"""
+    try:
+        return get_stream_writer()
+    except RuntimeError:
+        return lambda chunk: None
+
+def plan_day_chunks(duration: int, chunk_days: int) -> List[Tuple[int, int]]:
+    """Split days 1..duration into (first_day, last_day) blocks"""
+    chunk_days = max(1, chunk_days)
+    return [(first, min(first + chunk_days - 1, duration)) for first in range(1, duration + 1, chunk_days)]
+
+def assign_attractions_to_days(attractions: List[Attraction], duration: int) -> Dict[int, List[Attraction]]:
+    """
+    Spread attractions over the trip so each day block gets its own share.
+    With fewer attractions than days they are spaced out evenly; with more,
+    they are dealt round-robin.
+    """
+    by_day: Dict[int, List[Attraction]] = {}
+    if not attractions or duration < 1:
+        return by_day
+    count = len(attractions)
+    for index, attraction in enumerate(attractions):
+        day = index * duration // count if count <= duration else index % duration
+        by_day.setdefault(day + 1, []).append(attraction)
+    return by_day
+
+def daily_weather_text(daily_weather: List[WeatherData], first_day: int, last_day: int) -> str:
+    """One weather line per trip day in the range, for the prompt"""
+    return "\n" + "\n".join(
+        f"  - Day {day} ({w.date}): {w.temperature:.0f}°C, {w.condition}, {w.precipitation_chance:.0f}% rain"
+        + (" (typical for the month)" if w.source == "climatology" else
+           " (estimate, no forecast yet)" if w.source == "extrapolated" else "")
+        for day, w in enumerate(daily_weather, 1) if first_day <= day <= last_day
+    )
+
+def _chunk_inputs(base_inputs: Dict[str, Any], first_day: int, last_day: int,
+                  by_day: Dict[int, List[Attraction]], start_date: datetime) -> Dict[str, Any]:
+    """Prompt inputs for one block of days of a long trip"""
+    mine = [
+        f"- Day {day}: {a.name} ({a.category}): {a.description}"
+        for day in range(first_day, last_day + 1) for a in by_day.get(day, [])
+    ]
+    elsewhere = [
+        a.name for day, items in sorted(by_day.items())
+        if not first_day <= day <= last_day for a in items
+    ]
+
+    scope = (
+        f"Create days {first_day}-{last_day} of a {base_inputs['duration']}-day detailed itinerary "
+        f"for {base_inputs['destination']}. This is one part of a longer trip: number the days "
+        f"{first_day} to {last_day} and only plan arrival or departure if it falls in this range."
+    )
+    if elsewhere:
+        scope += f" These attractions are covered on other days, do not repeat them: {', '.join(elsewhere)}."
+
+    inputs = dict(base_inputs)
+    inputs.update({
+        "scope": scope,
+        "first_day": first_day,
+        "day_count": last_day - first_day + 1,
+        "attractions": "\n".join(mine) if mine else "Popular tourist attractions in the area not listed for other days",
+        "start_date": (start_date + timedelta(days=first_day - 1)).strftime("%Y-%m-%d")
+    })
+    if base_inputs.get("daily_weather"):
+        inputs["weather"] = daily_weather_text(base_inputs["daily_weather"], first_day, last_day)
+    return inputs
+
+def _generate_chunk(make_chain: Callable[[int], Runnable], inputs: Dict[str, Any],
+                    start_date: datetime) -> List[Dict[str, Any]]:
+    """Generate one block of days, retrying only this block when it comes back short"""
+    first_day, expected = inputs["first_day"], inputs["day_count"]
+    chain = make_chain(expected)
+    plans: List[Dict[str, Any]] = []
+    last_error = None
+
+    for attempt in range(1 + Config.ITINERARY_CHUNK_RETRIES):
+        try:
+            plans = DailyPlanStreamParser().feed(chain.invoke(inputs))
+        except Exception as e:
+            last_error, plans = e, []
+        if len(plans) >= expected:
+            break
+        _report_short_chunk(first_day, expected, plans, attempt)
+
+    return _pin_chunk(plans, last_error, first_day, expected, start_date)
+
+async def _agenerate_chunk(make_chain: Callable[[int], Runnable], inputs: Dict[str, Any],
+                           start_date: datetime) -> List[Dict[str, Any]]:
+    """Async variant of _generate_chunk"""
+    first_day, expected = inputs["first_day"], inputs["day_count"]
+    chain = make_chain(expected)
+    plans: List[Dict[str, Any]] = []
+    last_error = None
+
+    for attempt in range(1 + Config.ITINERARY_CHUNK_RETRIES):
+        try:
+            plans = DailyPlanStreamParser().feed(await chain.ainvoke(inputs))
+        except Exception as e:
+            last_error, plans = e, []
+        if len(plans) >= expected:
+            break
+        _report_short_chunk(first_day, expected, plans, attempt)
+
+    return _pin_chunk(plans, last_error, first_day, expected, start_date)
+
+def _report_short_chunk(first_day: int, expected: int, plans: List[Dict[str, Any]], attempt: int) -> None:
+    print(f"  ⚠️ Days {first_day}-{first_day + expected - 1}: got {len(plans)}/{expected} days "
+          f"(attempt {attempt + 1}){', retrying' if attempt < Config.ITINERARY_CHUNK_RETRIES else ''}")
+
+def _pin_chunk(plans: List[Dict[str, Any]], last_error: Any, first_day: int, expected: int,
+               start_date: datetime) -> List[Dict[str, Any]]:
+    if not plans:
+        raise ValueError(f"no days generated ({last_error or 'empty response'})")
+
+    # Pin numbering and dates to this block's slot so the merge is ordered
+    plans = plans[:expected]
+    for offset, plan in enumerate(plans):
+        plan["day"] = first_day + offset
+        plan["date"] = (start_date + timedelta(days=first_day - 1 + offset)).strftime("%Y-%m-%d")
+    return plans
+
+def generate_days_in_chunks(make_chain: Callable[[int], Runnable], base_inputs: Dict[str, Any],
+                            attractions: List[Attraction], start_date: datetime,
+                            on_progress: Callable[[List[Dict[str, Any]]], None] = lambda plans: None
+                            ) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """
+    Generate a long itinerary as day blocks on a bounded thread pool.
+    Returns the merged daily plans in day order plus an error per failed block;
+    on_progress gets the merged plans each time a block finishes.
+    """
+    duration = base_inputs["duration"]
+    by_day = assign_attractions_to_days(attractions, duration)
+    chunks = plan_day_chunks(duration, Config.ITINERARY_CHUNK_DAYS)
+    print(f"🧩 Generating {duration} days as {len(chunks)} blocks "
+          f"({Config.ITINERARY_MAX_WORKERS} at a time)")
+
+    results: Dict[int, List[Dict[str, Any]]] = {}
+    errors: List[str] = []
+    with ContextThreadPoolExecutor(max_workers=Config.ITINERARY_MAX_WORKERS) as executor:
+        futures = {
+            executor.submit(_generate_chunk, make_chain, _chunk_inputs(base_inputs, first, last, by_day, start_date), start_date): (first, last)
+            for first, last in chunks
+        }
+        for future in as_completed(futures):
+            first, last = futures[future]
+            try:
+                results[first] = future.result()
+                print(f"  📅 Days {first}-{last} ready")
+            except Exception as e:
+                print(f"  ❌ Days {first}-{last} failed: {e}")
+                errors.append(f"Itinerary days {first}-{last} could not be generated: {e}")
+                continue
+            on_progress([plan for key in sorted(results) for plan in results[key]])
+
+    return [plan for key in sorted(results) for plan in results[key]], errors
+
+async def agenerate_days_in_chunks(make_chain: Callable[[int], Runnable], base_inputs: Dict[str, Any],
+                                   attractions: List[Attraction], start_date: datetime,
+                                   on_progress: Callable[[List[Dict[str, Any]]], None] = lambda plans: None
+                                   ) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """Async variant of generate_days_in_chunks; a semaphore bounds the blocks in flight"""
+    duration = base_inputs["duration"]
+    by_day = assign_attractions_to_days(attractions, duration)
+    chunks = plan_day_chunks(duration, Config.ITINERARY_CHUNK_DAYS)
+    print(f"🧩 Generating {duration} days as {len(chunks)} blocks "
+          f"({Config.ITINERARY_MAX_WORKERS} at a time)")
+
+    slots = asyncio.Semaphore(max(1, Config.ITINERARY_MAX_WORKERS))
+
+    async def run(first: int, last: int) -> Tuple[int, int, Any]:
+        async with slots:
+            try:
+                inputs = _chunk_inputs(base_inputs, first, last, by_day, start_date)
+                return first, last, await _agenerate_chunk(make_chain, inputs, start_date)
+            except Exception as e:
+                return first, last, e
+
+    results: Dict[int, List[Dict[str, Any]]] = {}
+    errors: List[str] = []
+    for finished in asyncio.as_completed([run(first, last) for first, last in chunks]):
+        first, last, outcome = await finished
+        if isinstance(outcome, Exception):
+            print(f"  ❌ Days {first}-{last} failed: {outcome}")
+            errors.append(f"Itinerary days {first}-{last} could not be generated: {outcome}")
+            continue
+        results[first] = outcome
+        print(f"  📅 Days {first}-{last} ready")
+        on_progress([plan for key in sorted(results) for plan in results[key]])
+
+    return [plan for key in sorted(results) for plan in results[key]], errors
+
 def itinerary_generation_node(state: TripPlannerState) -> TripPlannerState:
     """Node to generate complete itinerary using LLM Runnable Chain"""
     print("\n" + "="*60)
@@ -75,31 +360,71 @@ def itinerary_generation_node(state: TripPlannerState) -> TripPlannerState:
     print("="*60)
 
     try:
-        trip_request = state["trip_request"]
-        hotels = state.get("hotels", [])
-        flights = state.get("flights", [])
-        attractions = state.get("attractions", [])
-        weather = state.get("weather_data")
-
-        if trip_request is None:
-            state["errors"].append("Trip request is missing")
+        job = _prepare_itinerary(state)
+        if job is None:
             return state
+        duration = job["duration"]
+
+        if duration >= Config.ITINERARY_CHUNK_MIN_DAYS:
+            # Long trips: independent day blocks in parallel instead of one huge response
+            print("\n🤖 Invoking LLM to generate itinerary in blocks...")
+            daily_plans, chunk_errors = generate_days_in_chunks(
+                job["make_chain"], job["inputs"], job["attractions"], job["start_date"], on_progress=job["show_partial"]
+            )
+            state["errors"].extend(chunk_errors)
+        else:
+            print("\n🤖 Invoking LLM to generate itinerary...")
+            day_parser = DailyPlanStreamParser()
+            for chunk in job["make_chain"](duration).stream(job["inputs"]):
+                if day_parser.feed(chunk):
+                    print(f"  📅 {len(day_parser.plans)} day(s) ready")
+                    job["show_partial"](day_parser.plans)
+            daily_plans = _streamed_daily_plans(day_parser)
+
+        _finish_itinerary(state, job, daily_plans)
+
+    except Exception as e:
+        _record_itinerary_error(state, e)
+
+    return state
+
+async def aitinerary_generation_node(state: TripPlannerState) -> TripPlannerState:
+    """Async variant of itinerary_generation_node"""
+    print("\n" + "="*60)
+    print("📋 GENERATING DETAILED ITINERARY")
+    print("="*60)
 
-        # Check if flights are available before generating itinerary
-        if not flights or len(flights) == 0:
-            state["errors"].append("No flights available - cannot generate itinerary")
-            state["messages"].append("❌ Itinerary not generated: No flights available for the requested route")
-            print("⚠️ Skipping itinerary generation - no flights available")
+    try:
+        job = _prepare_itinerary(state)
+        if job is None:
             return state
+        duration = job["duration"]
+
+        if duration >= Config.ITINERARY_CHUNK_MIN_DAYS:
+            print("\n🤖 Invoking LLM to generate itinerary in blocks...")
+            daily_plans, chunk_errors = await agenerate_days_in_chunks(
+                job["make_chain"], job["inputs"], job["attractions"], job["start_date"], on_progress=job["show_partial"]
+            )
+            state["errors"].extend(chunk_errors)
+        else:
+            print("\n🤖 Invoking LLM to generate itinerary...")
+            day_parser = DailyPlanStreamParser()
+            async for chunk in job["make_chain"](duration).astream(job["inputs"]):
+                if day_parser.feed(chunk):
+                    print(f"  📅 {len(day_parser.plans)} day(s) ready")
+                    job["show_partial"](day_parser.plans)
+            daily_plans = _streamed_daily_plans(day_parser)
 
-        print(f"📍 Destination: {trip_request.destination}")
-        print(f"📅 Duration: {trip_request.duration_days} days")
-        print(f"💰 Budget: ${trip_request.budget}")
-        print(f"🎯 Travel Type: {trip_request.travel_type.value}")
-        
-        # Create enhanced prompt with clear structure
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", """You are an expert travel planner creating detailed day-by-day itineraries.
+        _finish_itinerary(state, job, daily_plans)
+
+    except Exception as e:
+        _record_itinerary_error(state, e)
+
+    return state
+
+# Enhanced prompt with clear structure, shared by every itinerary request
+ITINERARY_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", """You are an expert travel planner creating detailed day-by-day itineraries.
 You MUST provide complete information for each day including:
 1. Activities with specific times (Morning, Afternoon, Evening)
 2. THREE meal suggestions per day (Breakfast, Lunch, Dinner) with restaurant names
@@ -107,7 +432,7 @@ You MUST provide complete information for each day including:
 4. Travel times between locations
 
 Always return valid JSON in the exact format specified."""),
-            ("user", """Create a {duration}-day detailed itinerary for {destination}.
+    ("user", """{scope}
 
 **Trip Details:**
 - Travel Type: {travel_type}
@@ -125,7 +450,7 @@ Always return valid JSON in the exact format specified."""),
 {{
   "daily_plans": [
     {{
-      "day": 1,
+      "day": {first_day},
       "date": "{start_date}",
       "activities": [
         {{
@@ -170,7 +495,7 @@ Always return valid JSON in the exact format specified."""),
 }}
 
 **IMPORTANT INSTRUCTIONS:**
-1. Include ALL {duration} days
+1. Include ALL {day_count} days
 2. Each day MUST have 3 activities (Morning, Afternoon, Evening)
 3. Each day MUST have 3 meals (Breakfast, Lunch, Dinner) with SPECIFIC restaurant suggestions
 4. Include realistic costs based on the destination
@@ -179,113 +504,153 @@ Always return valid JSON in the exact format specified."""),
 7. Return ONLY valid JSON, no additional text
 
 Generate the complete itinerary now:""")
-        ])
-        
-        # Format data for prompt
-        hotels_text = "\n".join([
-            f"- {h.name}: ${h.price_per_night}/night (⭐ {h.rating}/5) - {h.location}" 
-            for h in hotels[:3]
-        ]) if hotels else "Budget accommodation options available"
-
-        attractions_text = "\n".join([
-            f"- {a.name} ({a.category}): {a.description}" 
-            for a in attractions[:8]
-        ]) if attractions else "Popular tourist attractions in the area"
-
-        # Create Runnable chain
-        chain = (
-            prompt 
-            | llm 
-            | StrOutputParser()
-            | RunnableLambda(parse_json_response)
-        )
-
-        # Calculate start date
-        from datetime import datetime, timedelta
-        start_date_str = trip_request.start_date or datetime.now().strftime("%Y-%m-%d")
-        try:
-            start_date_obj = datetime.strptime(start_date_str, "%Y-%m-%d")
-        except (ValueError, TypeError):
-            start_date_obj = datetime.now()
-            start_date_str = start_date_obj.strftime("%Y-%m-%d")
-
-        print("\n🤖 Invoking LLM to generate itinerary...")
-
-        response_data = chain.invoke({
-            "duration": trip_request.duration_days or 7,
-            "destination": trip_request.destination,
-            "travel_type": trip_request.travel_type.value,
-            "budget": trip_request.budget,
-            "num_travelers": trip_request.num_travelers,
-            "weather": f"{weather.temperature}°C, {weather.condition}" if weather else "N/A",
-            "hotels": hotels_text,
-            "attractions": attractions_text,
-            "start_date": trip_request.start_date or datetime.now().strftime("%Y-%m-%d")
-        })
-
-        # Parse response
-        daily_plans = response_data.get("daily_plans", [])
-        
-        if not daily_plans:
-            print("⚠️ Warning: No daily plans generated by LLM")
-            state["errors"].append("LLM did not generate daily plans")
-        else:
-            print(f"✅ Generated {len(daily_plans)} daily plans")
-
-            # Verify each plan has meals
-            for idx, plan in enumerate(daily_plans, 1):
-                meals = plan.get("meals", [])
-                activities = plan.get("activities", [])
-                print(f"  Day {idx}: {len(activities)} activities, {len(meals)} meals")
-
-                if not meals:
-                    print(f"  ⚠️ Day {idx} has no meals!")
-
-        # ✅ Calculate costs INCLUDING activities and meals
-        hotel_cost = sum(h.price_per_night for h in hotels[:1]) * (trip_request.duration_days or 7) if hotels else 0
-        flight_cost = sum(f.price for f in flights[:1]) if flights else 0
-        attraction_cost = sum(a.cost or 0 for a in attractions)
-
-        # ✅ NEW: Add activity and meal costs from itinerary
-        activity_meal_cost = calculate_activity_costs(daily_plans)
-
-        estimated_cost = hotel_cost + flight_cost + attraction_cost + activity_meal_cost
-
-        print(f"\n💰 Cost Breakdown:")
-        print(f"  Hotels: ${hotel_cost:,.2f}")
-        print(f"  Flights: ${flight_cost:,.2f}")
-        print(f"  Attractions: ${attraction_cost:,.2f}")
-        print(f"  Activities & Meals: ${activity_meal_cost:,.2f}")  # ✅ NEW
-        print(f"  Total Estimated: ${estimated_cost:,.2f}")
-
-        # Create itinerary
-        itinerary = TripItinerary(
-            destination=trip_request.destination,
-            start_date=trip_request.start_date or "TBD",
-            end_date=trip_request.end_date or "TBD",
-            total_budget=trip_request.budget,
-            estimated_cost=estimated_cost,
-            hotels=hotels[:3],
-            flights=flights[:2],
-            daily_plans=daily_plans,
-            attractions=attractions,
-            weather_summary=f"{weather.temperature}°C, {weather.condition}" if weather else "N/A",
-            notes=f"Created for {trip_request.travel_type.value} travel"
-        )
-
-        state["itinerary"] = itinerary
-        state["current_step"] = "itinerary_complete"
-        state["messages"].append("✅ Itinerary created successfully!")
-
-        print("\n✅ Itinerary generation complete!")
-        print("="*60 + "\n")
-        
-    except Exception as e:
-        print(f"\n❌ Error in itinerary generation: {str(e)}")
-        import traceback
-        traceback.print_exc()
-
-        state["errors"].append(f"Itinerary generation failed: {str(e)}")
-        state["messages"].append("❌ Could not generate complete itinerary")
-
-    return state
\ No newline at end of file
+])
+
+@lru_cache(maxsize=32)
+def _itinerary_chain(expected_days: int) -> Runnable:
+    """Itinerary chain, built once per day count; only responses with every requested day are cached"""
+    return ITINERARY_PROMPT | cached_completion(
+        "itinerary",
+        namespace="itinerary",
+        validate=lambda text: len(DailyPlanStreamParser().feed(text)) >= expected_days
+    )
+
+def _prepare_itinerary(state: TripPlannerState) -> Optional[Dict[str, Any]]:
+    """Everything both node variants need to generate, or None if the itinerary is skipped"""
+    trip_request = state["trip_request"]
+    hotels = state.get("hotels", [])
+    flights = state.get("flights", [])
+    attractions = state.get("attractions", [])
+    weather = state.get("weather_data")
+    daily_weather = state.get("daily_weather") or []
+
+    if trip_request is None:
+        state["errors"].append("Trip request is missing")
+        return None
+
+    # Check if flights are available before generating itinerary
+    if not flights or len(flights) == 0:
+        state["errors"].append("No flights available - cannot generate itinerary")
+        state["messages"].append("❌ Itinerary not generated: No flights available for the requested route")
+        print("⚠️ Skipping itinerary generation - no flights available")
+        return None
+
+    print(f"📍 Destination: {trip_request.destination}")
+    print(f"📅 Duration: {trip_request.duration_days} days")
+    print(f"💰 Budget: ${trip_request.budget}")
+    print(f"🎯 Travel Type: {trip_request.travel_type.value}")
+    
+    # Format data for prompt
+    hotels_text = "\n".join([
+        f"- {h.name}: ${h.price_per_night}/night (⭐ {h.rating}/5) - {h.location}" 
+        for h in hotels[:3]
+    ]) if hotels else "Budget accommodation options available"
+
+    attractions_text = "\n".join([
+        f"- {a.name} ({a.category}): {a.description}" 
+        for a in attractions[:8]
+    ]) if attractions else "Popular tourist attractions in the area"
+
+    # Calculate start date
+    start_date_str = trip_request.start_date or datetime.now().strftime("%Y-%m-%d")
+    try:
+        start_date_obj = datetime.strptime(start_date_str, "%Y-%m-%d")
+    except (ValueError, TypeError):
+        start_date_obj = datetime.now()
+        start_date_str = start_date_obj.strftime("%Y-%m-%d")
+
+    duration = trip_request.duration_days or 7
+    chain_inputs = {
+        "scope": f"Create a {duration}-day detailed itinerary for {trip_request.destination}.",
+        "first_day": 1,
+        "day_count": duration,
+        "duration": duration,
+        "destination": trip_request.destination,
+        "travel_type": trip_request.travel_type.value,
+        "budget": trip_request.budget,
+        "num_travelers": trip_request.num_travelers,
+        "weather": daily_weather_text(daily_weather, 1, duration) if daily_weather
+                   else f"{weather.temperature}°C, {weather.condition}" if weather else "N/A",
+        "daily_weather": daily_weather,
+        "hotels": hotels_text,
+        "attractions": attractions_text,
+        "start_date": trip_request.start_date or datetime.now().strftime("%Y-%m-%d")
+    }
+
+    write_partial = _partial_writer()
+
+    def show_partial(plans: List[Dict[str, Any]]) -> None:
+        write_partial({"itinerary": build_itinerary(
+            trip_request, hotels, flights, attractions, weather, list(plans)
+        )})
+
+    return {
+        "trip_request": trip_request,
+        "hotels": hotels,
+        "flights": flights,
+        "attractions": attractions,
+        "weather": weather,
+        "duration": duration,
+        "start_date": start_date_obj,
+        "inputs": chain_inputs,
+        "make_chain": _itinerary_chain,
+        "show_partial": show_partial
+    }
+
+def _streamed_daily_plans(day_parser: DailyPlanStreamParser) -> List[Dict[str, Any]]:
+    # Parse response
+    response_data = parse_json_response(day_parser.buffer)
+    daily_plans = response_data.get("daily_plans", [])
+
+    if not daily_plans and day_parser.plans:
+        # Truncated or malformed tail: keep the days that did arrive intact
+        print(f"⚠️ Using {len(day_parser.plans)} streamed day(s) from an incomplete response")
+        daily_plans = day_parser.plans
+    return daily_plans
+
+def _finish_itinerary(state: TripPlannerState, job: Dict[str, Any], daily_plans: List[Dict[str, Any]]) -> None:
+    trip_request, hotels, flights = job["trip_request"], job["hotels"], job["flights"]
+    attractions, weather = job["attractions"], job["weather"]
+
+    if not daily_plans:
+        print("⚠️ Warning: No daily plans generated by LLM")
+        state["errors"].append("LLM did not generate daily plans")
+    else:
+        print(f"✅ Generated {len(daily_plans)} daily plans")
+
+        # Verify each plan has meals
+        for idx, plan in enumerate(daily_plans, 1):
+            meals = plan.get("meals", [])
+            activities = plan.get("activities", [])
+            print(f"  Day {idx}: {len(activities)} activities, {len(meals)} meals")
+
+            if not meals:
+                print(f"  ⚠️ Day {idx} has no meals!")
+
+    # ✅ Calculate costs INCLUDING activities and meals
+    costs = cost_breakdown(trip_request, hotels, flights, attractions, daily_plans)
+
+    print(f"\n💰 Cost Breakdown:")
+    print(f"  Hotels: ${costs['hotels']:,.2f}")
+    print(f"  Flights: ${costs['flights']:,.2f}")
+    print(f"  Attractions: ${costs['attractions']:,.2f}")
+    print(f"  Activities & Meals: ${costs['activities_meals']:,.2f}")
+    print(f"  Total Estimated: ${costs['total']:,.2f}")
+
+    # Create itinerary
+    itinerary = build_itinerary(trip_request, hotels, flights, attractions, weather, daily_plans)
+
+    state["itinerary"] = itinerary
+    state["current_step"] = "itinerary_complete"
+    state["messages"].append("✅ Itinerary created successfully!")
+
+    print("\n✅ Itinerary generation complete!")
+    print("="*60 + "\n")
+
+def _record_itinerary_error(state: TripPlannerState, e: Exception) -> None:
+    print(f"\n❌ Error in itinerary generation: {str(e)}")
+    import traceback
+    traceback.print_exc()
+
+    state["errors"].append(f"Itinerary generation failed: {str(e)}")
+    state["messages"].append("❌ Could not generate complete itinerary")
@@ -0,0 +1,81 @@
+"""
+Tests for claiming the speculative flight search in the flight node
+"""
+import asyncio
+import pytest
+from graph import initial_state
+from models import FlightOption, TripRequest
+from nodes import flight_search
+from tools.prefetch import flight_prefetch
+
+TRIP = TripRequest(origin="New York", destination="Lisbon", start_date="2026-11-02",
+                   end_date="2026-11-05", duration_days=3, budget=3000)
+FRESH = [FlightOption(airline="TP", departure_time="", arrival_time="", duration="7h", price=480.0)]
+
+
+class SearchDown(Exception):
+    pass
+
+
+@pytest.fixture
+def outcomes(monkeypatch):
+    """Prefetch outcomes counted during the test, in order"""
+    counted = []
+    monkeypatch.setattr(flight_prefetch, "count", counted.append)
+    return counted
+
+
+@pytest.fixture
+def failing_prefetch(monkeypatch):
+    def search(trip_request):
+        raise SearchDown("speculative search timed out")
+
+    async def asearch(trip_request):
+        raise SearchDown("speculative search timed out")
+
+    monkeypatch.setattr(flight_prefetch, "_search", search)
+    monkeypatch.setattr(flight_prefetch, "_asearch", asearch)
+
+
+def test_failed_prefetch_falls_back_to_a_fresh_search(monkeypatch, outcomes, failing_prefetch):
+    fresh_searches = []
+    monkeypatch.setattr(flight_search, "_find_flights", lambda trip: fresh_searches.append(trip) or FRESH)
+    state = initial_state(TRIP)
+
+    flight_prefetch.start(state["run_id"], TRIP)
+    result = flight_search.flight_search_node(state)
+
+    assert result["flights"] == FRESH
+    assert result["errors"] == []
+    assert fresh_searches == [TRIP]
+    assert outcomes == ["started", "miss"]
+
+
+def test_failed_async_prefetch_falls_back_to_a_fresh_search(monkeypatch, outcomes, failing_prefetch):
+    async def afind_flights(trip):
+        return FRESH
+
+    monkeypatch.setattr(flight_search, "_afind_flights", afind_flights)
+    state = initial_state(TRIP)
+
+    async def run():
+        flight_prefetch.astart(state["run_id"], TRIP)
+        return await flight_search.aflight_search_node(state)
+
+    result = asyncio.run(run())
+
+    assert result["flights"] == FRESH
+    assert result["errors"] == []
+    assert outcomes == ["started", "miss"]
+
+
+def test_successful_prefetch_is_a_hit(monkeypatch, outcomes):
+    monkeypatch.setattr(flight_prefetch, "_search", lambda trip: FRESH)
+    monkeypatch.setattr(flight_search, "_find_flights", lambda trip: pytest.fail("searched twice"))
+    state = initial_state(TRIP)
+
+    flight_prefetch.start(state["run_id"], TRIP)
+    result = flight_search.flight_search_node(state)
+
+    assert result["flights"] == FRESH
+    assert outcomes == ["started", "hit"]
@@ -5,15 +5,7 @@ import json
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.runnables import RunnableLambda
-from langchain_google_genai import ChatGoogleGenerativeAI
-from config import Config
-
-# Initialize LLM
-llm = ChatGoogleGenerativeAI(
-    model="gemini-2.5-flash", 
-    temperature=0.7,
-    api_key=Config.GEMINI_API_KEY
-)
+from llm_provider import get_llm
 
 def test_full_chain():
     """Test the complete chain with LLM"""
@@ -49,7 +41,7 @@ Format: {{"daily_plans": [{{"day": 1, "date": "2024-01-01", "activities": [...],
     # Create chain
     chain = (
         prompt 
-        | llm 
+        | get_llm("itinerary")
         | StrOutputParser()
         | RunnableLambda(lambda x: json.loads(str(x)) if isinstance(x, str) and x.strip().startswith('{') else {"daily_plans": []})
     )
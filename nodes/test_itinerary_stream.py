@@ -0,0 +1,74 @@
+"""
+Tests for the streamed itinerary parser and day-block pinning
+"""
+import json
+from datetime import datetime
+import pytest
+from nodes.itinerary_generation import DailyPlanStreamParser, _pin_chunk
+
+RESPONSE = json.dumps({
+    "destination": "Lisbon",
+    "daily_plans": [
+        {"day": 1, "activities": [{"name": "Alfama {old town}", "cost": 0}], "notes": "say \"olá\""},
+        {"day": 2, "activities": [], "meals": ["pastéis [de] nata"]},
+    ],
+    "total_estimated_cost": 120,
+})
+
+
+def test_stream_yields_each_day_when_its_brace_arrives():
+    """Days come out one at a time, whatever the chunk boundaries"""
+    for size in (1, 3, 7, len(RESPONSE)):
+        parser = DailyPlanStreamParser()
+        seen = []
+        for start in range(0, len(RESPONSE), size):
+            seen.extend(plan["day"] for plan in parser.feed(RESPONSE[start:start + size]))
+        assert seen == [1, 2]
+        assert [plan["day"] for plan in parser.plans] == [1, 2]
+
+
+def test_stream_ignores_brackets_inside_strings():
+    """Braces and escaped quotes in text do not end a day early"""
+    parser = DailyPlanStreamParser()
+    plans = parser.feed(RESPONSE)
+    assert plans[0]["activities"][0]["name"] == "Alfama {old town}"
+    assert plans[0]["notes"] == 'say "olá"'
+    assert plans[1]["meals"] == ["pastéis [de] nata"]
+
+
+def test_stream_stops_at_end_of_array():
+    """Objects after daily_plans are not taken for days"""
+    parser = DailyPlanStreamParser()
+    parser.feed('{"daily_plans": [{"day": 1}], "extra": ')
+    assert parser.feed('{"day": 99}}') == []
+    assert parser.plans == [{"day": 1}]
+
+
+def test_stream_waits_for_daily_plans_key():
+    """Nothing is parsed before the array starts, such as a markdown fence"""
+    parser = DailyPlanStreamParser()
+    assert parser.feed('```json\n{"summary": {"day": 0}, ') == []
+    assert parser.feed('"daily_plans": [{"day": 1}]}\n```') == [{"day": 1}]
+
+
+def test_stream_skips_unparseable_day(capsys):
+    """A malformed day is dropped and later days still parse"""
+    parser = DailyPlanStreamParser()
+    plans = parser.feed('{"daily_plans": [{"day": 1, "cost": 1..}, {"day": 2}]}')
+    assert plans == [{"day": 2}]
+    assert "Skipping unparseable day" in capsys.readouterr().out
+
+
+def test_pin_chunk_renumbers_and_dates_days():
+    """Days are pinned to the block's slot, whatever the model numbered them"""
+    plans = [{"day": 1, "date": "2020-01-01"}, {"day": 7}, {"day": 3}]
+    pinned = _pin_chunk(plans, None, first_day=4, expected=2, start_date=datetime(2026, 11, 2))
+    assert [(plan["day"], plan["date"]) for plan in pinned] == [(4, "2026-11-05"), (5, "2026-11-06")]
+
+
+def test_pin_chunk_without_days_raises():
+    """An empty block reports the last error instead of leaving a silent gap"""
+    with pytest.raises(ValueError, match="timeout"):
+        _pin_chunk([], "timeout", first_day=1, expected=3, start_date=datetime(2026, 11, 2))
+    with pytest.raises(ValueError, match="empty response"):
+        _pin_chunk([], None, first_day=1, expected=3, start_date=datetime(2026, 11, 2))
@@ -1,7 +1,9 @@
 from tools.weather_tool import WeatherTool
-from typing import Dict, Any, cast
+from typing import Dict, Any, List, cast
+from datetime import datetime, timedelta
 from config import Config
 from state_types import TripPlannerState
+from tools.prefetch import flight_prefetch
 
 openweather_api_key = cast(str, Config.OPENWEATHERMAP_API_KEY)
 weather_tool = WeatherTool(openweather_api_key)
@@ -20,40 +22,115 @@ def weather_check_node(state: TripPlannerState) -> TripPlannerState:
         print(f"📍 Checking weather for: {trip_request.destination}")
         print(f"📅 Travel date: {trip_request.start_date}")
         
+        if Config.SPECULATIVE_FLIGHTS:
+            flight_prefetch.start(state.get("run_id"), trip_request)
+        
         # Fetch weather
-        weather_runnable = weather_tool.get_weather_runnable()
-        weather = weather_runnable.invoke({
-            "city": trip_request.destination,
-            "date": trip_request.start_date
-        })
-        
-        state['weather_data'] = weather
-        state['current_step'] = "weather_checked"
-        
-        # Print detailed weather report
-        print(f"\\n🌡️  Temperature: {weather.temperature}°C")
-        print(f"☁️  Condition: {weather.condition}")
-        print(f"💧 Humidity: {weather.humidity}%")
-        print(f"🌧️  Rain Chance: {weather.precipitation_chance}%")
-        
-        if not weather.is_favorable:
-            print(f"\\n⚠️  WEATHER ALERT: {weather.alert}")
-            print("❌ Weather is UNFAVORABLE - will suggest alternatives")
-            state['messages'].append(
-                f"⚠️ Weather alert for {trip_request.destination}: {weather.alert}"
-            )
-            state['should_replan'] = True
+        if weather_tool.mode == "forecast":
+            days = weather_tool.get_daily_weather(trip_request.destination, trip_dates(trip_request))
+            state['daily_weather'] = days
+            weather = days[0]
         else:
-            print(f"\\n✅ Weather is FAVORABLE - proceeding to flight search")
-            state['messages'].append(
-                f"✅ Weather looks good in {trip_request.destination}! Temp: {weather.temperature}°C"
-            )
+            weather_runnable = weather_tool.get_weather_runnable()
+            weather = weather_runnable.invoke({
+                "city": trip_request.destination,
+                "date": trip_request.start_date
+            })
         
-        print("="*60 + "\\n")
+        _record_weather(state, trip_request, weather)
         
     except Exception as e:
-        print(f"❌ Error checking weather: {str(e)}")
-        state['errors'].append(f"Weather check failed: {str(e)}")
-        state['messages'].append("❌ Could not fetch weather data. Proceeding with caution.")
+        _record_weather_error(state, e)
+    
+    _settle_flight_prefetch(state)
+    return state
+
+
+async def aweather_check_node(state: TripPlannerState) -> TripPlannerState:
+    '''Async variant of weather_check_node'''
+    print("🌤️  Checking weather conditions...")
     
-    return state
\ No newline at end of file
+    try:
+        trip_request = state['trip_request']
+        
+        if trip_request is None:
+            state["errors"].append("Trip request is missing")
+            return state
+        
+        print(f"📍 Checking weather for: {trip_request.destination}")
+        print(f"📅 Travel date: {trip_request.start_date}")
+        
+        if Config.SPECULATIVE_FLIGHTS:
+            flight_prefetch.astart(state.get("run_id"), trip_request)
+        
+        if weather_tool.mode == "forecast":
+            days = await weather_tool.aget_daily_weather(trip_request.destination, trip_dates(trip_request))
+            state['daily_weather'] = days
+            weather = days[0]
+        else:
+            weather_runnable = weather_tool.get_weather_runnable()
+            weather = await weather_runnable.ainvoke({
+                "city": trip_request.destination,
+                "date": trip_request.start_date
+            })
+        
+        _record_weather(state, trip_request, weather)
+        
+    except Exception as e:
+        _record_weather_error(state, e)
+    
+    _settle_flight_prefetch(state)
+    return state
+
+
+def trip_dates(trip_request) -> List[str]:
+    '''Every day of the trip, numbered the same way as the itinerary'''
+    try:
+        start = datetime.strptime(trip_request.start_date or "", "%Y-%m-%d")
+    except ValueError:
+        start = datetime.now()
+    return [(start + timedelta(days=i)).strftime("%Y-%m-%d") for i in range(trip_request.duration_days or 7)]
+
+
+def _record_weather(state: TripPlannerState, trip_request, weather) -> None:
+    state['weather_data'] = weather
+    state['current_step'] = "weather_checked"
+    
+    # Print detailed weather report
+    print(f"\\n🌡️  Temperature: {weather.temperature}°C")
+    print(f"☁️  Condition: {weather.condition}")
+    print(f"💧 Humidity: {weather.humidity}%")
+    print(f"🌧️  Rain Chance: {weather.precipitation_chance}%")
+    if weather.source == "extrapolated":
+        print(f"📆 {weather.alert}")
+    elif weather.source != "current":
+        print(f"📆 Based on the {weather.source} for {weather.date}")
+    
+    if not weather.is_favorable:
+        print(f"\\n⚠️  WEATHER ALERT: {weather.alert}")
+        print("❌ Weather is UNFAVORABLE - will suggest alternatives")
+        state['messages'].append(
+            f"⚠️ Weather alert for {trip_request.destination}: {weather.alert}"
+        )
+        state['should_replan'] = True
+        state['alternative_reason'] = "unfavorable_weather"
+    else:
+        print(f"\\n✅ Weather is FAVORABLE - proceeding to flight search")
+        state['messages'].append(
+            f"✅ Weather looks good in {trip_request.destination}! Temp: {weather.temperature}°C"
+        )
+    
+    print("="*60 + "\\n")
+
+
+def _record_weather_error(state: TripPlannerState, e: Exception) -> None:
+    print(f"❌ Error checking weather: {str(e)}")
+    state['errors'].append(f"Weather check failed: {str(e)}")
+    state['messages'].append("❌ Could not fetch weather data. Proceeding with caution.")
+
+
+def _settle_flight_prefetch(state: TripPlannerState) -> None:
+    """Drop the speculative flight search when the weather gate will not pass"""
+    weather = state.get("weather_data")
+    if Config.SPECULATIVE_FLIGHTS and state.get("trip_request") is not None and not (weather and weather.is_favorable):
+        flight_prefetch.discard(state.get("run_id"), state["trip_request"])
\ No newline at end of file
@@ -0,0 +1,128 @@
+from typing import Any, Deque, Dict, List, Optional
+from collections import deque
+from dataclasses import dataclass, field
+import statistics
+import threading
+import time
+from config import Config
+
+
+class LatencyHistory:
+    """Rolling window of recent run times for each graph node"""
+
+    def __init__(self, window: int):
+        self.window = window
+        self._lock = threading.Lock()
+        self._durations: Dict[str, Deque[float]] = {}
+
+    def record(self, node: str, seconds: float) -> None:
+        with self._lock:
+            self._durations.setdefault(node, deque(maxlen=self.window)).append(seconds)
+
+    def expected(self, node: str) -> Optional[float]:
+        """Median of the recent runs, or None before the node has run"""
+        with self._lock:
+            durations = self._durations.get(node)
+            return statistics.median(durations) if durations else None
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {
+                node: {"runs": len(d), "median": statistics.median(d), "last": d[-1]}
+                for node, d in self._durations.items() if d
+            }
+
+
+# Shared by every session in the process, so estimates improve as plans are made
+latency_history = LatencyHistory(Config.PROGRESS_HISTORY_WINDOW)
+
+
+@dataclass
+class ProgressEvent:
+    """One step of a planning run as seen by the UI"""
+    kind: str                       # "start", "finish" or "partial"
+    node: str
+    state: Dict[str, Any]
+    duration: Optional[float] = None    # measured node time, on "finish"
+    elapsed: float = 0.0
+    eta: Optional[float] = None         # estimated seconds left, None until there is history
+    fraction: float = 0.0
+    running: List[str] = field(default_factory=list)
+
+
+class ProgressTracker:
+    """
+    Follows the start/finish events of one run against the expected stages.
+    Nodes inside a stage run in parallel, so a stage costs as much as its
+    slowest remaining node.
+    """
+
+    def __init__(self, stages: List[List[str]], history: LatencyHistory = latency_history):
+        self.stages = stages
+        self.history = history
+        self.started_at = time.perf_counter()
+        self.running: Dict[str, float] = {}
+        self.finished: Dict[str, float] = {}
+        self._fraction = 0.0
+
+    def start(self, node: str) -> None:
+        if not any(node in stage for stage in self.stages):
+            # Off the expected path (e.g. alternatives): it is the last step now
+            self.stages = [[node]]
+        self.running[node] = time.perf_counter()
+
+    def finish(self, node: str, duration: Optional[float]) -> None:
+        started = self.running.pop(node, None)
+        if duration is None and started is not None:
+            duration = time.perf_counter() - started
+        self.finished[node] = duration or 0.0
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started_at
+
+    def remaining(self) -> Optional[float]:
+        """Estimated seconds left, or None if any pending node has no history yet"""
+        now = time.perf_counter()
+        total = 0.0
+        for stage in self.stages:
+            slowest = 0.0
+            for node in stage:
+                if node in self.finished:
+                    continue
+                expected = self.history.expected(node)
+                if expected is None:
+                    return None
+                if node in self.running:
+                    expected = max(expected - (now - self.running[node]), 0.0)
+                slowest = max(slowest, expected)
+            total += slowest
+        return total
+
+    def fraction(self) -> float:
+        """Share of the run done, time-based when an estimate exists; never moves back"""
+        nodes = [node for stage in self.stages for node in stage]
+        if nodes and all(node in self.finished for node in nodes):
+            self._fraction = 1.0
+            return self._fraction
+
+        remaining = self.remaining()
+        if remaining is not None:
+            elapsed = self.elapsed()
+            fraction = min(elapsed / (elapsed + remaining), 0.99) if elapsed + remaining > 0 else 0.0
+        else:
+            done = sum(1 for node in nodes if node in self.finished)
+            fraction = done / len(nodes) if nodes else 0.0
+        self._fraction = max(self._fraction, fraction)
+        return self._fraction
+
+    def event(self, kind: str, node: str, state: Dict[str, Any], duration: Optional[float] = None) -> ProgressEvent:
+        return ProgressEvent(
+            kind=kind,
+            node=node,
+            state=state,
+            duration=duration,
+            elapsed=self.elapsed(),
+            eta=self.remaining() if Config.SHOW_PROGRESS_ETA else None,
+            fraction=self.fraction(),
+            running=list(self.running)
+        )
@@ -1,19 +1,28 @@
-from typing import TypedDict, Annotated, Optional, List
+from typing import TypedDict, Annotated, Optional, List, Dict
 import operator
-from models import TripRequest, WeatherData, HotelOption, FlightOption, Attraction, TripItinerary
+from models import TripRequest, WeatherData, HotelOption, FlightOption, Attraction, TripItinerary, AlternativeDestination
+
+def keep_latest(current: str, update: str) -> str:
+    """Reducer so parallel branches can all report their step"""
+    return update
 
 class TripPlannerState(TypedDict):
     """State type for the graph"""
+    run_id: str  # Unique per plan; scopes work shared between nodes of one run
     trip_request: Optional[TripRequest]
     weather_data: Optional[WeatherData]
+    daily_weather: List[WeatherData]  # One entry per trip day in forecast mode
     hotels: List[HotelOption]
     flights: List[FlightOption]
     attractions: List[Attraction]
     itinerary: Optional[TripItinerary]
     errors: Annotated[List[str], operator.add]
-    current_step: str
+    current_step: Annotated[str, keep_latest]
     should_replan: bool
     messages: Annotated[List[str], operator.add]
     
     alternative_reason: Optional[str]  # "unfavorable_weather", "no_flights_available", "flights_too_expensive"
     expensive_flight_price: Optional[float]  # Store flight price if too expensive
+    price_calendar: Optional[Dict[str, Optional[float]]]  # Flexible dates: departure date -> cheapest fare
+    alternatives: List[AlternativeDestination]  # Suggested when weather or flights fail
+    alternatives_explanation: Optional[str]  # Why the alternatives fit, without the message header
@@ -1,31 +1,178 @@
-from config import Config
-from langchain_google_genai import ChatGoogleGenerativeAI
+from typing import Dict, List, Optional
+from pathlib import Path
+from functools import lru_cache
+import csv
+import difflib
+import re
+import unicodedata
+from llm_provider import get_llm
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 
-langsmith_api_key = Config.GEMINI_API_KEY
+AIRPORTS_CSV = Path(__file__).parent / "data" / "airports.csv"
 
-llm = ChatGoogleGenerativeAI(
-    model = "gemini-2.5-flash", 
-    temperature=0.7,
-    api_key = langsmith_api_key
-)
 
-def get_airport_code_llm(city_name: str) -> str:
-    """Use LLM to get the main airport code for a city"""
-    
+def normalize_place(name: str) -> str:
+    """Lowercase, strip accents and punctuation: "São Paulo" -> "sao paulo" """
+    text = unicodedata.normalize("NFKD", name)
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    text = re.sub(r"[^\w\s]", " ", text.casefold())
+    return " ".join(text.split())
+
+
+class AirportIndex:
+    """In-memory index over the bundled airport/city dataset"""
+
+    def __init__(self, rows: List[Dict[str, str]]):
+        self.codes: set = set()
+        self.by_place: Dict[str, List[str]] = {}    # city or alias -> airports, primary first
+        self.by_metro: Dict[str, List[str]] = {}    # metro code (NYC) -> airports
+        self.by_country: Dict[str, str] = {}        # country -> main hub
+
+        aliases: Dict[str, str] = {}
+        for row in rows:
+            code = row["iata"].strip().upper()
+            city = normalize_place(row["city"])
+            self.codes.add(code)
+            self.by_place.setdefault(city, []).append(code)
+
+            for alias in row.get("aliases", "").split("|"):
+                if alias:
+                    aliases[normalize_place(alias)] = city
+
+            metro = row.get("metro", "").strip().upper()
+            if metro:
+                self.by_metro.setdefault(metro, []).append(code)
+
+            self.by_country.setdefault(normalize_place(row["country"]), code)
+
+        # Aliases resolve to every airport of their city: "nyc" -> JFK,EWR,LGA
+        for alias, city in aliases.items():
+            self.by_place.setdefault(alias, self.by_place[city])
+
+        self._place_keys = sorted(self.by_place)
+
+    @classmethod
+    def from_csv(cls, path: Path = AIRPORTS_CSV) -> "AirportIndex":
+        with open(path, newline="", encoding="utf-8") as f:
+            return cls(list(csv.DictReader(f)))
+
+    def lookup(self, query: str) -> Optional[str]:
+        """
+        Resolve a city, alias, IATA or metro code to airport code(s).
+        Cities with several airports return them comma-separated ("JFK,EWR,LGA"),
+        which SerpAPI accepts as departure/arrival ids.
+        """
+        raw = query.strip()
+        if not raw:
+            return None
+
+        # "Paris, France" -> try the whole string, then the city part
+        candidates = [normalize_place(raw)]
+        if "," in raw:
+            candidates.append(normalize_place(raw.split(",")[0]))
+
+        for key in candidates:
+            airports = self.by_place.get(key)
+            if airports:
+                return ",".join(airports)
+
+        # Codes typed directly: "JFK", "NYC"
+        upper = raw.upper()
+        if upper in self.by_metro:
+            return ",".join(self.by_metro[upper])
+        if len(upper) == 3 and upper in self.codes:
+            return upper
+
+        for key in candidates:
+            if key in self.by_country:
+                return self.by_country[key]
+
+        # Unique prefix: "barcel" -> Barcelona
+        for key in candidates:
+            if len(key) >= 4:
+                matches = [place for place in self._place_keys if place.startswith(key)]
+                if len(set(",".join(self.by_place[m]) for m in matches)) == 1:
+                    return ",".join(self.by_place[matches[0]])
+
+        # Typos: "Barcelonna", "Amsterdm"
+        for key in candidates:
+            close = difflib.get_close_matches(key, self._place_keys, n=1, cutoff=0.85)
+            if close:
+                return ",".join(self.by_place[close[0]])
+
+        return None
+
+
+airport_index = AirportIndex.from_csv()
+
+
+# Valid LLM answers, so each unknown city costs at most one LLM call per process
+_llm_codes: Dict[str, str] = {}
+
+
+@lru_cache(maxsize=None)
+def _airport_code_chain():
+    """Airport code lookup chain, built on first use and reused"""
     prompt = ChatPromptTemplate.from_messages([
         ("system", "You are an aviation expert. Return ONLY the 3-letter IATA airport code for the main international airport of the given city. No explanation, just the code."),
         ("user", "City: {city}\nAirport code:")
     ])
-    
-    chain = prompt | llm | StrOutputParser()
-    
+    return prompt | get_llm("lookup") | StrOutputParser()
+
+
+def _remember_code(city_name: str, answer: str) -> Optional[str]:
+    code = answer.strip().upper()
+    # Validate it's 3 letters
+    if len(code) == 3 and code.isalpha():
+        _llm_codes[city_name] = code
+        return code
+    return None
+
+
+def get_airport_code_llm(city_name: str) -> Optional[str]:
+    """Use LLM to get the main airport code for a city; valid answers are memoized"""
+    if city_name in _llm_codes:
+        return _llm_codes[city_name]
+    return _remember_code(city_name, _airport_code_chain().invoke({"city": city_name}))
+
+
+async def aget_airport_code_llm(city_name: str) -> Optional[str]:
+    """Async variant of get_airport_code_llm"""
+    if city_name in _llm_codes:
+        return _llm_codes[city_name]
+    return _remember_code(city_name, await _airport_code_chain().ainvoke({"city": city_name}))
+
+
+def get_airport_code(city_name: str) -> str:
+    """Resolve a city to airport code(s): local index first, LLM only on a true miss"""
+    code = airport_index.lookup(city_name)
+    if code:
+        return code
+
+    print(f"🔍 '{city_name}' not in airport index, asking LLM...")
     try:
-        code = chain.invoke({"city": city_name}).strip().upper()
-        # Validate it's 3 letters
-        if len(code) == 3 and code.isalpha():
-            return code
-        return city_name.upper()[:3]
-    except:
-        return city_name.upper()[:3]
+        code = get_airport_code_llm(normalize_place(city_name))
+    except Exception as e:
+        raise ValueError(f"Could not resolve airport for '{city_name}': {e}")
+
+    if not code:
+        raise ValueError(f"Could not resolve airport for '{city_name}'")
+    return code
+
+
+async def aget_airport_code(city_name: str) -> str:
+    """Async variant of get_airport_code; the index lookup itself is in-memory"""
+    code = airport_index.lookup(city_name)
+    if code:
+        return code
+
+    print(f"🔍 '{city_name}' not in airport index, asking LLM...")
+    try:
+        code = await aget_airport_code_llm(normalize_place(city_name))
+    except Exception as e:
+        raise ValueError(f"Could not resolve airport for '{city_name}': {e}")
+
+    if not code:
+        raise ValueError(f"Could not resolve airport for '{city_name}'")
+    return code
@@ -1,39 +1,42 @@
 from typing import List, Dict, Any, cast
-from serpapi import GoogleSearch
+from tools.http_client import cached_serpapi_search, acached_serpapi_search
+from tools.disk_cache import get_cache
+from tools.singleflight import SingleFlight
+from tools.cache import normalize_key
+from metrics import track
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import StrOutputParser
-from langchain_google_genai import ChatGoogleGenerativeAI
+from llm_provider import cached_completion
 from langchain_core.runnables import RunnableLambda, RunnablePassthrough
 from models import Attraction
-from config import Config
 
-langsmith_api_key = Config.GEMINI_API_KEY
-
-llm = ChatGoogleGenerativeAI(
-    model = "gemini-2.5-flash",
-    temperature=0.7,
-    api_key = langsmith_api_key
-)
+# Identical searches already in flight are shared instead of re-sent
+attraction_searches = SingleFlight("attractions")
 
 class SerpAPIAttractionTool:
     """Attraction search using SerpAPI with Runnable and LLM"""
     
-    def __init__(self, api_key: str, llm=llm):
+    def __init__(self, api_key: str, llm=None, cache=None):
         self.api_key = api_key
-        self.llm = llm
+        self._llm = llm  # None uses the shared default client
+        self.cache = cache if cache is not None else get_cache("attractions")
+        self._runnable = None
+        self._extraction = None
     
-    def _search_attractions(self, destination: str) -> Dict:
-        """Search for attractions using SerpAPI"""
-        search_params = {
+    def _attraction_search_params(self, destination: str) -> Dict:
+        return {
             "engine": "google",
             "q": f"top tourist attractions in {destination}",
             "num": 10,
             "api_key": self.api_key
         }
-        
-        search = GoogleSearch(search_params)
-        results = search.get_dict()
-        return results
+    
+    def _search_attractions(self, destination: str) -> Dict:
+        """Search for attractions using SerpAPI"""
+        return cached_serpapi_search(self._attraction_search_params(destination), self.cache)
+    
+    async def _asearch_attractions(self, destination: str) -> Dict:
+        """Async variant of _search_attractions"""
+        return await acached_serpapi_search(self._attraction_search_params(destination), self.cache)
     
     def _parse_llm_response(self, response: str) -> List[Attraction]:
         """Parse LLM JSON response into Attraction objects"""
@@ -52,20 +55,31 @@ class SerpAPIAttractionTool:
         # Fallback: return empty list
         return []
     
-    def _extract_attractions_with_llm(self, search_results: Dict, destination: str) -> List[Attraction]:
-        """Use LLM to extract and structure attraction data"""
+    def _extraction_inputs(self, search_results: Dict, destination: str) -> Dict[str, str] | None:
+        """Prompt inputs for the extraction chain, or None when there is nothing to extract"""
         # Extract organic results
         organic_results = search_results.get("organic_results", [])
         
         if not organic_results:
-            return []
+            return None
         
         # Create text summary of results
         results_text = "\n".join([
             f"- {r.get('title', '')}: {r.get('snippet', '')}"
             for r in organic_results[:5]
         ])
-        
+        return {
+            "destination": destination,
+            "results": results_text
+        }
+    
+    def _extraction_chain(self):
+        """The LLM extraction chain, built on first use and reused"""
+        if self._extraction is None:
+            self._extraction = self._build_extraction_chain()
+        return self._extraction
+    
+    def _build_extraction_chain(self):
         # Runnable chain with LLM
         prompt = ChatPromptTemplate.from_messages([
             ("system", """You are a travel expert. Extract tourist attractions from search results.
@@ -76,30 +90,50 @@ Categories: Museum, Landmark, Nature, Entertainment, Shopping, Religious, Histor
 
         chain = (
             prompt 
-            | self.llm 
-            | StrOutputParser()
+            | cached_completion(llm=self._llm, validate=lambda text: "[" in text)
             | RunnableLambda(lambda x: self._parse_llm_response(cast(str, x)))
         )
-        
-        attractions = chain.invoke({
-            "destination": destination,
-            "results": results_text
-        })
-        
-        return attractions
+        return chain
+    
+    def _extract_attractions_with_llm(self, search_results: Dict, destination: str) -> List[Attraction]:
+        """Use LLM to extract and structure attraction data"""
+        inputs = self._extraction_inputs(search_results, destination)
+        if inputs is None:
+            return []
+        return self._extraction_chain().invoke(inputs)
+    
+    async def _aextract_attractions_with_llm(self, search_results: Dict, destination: str) -> List[Attraction]:
+        """Async variant of _extract_attractions_with_llm"""
+        inputs = self._extraction_inputs(search_results, destination)
+        if inputs is None:
+            return []
+        return await self._extraction_chain().ainvoke(inputs)
     
     def search_attractions_runnable(self):
+        """The attraction search Runnable, built on first use and reused by every search"""
+        if self._runnable is None:
+            self._runnable = self._build_attractions_runnable()
+        return self._runnable
+    
+    def _build_attractions_runnable(self):
         """Create Runnable for attraction search"""
         
         def search_lambda(x: Dict[str, Any]):
             return self._search_attractions(x['destination'])
+        async def asearch_lambda(x: Dict[str, Any]):
+            return await self._asearch_attractions(x['destination'])
         def parse_lambda(x: Dict[str, Any]):
             return self._extract_attractions_with_llm(
                 x['data'],
                 x['destination']
             )
-        search_runnable = RunnableLambda(search_lambda)
-        extract_runnable = RunnableLambda(parse_lambda)
+        async def aparse_lambda(x: Dict[str, Any]):
+            return await self._aextract_attractions_with_llm(
+                x['data'],
+                x['destination']
+            )
+        search_runnable = RunnableLambda(search_lambda, afunc=asearch_lambda)
+        extract_runnable = RunnableLambda(parse_lambda, afunc=aparse_lambda)
         
         chain = (
             RunnablePassthrough.assign(data=search_runnable)
@@ -109,11 +143,39 @@ Categories: Museum, Landmark, Nature, Entertainment, Shopping, Religious, Histor
         return chain
     
     def search_attractions(self, destination: str) -> List[Attraction]:
+        """Search for attractions, coalescing identical concurrent searches"""
+        return attraction_searches.do(
+            normalize_key(destination),
+            lambda: self._run_attraction_search(destination)
+        )
+    
+    def _run_attraction_search(self, destination: str) -> List[Attraction]:
         """Search for attractions using Runnable"""
         try:
             runnable = self.search_attractions_runnable()
-            result = runnable.invoke({"destination": destination})
+            with track("trip_tool_call", {"tool": "attractions"}) as status:
+                result = runnable.invoke({"destination": destination})
+                status["outcome"] = "ok" if result else "empty"
             return result
         except Exception as e:
             print(f"Attraction search error: {e}")
-            return []
\ No newline at end of file
+            return []
+    
+    async def asearch_attractions(self, destination: str) -> List[Attraction]:
+        """Async variant of search_attractions; shares in-flight searches with sync callers"""
+        return await attraction_searches.ado(
+            normalize_key(destination),
+            lambda: self._arun_attraction_search(destination)
+        )
+    
+    async def _arun_attraction_search(self, destination: str) -> List[Attraction]:
+        """Async variant of _run_attraction_search"""
+        try:
+            runnable = self.search_attractions_runnable()
+            with track("trip_tool_call", {"tool": "attractions"}) as status:
+                result = await runnable.ainvoke({"destination": destination})
+                status["outcome"] = "ok" if result else "empty"
+            return result
+        except Exception as e:
+            print(f"Attraction search error: {e}")
+            return []
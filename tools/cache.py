@@ -0,0 +1,77 @@
+from typing import Any, Dict, Optional
+from collections import OrderedDict
+import threading
+import time
+from metrics import record_cache_lookup
+
+
+def normalize_key(text: str) -> str:
+    '''Case- and whitespace-insensitive cache key, so "  Paris" and "paris" share an entry'''
+    return " ".join(str(text).split()).casefold()
+
+
+class TTLCache:
+    '''
+    Thread-safe in-memory cache with per-entry expiry and LRU eviction.
+
+    Any object exposing get/set/stats can be used in its place by the tools,
+    so a different backend can be plugged in without touching them.
+    '''
+
+    def __init__(self, ttl_seconds: float, max_entries: int = 512, name: str = "memory"):
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        '''Return the cached value, or None if missing or expired'''
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= time.monotonic():
+                del self._entries[key]
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+
+        record_cache_lookup(self.name, entry is not None)
+        return entry[1] if entry is not None else None
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        '''Store a value, evicting the least recently used entries when full'''
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        '''Hit/miss counters for monitoring'''
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
@@ -0,0 +1,154 @@
+from typing import Dict, List, Optional
+from datetime import datetime
+from pathlib import Path
+import csv
+import numpy as np
+from models import AlternativeDestination, TravelType, TripRequest
+from tools.airport_lookup import AIRPORTS_CSV, normalize_place
+
+DATA_DIR = Path(__file__).parent / "data"
+DESTINATIONS_CSV = DATA_DIR / "destinations.csv"
+FARE_BANDS_CSV = DATA_DIR / "fare_bands.csv"
+COUNTRY_REGIONS_CSV = DATA_DIR / "country_regions.csv"
+
+# Same limits as the live weather check, so suggestions are likely to pass it
+MIN_TEMP = 15.0
+MAX_TEMP = 30.0
+IDEAL_TEMP = 23.0
+MAX_WET_SHARE = 0.5
+DAYS_PER_MONTH = 30.4
+
+TRAVEL_TYPE_BITS = {travel_type.value: 1 << i for i, travel_type in enumerate(TravelType)}
+
+
+def _read_csv(path: Path) -> List[Dict[str, str]]:
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+class DestinationIndex:
+    """
+    Bundled destination features as arrays, one row per city: mean temperature
+    and rainy days per month, daily cost per traveler, travel-type tags as a
+    bitmask and the region used to look up typical fares. Filtering and
+    scoring every city for a trip is a handful of vector operations.
+    """
+
+    def __init__(self, rows: List[Dict[str, str]], fare_rows: List[Dict[str, str]],
+                 country_regions: Dict[str, str], place_countries: Dict[str, str]):
+        self.region_names = sorted({region for region in country_regions.values()})
+        region_ids = {name: i for i, name in enumerate(self.region_names)}
+        self.country_regions = {normalize_place(country): region_ids[region] for country, region in country_regions.items()}
+        self.place_countries = place_countries
+
+        self.cities = [row["city"] for row in rows]
+        self.countries = [row["country"] for row in rows]
+        self.by_place = {normalize_place(city): i for i, city in enumerate(self.cities)}
+
+        self.temps = np.array([row["temps"].split("|") for row in rows], dtype=np.float32)             # (cities, 12)
+        self.rain_days = np.array([row["rain_days"].split("|") for row in rows], dtype=np.float32)     # (cities, 12)
+        self.daily_cost = np.array([row["daily_cost"] for row in rows], dtype=np.float32)
+        self.regions = np.array([self.country_regions[normalize_place(row["country"])] for row in rows], dtype=np.int8)
+        self.tags = np.array([
+            sum(TRAVEL_TYPE_BITS[tag] for tag in row["tags"].split("|") if tag) for row in rows
+        ], dtype=np.uint8)
+
+        # Typical round-trip economy fare per region pair; bands are symmetric
+        self.fares = np.full((len(self.region_names), len(self.region_names), 2), np.nan, dtype=np.float32)
+        for row in fare_rows:
+            a, b = region_ids[row["from"]], region_ids[row["to"]]
+            self.fares[a, b] = self.fares[b, a] = (float(row["low"]), float(row["high"]))
+        self.median_fares = np.nanmedian(self.fares, axis=0)
+
+    @classmethod
+    def from_csv(cls, path: Path = DESTINATIONS_CSV) -> "DestinationIndex":
+        country_regions = {row["country"]: row["region"] for row in _read_csv(COUNTRY_REGIONS_CSV)}
+        # Origins are usually airport cities, so their countries come from the airport dataset
+        place_countries = {normalize_place(row["city"]): row["country"] for row in _read_csv(AIRPORTS_CSV)}
+        return cls(_read_csv(path), _read_csv(FARE_BANDS_CSV), country_regions, place_countries)
+
+    def region_of(self, place: str) -> Optional[int]:
+        """Region id of a city or country, or None if it is not in the bundled data"""
+        parts = [normalize_place(part) for part in place.split(",")]
+        for key in parts:
+            if key in self.by_place:
+                return int(self.regions[self.by_place[key]])
+            country = self.place_countries.get(key)
+            if country:
+                return self.country_regions.get(normalize_place(country))
+            if key in self.country_regions:
+                return self.country_regions[key]
+        return None
+
+    def climate(self, city: str, month: int) -> Optional[Dict[str, float]]:
+        """Typical temperature and rainy days for a bundled city in a month (1-12)"""
+        i = self.by_place.get(normalize_place(city.split(",")[0]))
+        if i is None:
+            return None
+        return {"temperature": float(self.temps[i, month - 1]), "rain_days": float(self.rain_days[i, month - 1])}
+
+    def typical_fares(self, origin: str) -> np.ndarray:
+        """(cities, 2) low/high fares from the origin's region; the median over regions when unknown"""
+        region = self.region_of(origin)
+        if region is None:
+            return self.median_fares[self.regions]
+        return self.fares[region, self.regions]
+
+    def suggest(self, trip_request: TripRequest, limit: int = 6,
+                exclude: Optional[List[str]] = None) -> List[AlternativeDestination]:
+        """
+        Destinations whose typical weather in the travel month passes the weather
+        check and whose typical fare and trip cost fit the budget, best first.
+        Scores favour mild, dry weather, budget headroom and the travel type.
+        """
+        month = _travel_month(trip_request)
+        days = trip_request.duration_days or 7
+        travelers = max(trip_request.num_travelers, 1)
+        budget = trip_request.budget
+
+        temps = self.temps[:, month - 1]
+        wet_share = self.rain_days[:, month - 1] / DAYS_PER_MONTH
+        fares = self.typical_fares(trip_request.origin)
+        fare = fares.mean(axis=1)
+        cost = (fare + self.daily_cost * days) * travelers
+
+        feasible = (
+            (temps >= MIN_TEMP) & (temps <= MAX_TEMP) & (wet_share < MAX_WET_SHARE)
+            & (fare <= budget * 0.6) & (cost <= budget)
+        )
+        for place in [trip_request.destination, trip_request.origin] + list(exclude or []):
+            i = self.by_place.get(normalize_place(place.split(",")[0]))
+            if i is not None:
+                feasible[i] = False
+
+        travel_type = trip_request.travel_type.value if trip_request.travel_type else ""
+        matches = (self.tags & TRAVEL_TYPE_BITS.get(travel_type, 0)) != 0
+        comfort = 1.0 - np.abs(temps - IDEAL_TEMP) / (MAX_TEMP - IDEAL_TEMP) - wet_share
+        headroom = 1.0 - cost / budget
+        score = np.where(feasible, comfort + headroom + 0.5 * matches, -np.inf)
+
+        best = np.argsort(-score, kind="stable")[:limit]
+        return [
+            AlternativeDestination(
+                name=self.cities[i],
+                country=self.countries[i],
+                score=round(float(score[i]), 3),
+                typical_temperature=float(temps[i]),
+                rain_days=float(self.rain_days[i, month - 1]),
+                fare_low=float(fares[i, 0]),
+                fare_high=float(fares[i, 1]),
+                estimated_cost=round(float(cost[i]), 2),
+                matches_travel_type=bool(matches[i])
+            )
+            for i in best if np.isfinite(score[i])
+        ]
+
+
+def _travel_month(trip_request: TripRequest) -> int:
+    try:
+        return datetime.strptime(trip_request.start_date or "", "%Y-%m-%d").month
+    except ValueError:
+        return datetime.now().month
+
+
+destination_index = DestinationIndex.from_csv()
@@ -0,0 +1,190 @@
+from typing import Any, Dict, Optional
+from pathlib import Path
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from config import Config
+from metrics import record_cache_lookup
+
+
+def make_key(*parts: Any) -> str:
+    '''Stable hash of JSON-serializable request parameters'''
+    payload = json.dumps(parts, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SQLiteCache:
+    '''
+    Disk-backed JSON cache shared by every process on the host.
+
+    Entries live in namespaces ("flights", "hotels", ...) with their own TTL and
+    size cap. The database runs in WAL mode so several Streamlit workers can read
+    while one writes, and each thread keeps its own connection.
+    '''
+
+    def __init__(self, path: str, ttls: Dict[str, float], max_entries: Dict[str, int],
+                 default_ttl: float = 3600, default_max_entries: int = 1000):
+        self.path = path
+        self.ttls = ttls
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.default_max_entries = default_max_entries
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self.hits: Dict[str, int] = {}
+        self.misses: Dict[str, int] = {}
+
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._init_schema()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+        return conn
+
+    def _init_schema(self) -> None:
+        conn = self._connect()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS cache (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                PRIMARY KEY (namespace, key)
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_lru ON cache (namespace, last_access)")
+
+    def _count(self, counter: Dict[str, int], namespace: str) -> None:
+        with self._stats_lock:
+            counter[namespace] = counter.get(namespace, 0) + 1
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        '''Return the cached value, or None if missing or expired'''
+        conn = self._connect()
+        now = time.time()
+        row = conn.execute(
+            "SELECT value, expires_at FROM cache WHERE namespace = ? AND key = ?",
+            (namespace, key)
+        ).fetchone()
+
+        if row is None or row[1] <= now:
+            if row is not None:
+                conn.execute("DELETE FROM cache WHERE namespace = ? AND key = ?", (namespace, key))
+            self._count(self.misses, namespace)
+            return None
+
+        conn.execute(
+            "UPDATE cache SET last_access = ? WHERE namespace = ? AND key = ?",
+            (now, namespace, key)
+        )
+        self._count(self.hits, namespace)
+        return json.loads(row[0])
+
+    def set(self, namespace: str, key: str, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        '''Store a JSON-serializable value and trim the namespace to its size cap'''
+        ttl = ttl_seconds if ttl_seconds is not None else self.ttls.get(namespace, self.default_ttl)
+        cap = self.max_entries.get(namespace, self.default_max_entries)
+        now = time.time()
+        payload = json.dumps(value, default=str)
+
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (namespace, key, value, expires_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                (namespace, key, payload, now + ttl, now)
+            )
+            conn.execute("DELETE FROM cache WHERE namespace = ? AND expires_at <= ?", (namespace, now))
+            conn.execute("""
+                DELETE FROM cache WHERE namespace = ? AND key IN (
+                    SELECT key FROM cache WHERE namespace = ?
+                    ORDER BY last_access DESC LIMIT -1 OFFSET ?
+                )
+            """, (namespace, namespace, cap))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def clear(self, namespace: Optional[str] = None) -> None:
+        conn = self._connect()
+        if namespace is None:
+            conn.execute("DELETE FROM cache")
+        else:
+            conn.execute("DELETE FROM cache WHERE namespace = ?", (namespace,))
+
+    def stats(self) -> Dict[str, Any]:
+        '''Entry counts per namespace plus this process's hit/miss counters'''
+        rows = self._connect().execute(
+            "SELECT namespace, COUNT(*) FROM cache GROUP BY namespace"
+        ).fetchall()
+        with self._stats_lock:
+            return {
+                "path": self.path,
+                "entries": dict(rows),
+                "hits": dict(self.hits),
+                "misses": dict(self.misses)
+            }
+
+
+class CacheNamespace:
+    '''One namespace of a SQLiteCache, usable anywhere a get/set cache is expected'''
+
+    def __init__(self, namespace: str, cache: Optional[SQLiteCache] = None):
+        self.namespace = namespace
+        self._cache = cache
+
+    @property
+    def cache(self) -> SQLiteCache:
+        # The shared database is only opened on first lookup
+        return self._cache or get_result_cache()
+
+    def get(self, key: str) -> Optional[Any]:
+        try:
+            value = self.cache.get(self.namespace, key)
+        except (sqlite3.Error, OSError) as e:
+            print(f"⚠️ Cache read failed ({self.namespace}): {e}")
+            value = None
+        record_cache_lookup(self.namespace, value is not None)
+        return value
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        try:
+            self.cache.set(self.namespace, key, value, ttl_seconds)
+        except (sqlite3.Error, OSError) as e:
+            print(f"⚠️ Cache write failed ({self.namespace}): {e}")
+
+
+_result_cache: Optional[SQLiteCache] = None
+_result_cache_lock = threading.Lock()
+
+
+def get_result_cache() -> SQLiteCache:
+    '''Process-wide handle on the shared cache database, opened on first use'''
+    global _result_cache
+    if _result_cache is None:
+        with _result_cache_lock:
+            if _result_cache is None:
+                _result_cache = SQLiteCache(
+                    Config.CACHE_DB_PATH,
+                    ttls=Config.CACHE_TTLS,
+                    max_entries=Config.CACHE_MAX_ENTRIES
+                )
+    return _result_cache
+
+
+def get_cache(namespace: str) -> Optional[CacheNamespace]:
+    '''Namespace handle on the shared result cache, or None when caching is disabled'''
+    if not Config.RESULT_CACHE_ENABLED:
+        return None
+    return CacheNamespace(namespace)
@@ -0,0 +1,206 @@
+from typing import Any, Dict, Iterator, List, Optional
+from pathlib import Path
+from urllib.parse import urlsplit
+from uuid import UUID
+import json
+import os
+import threading
+import time
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, get_buffer_string
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult, LLMResult
+from pydantic import Field
+from config import Config
+from tools.disk_cache import make_key
+
+# Credentials never become part of a fixture key or file
+SECRET_PARAMS = {"api_key", "appid", "key"}
+
+
+def endpoint_of(url_or_path: str) -> str:
+    '''Last path segment: ".../search" -> "search", ".../data/2.5/weather" -> "weather"'''
+    path = urlsplit(url_or_path).path.rstrip("/")
+    return path.rsplit("/", 1)[-1] or "root"
+
+
+def request_params(params: Dict[str, Any]) -> Dict[str, str]:
+    '''
+    Query parameters as they travel on the wire: secrets and empty values dropped,
+    everything else a string. The same request recorded from a dict and replayed
+    from a query string gets the same key.
+    '''
+    return {
+        str(k): str(v) for k, v in params.items()
+        if k not in SECRET_PARAMS and v is not None and v != ""
+    }
+
+
+class FixtureStore:
+    '''
+    Recorded API responses on disk, one JSON file per request:
+    <root>/http/<endpoint>/<key>.json and <root>/llm/<key>.json.
+    Files are small and human readable so fixtures can be reviewed and committed.
+    '''
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    def _write(self, path: Path, payload: Dict[str, Any]) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_text(json.dumps(payload, indent=2, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, path)
+
+    def _read(self, path: Path) -> Optional[Dict[str, Any]]:
+        try:
+            return json.loads(path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def http_path(self, endpoint: str, params: Dict[str, Any]) -> Path:
+        return self.root / "http" / endpoint / f"{make_key(endpoint, request_params(params))}.json"
+
+    def save_http(self, url: str, params: Dict[str, Any], status: int, body: Any) -> None:
+        endpoint = endpoint_of(url)
+        self._write(self.http_path(endpoint, params), {
+            "endpoint": endpoint,
+            "params": request_params(params),
+            "status": status,
+            "body": body,
+            "recorded_at": time.time()
+        })
+
+    def load_http(self, endpoint: str, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        return self._read(self.http_path(endpoint, params))
+
+    def llm_path(self, model: str, prompt: str) -> Path:
+        return self.root / "llm" / f"{make_key(model, prompt)}.json"
+
+    def save_llm(self, model: str, prompt: str, response: str) -> None:
+        self._write(self.llm_path(model, prompt), {
+            "model": model,
+            "prompt": prompt,
+            "response": response,
+            "recorded_at": time.time()
+        })
+
+    def load_llm(self, model: str, prompt: str) -> Optional[str]:
+        fixture = self._read(self.llm_path(model, prompt))
+        return fixture["response"] if fixture else None
+
+    def stats(self) -> Dict[str, int]:
+        http = sum(1 for _ in (self.root / "http").glob("*/*.json")) if (self.root / "http").exists() else 0
+        llm = sum(1 for _ in (self.root / "llm").glob("*.json")) if (self.root / "llm").exists() else 0
+        return {"http": http, "llm": llm}
+
+
+fixture_store = FixtureStore(Config.FIXTURE_DIR)
+
+
+def set_fixture_store(store: Any) -> None:
+    '''
+    Serve replays from another store, e.g. synthetic data for benchmarks.
+    Anything with load_http(endpoint, params) and load_llm(model, prompt) works.
+    '''
+    global fixture_store
+    fixture_store = store
+
+
+def record_http_response(url: str, params: Dict[str, Any], response: Any) -> None:
+    '''Save a successful JSON response (requests or httpx) when API_MODE is "record"'''
+    if Config.API_MODE != "record" or response.status_code != 200:
+        return
+    try:
+        body = response.json()
+    except ValueError:
+        return
+    if isinstance(body, dict) and "error" in body:
+        # SerpAPI reports failures with status 200 and an "error" key
+        return
+    fixture_store.save_http(url, params, response.status_code, body)
+
+
+def prompt_text(messages: List[BaseMessage]) -> str:
+    return get_buffer_string(messages)
+
+
+class FixtureRecorder(BaseCallbackHandler):
+    '''Callback that saves every chat completion of a live model as a fixture'''
+
+    def __init__(self, model: str, store: FixtureStore = fixture_store):
+        self.model = model
+        self.store = store
+        self._lock = threading.Lock()
+        self._prompts: Dict[UUID, str] = {}
+
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages: List[List[BaseMessage]], *, run_id: UUID, **kwargs: Any) -> None:
+        with self._lock:
+            self._prompts[run_id] = prompt_text(messages[0])
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        with self._lock:
+            prompt = self._prompts.pop(run_id, None)
+        if prompt is not None and response.generations and response.generations[0]:
+            self.store.save_llm(self.model, prompt, response.generations[0][0].text)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        with self._lock:
+            self._prompts.pop(run_id, None)
+
+
+class ReplayChatModel(BaseChatModel):
+    '''
+    Chat model that answers from recorded fixtures instead of calling Gemini.
+    Each call takes `latency` seconds plus `latency_per_kchar` per 1000 output
+    characters (spread over the chunks when streaming), so timing-sensitive
+    code sees waits that grow with the response like a real model's.
+    '''
+
+    model: str
+    latency: float = 0.0
+    latency_per_kchar: float = 0.0
+    chunk_size: int = Field(default=40, description="characters per streamed chunk")
+    store: Any = Field(default=None, exclude=True, description="defaults to the current fixture store")
+
+    @property
+    def _llm_type(self) -> str:
+        return "replay"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"model": self.model}
+
+    def _response(self, messages: List[BaseMessage]) -> str:
+        prompt = prompt_text(messages)
+        response = (self.store or fixture_store).load_llm(self.model, prompt)
+        if response is None:
+            raise LookupError(
+                f"No recorded {self.model} response for this prompt "
+                f"(run once with API_MODE=record to capture it): {prompt[:120]!r}"
+            )
+        return response
+
+    def _delay(self, response: str) -> float:
+        return self.latency + self.latency_per_kchar * len(response) / 1000
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        response = self._response(messages)
+        delay = self._delay(response)
+        if delay:
+            time.sleep(delay)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=response))])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager: Any = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        response = self._response(messages)
+        pieces = [response[i:i + self.chunk_size] for i in range(0, len(response), self.chunk_size)] or [""]
+        pause = self._delay(response) / len(pieces)
+        for piece in pieces:
+            if pause:
+                time.sleep(pause)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=piece))
+            if run_manager:
+                run_manager.on_llm_new_token(piece, chunk=chunk)
+            yield chunk
@@ -1,16 +1,58 @@
-from typing import List, Dict, Any
-from serpapi import GoogleSearch
+from typing import List, Dict, Any, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date as Date, datetime, timedelta
+import asyncio
+from config import Config
+from tools.http_client import cached_serpapi_search, acached_serpapi_search
+from tools.disk_cache import get_cache
+from tools.singleflight import SingleFlight
+from tools.cache import normalize_key
+from metrics import track
 from langchain_core.runnables import RunnableLambda, RunnablePassthrough
 from models import FlightOption
 
+# Identical searches already in flight are shared instead of re-sent
+flight_searches = SingleFlight("flights")
+
+
+def flexible_dates(date: str, return_date: str | None, window: int) -> List[Tuple[str, str | None]]:
+    """
+    (outbound, return) pairs from `window` days before `date` to `window` days
+    after, keeping the trip length. Past outbound dates are left out.
+    """
+    outbound = datetime.strptime(date, "%Y-%m-%d").date()
+    inbound = datetime.strptime(return_date, "%Y-%m-%d").date() if return_date else None
+    today = Date.today()
+    pairs = []
+    for offset in range(-window, window + 1):
+        shifted = outbound + timedelta(days=offset)
+        if offset and shifted < today:
+            continue
+        pairs.append((
+            shifted.isoformat(),
+            (inbound + timedelta(days=offset)).isoformat() if inbound else return_date
+        ))
+    return pairs
+
+
+def price_calendar(by_date: Dict[str, List[FlightOption]]) -> Dict[str, Optional[float]]:
+    """Departure date -> cheapest fare, None where nothing was found"""
+    return {
+        day: min(f.price for f in flights) if flights else None
+        for day, flights in sorted(by_date.items())
+    }
+
+
 class SerpAPIFlightTool:
     """Flight search using SerpAPI with Runnable"""
     
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, cache=None):
         self.api_key = api_key
+        self.cache = cache if cache is not None else get_cache("flights")
+        self._runnable = None
     
-    def _search_flights(self, params: Dict) -> Dict:
-        """Internal method to search flights via SerpAPI"""
+    def _flight_search_params(self, params: Dict) -> Dict:
+        """SerpAPI query for a flight search"""
         print(f"🔍 DEBUG: Searching flights from {params.get('origin')} to {params.get('destination')}")
         
         search_params = {
@@ -26,10 +68,21 @@ class SerpAPIFlightTool:
         
         if params.get('return_date'):
             search_params["return_date"] = params["return_date"]
-        
-        search = GoogleSearch(search_params)
-        results = search.get_dict()
-        
+        return search_params
+    
+    def _search_flights(self, params: Dict) -> Dict:
+        """Internal method to search flights via SerpAPI"""
+        results = cached_serpapi_search(self._flight_search_params(params), self.cache)
+        self._log_response(results)
+        return results
+    
+    async def _asearch_flights(self, params: Dict) -> Dict:
+        """Async variant of _search_flights"""
+        results = await acached_serpapi_search(self._flight_search_params(params), self.cache)
+        self._log_response(results)
+        return results
+    
+    def _log_response(self, results: Dict) -> None:
         # ✅ DEBUG: Check what we got back
         print(f"🔍 DEBUG: SerpAPI response keys: {results.keys() if results else 'None'}")
         if results:
@@ -37,8 +90,6 @@ class SerpAPIFlightTool:
             print(f"🔍 DEBUG: Has 'other_flights': {'other_flights' in results}")
             if 'best_flights' in results:
                 print(f"🔍 DEBUG: Number of best_flights: {len(results.get('best_flights', []))}")
-        
-        return results
     
     def _parse_flights(self, data: Dict, budget: float) -> List[FlightOption]:
         """Parse SerpAPI flight results"""
@@ -111,12 +162,21 @@ class SerpAPIFlightTool:
         return sorted(flights, key=lambda x: x.price)
     
     def search_flights_runnable(self):
+        """The flight search Runnable, built on first use and reused by every search"""
+        if self._runnable is None:
+            self._runnable = self._build_flights_runnable()
+        return self._runnable
+    
+    def _build_flights_runnable(self):
         """Create a Runnable for flight search"""
         def search_lambda(x: Dict[str, Any]):
             result = self._search_flights(x)
             print(f"🔍 DEBUG: search_lambda returning type: {type(result)}")
             return result
         
+        async def asearch_lambda(x: Dict[str, Any]):
+            return await self._asearch_flights(x)
+        
         def parse_lambda(x: Dict[str, Any]):
             print(f"🔍 DEBUG: parse_lambda received: {type(x)}, keys: {x.keys() if isinstance(x, dict) else 'Not dict'}")
             
@@ -132,7 +192,7 @@ class SerpAPIFlightTool:
             
             return self._parse_flights(data, budget)
         
-        search_runnable = RunnableLambda(search_lambda)
+        search_runnable = RunnableLambda(search_lambda, afunc=asearch_lambda)
         parse_runnable = RunnableLambda(parse_lambda)
         
         # Chain: search -> parse
@@ -149,34 +209,137 @@ class SerpAPIFlightTool:
                        date: str, 
                        budget: float, 
                        return_date: str | None = None) -> List[FlightOption]:
-        """Search for flights using Runnable"""
+        """Search for flights, coalescing identical concurrent searches"""
+        key = normalize_key(f"{origin}|{destination}|{date}|{return_date}|{budget:.2f}")
+        return flight_searches.do(
+            key,
+            lambda: self._run_flight_search(origin, destination, date, budget, return_date)
+        )
+    
+    async def asearch_flights(self,
+                              origin: str,
+                              destination: str,
+                              date: str,
+                              budget: float,
+                              return_date: str | None = None) -> List[FlightOption]:
+        """Async variant of search_flights; shares in-flight searches with sync callers"""
+        key = normalize_key(f"{origin}|{destination}|{date}|{return_date}|{budget:.2f}")
+        return await flight_searches.ado(
+            key,
+            lambda: self._arun_flight_search(origin, destination, date, budget, return_date)
+        )
+    
+    def search_flexible_dates(self,
+                              origin: str,
+                              destination: str,
+                              date: str,
+                              return_date: str | None = None,
+                              window: int = 1) -> Dict[str, List[FlightOption]]:
+        """
+        Flights for every departure within ±window days of `date`, searched
+        concurrently (FLEXIBLE_SEARCH_CONCURRENCY at a time). Fares are not
+        cut at the flight budget so the calendar shows real prices.
+        """
+        dates = flexible_dates(date, return_date, window)
+        print(f"📅 Flexible dates: searching {len(dates)} departures around {date}")
+        workers = max(1, min(Config.FLEXIBLE_SEARCH_CONCURRENCY, len(dates)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="flexible-dates") as executor:
+            futures = {
+                outbound: executor.submit(self.search_flights, origin, destination, outbound, float("inf"), inbound)
+                for outbound, inbound in dates
+            }
+            return {outbound: future.result() for outbound, future in futures.items()}
+    
+    async def asearch_flexible_dates(self,
+                                     origin: str,
+                                     destination: str,
+                                     date: str,
+                                     return_date: str | None = None,
+                                     window: int = 1) -> Dict[str, List[FlightOption]]:
+        """Async variant of search_flexible_dates"""
+        dates = flexible_dates(date, return_date, window)
+        print(f"📅 Flexible dates: searching {len(dates)} departures around {date}")
+        slots = asyncio.Semaphore(max(1, Config.FLEXIBLE_SEARCH_CONCURRENCY))
+        
+        async def search(outbound: str, inbound: str | None) -> List[FlightOption]:
+            async with slots:
+                return await self.asearch_flights(origin, destination, outbound, float("inf"), inbound)
+        
+        results = await asyncio.gather(*(search(outbound, inbound) for outbound, inbound in dates))
+        return {outbound: flights for (outbound, _), flights in zip(dates, results)}
+    
+    def _flight_params(self,
+                       origin: str,
+                       destination: str,
+                       date: str,
+                       budget: float,
+                       return_date: str | None = None) -> Dict[str, Any]:
         print(f"\n{'='*60}")
         print(f"✈️ FLIGHT SEARCH: {origin} → {destination}")
         print(f"{'='*60}")
         
-        try:
-            runnable = self.search_flights_runnable()
-            max_flight_budget = budget * 0.6
-            
+        max_flight_budget = budget * 0.6
+        
+        if budget == float("inf"):
+            print("💰 No price cap (flexible dates)")
+        else:
             print(f"💰 Total budget: ${budget:,.2f}")
             print(f"💰 Flight budget (60%): ${max_flight_budget:,.2f}")
-            
-            params = {
-                "origin": origin,
-                "destination": destination,
-                "date": date,
-                "currency": "USD",
-                "budget": max_flight_budget
-            }
+        
+        params = {
+            "origin": origin,
+            "destination": destination,
+            "date": date,
+            "currency": "USD",
+            "budget": max_flight_budget
+        }
 
-            if return_date is not None:
-                params["return_date"] = return_date
-                params["type"] = "2"  # round trip
-            else:
-                params["type"] = "1"  # one-way
+        if return_date is not None:
+            params["return_date"] = return_date
+            params["type"] = "2"  # round trip
+        else:
+            params["type"] = "1"  # one-way
 
-            print(f"🔍 DEBUG: Invoking runnable with params: {params.keys()}")
-            result = runnable.invoke(params)
+        print(f"🔍 DEBUG: Invoking runnable with params: {params.keys()}")
+        return params
+    
+    def _run_flight_search(self,
+                           origin: str,
+                           destination: str,
+                           date: str,
+                           budget: float,
+                           return_date: str | None = None) -> List[FlightOption]:
+        """Search for flights using Runnable"""
+        try:
+            runnable = self.search_flights_runnable()
+            params = self._flight_params(origin, destination, date, budget, return_date)
+            with track("trip_tool_call", {"tool": "flights"}) as status:
+                result = runnable.invoke(params)
+                status["outcome"] = "ok" if result else "empty"
+            
+            print(f"✅ DEBUG: Runnable returned {len(result) if result else 0} flights")
+            print(f"{'='*60}\n")
+            
+            return result
+        except Exception as e:
+            print(f"❌ Flight search error: {e}")
+            import traceback
+            traceback.print_exc()
+            return []
+    
+    async def _arun_flight_search(self,
+                                  origin: str,
+                                  destination: str,
+                                  date: str,
+                                  budget: float,
+                                  return_date: str | None = None) -> List[FlightOption]:
+        """Async variant of _run_flight_search"""
+        try:
+            runnable = self.search_flights_runnable()
+            params = self._flight_params(origin, destination, date, budget, return_date)
+            with track("trip_tool_call", {"tool": "flights"}) as status:
+                result = await runnable.ainvoke(params)
+                status["outcome"] = "ok" if result else "empty"
             
             print(f"✅ DEBUG: Runnable returned {len(result) if result else 0} flights")
             print(f"{'='*60}\n")
@@ -1,17 +1,26 @@
 from typing import Dict, Any, List
 from models import HotelOption
 from langchain_core.runnables import RunnableLambda, RunnablePassthrough
-from serpapi import GoogleSearch
+from tools.http_client import cached_serpapi_search, acached_serpapi_search
+from tools.disk_cache import get_cache
+from tools.singleflight import SingleFlight
+from tools.cache import normalize_key
+from metrics import track
+
+# Identical searches already in flight are shared instead of re-sent
+hotel_searches = SingleFlight("hotels")
 
 class SerpAPIHotelTool:
     '''Hotel search using SerpAPI with Runnables'''
     
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, cache=None):
         self.api_key = api_key
+        self.cache = cache if cache is not None else get_cache("hotels")
+        self._runnable = None
     
-    def _search_hotels(self, params: Dict) -> Dict:
+    def _hotel_search_params(self, params: Dict) -> Dict:
         print("📡 Calling SerpAPI with params:", params)
-        search_params = {
+        return {
             "engine": "google_hotels",
             "q": f"hotels in {params['destination']}",
             "check_in_date": params.get('check_in'),
@@ -22,15 +31,21 @@ class SerpAPIHotelTool:
             "hl": "en",
             "api_key": self.api_key
         }
-        
-        search = GoogleSearch(search_params)
-        results = search.get_dict()
-        
-        print("📥 Raw SerpAPI response keys:", results.keys())
-        print("📥 Full SerpAPI response preview:", results if len(str(results)) < 500 else str(results)[:500] + "...")
     
+    def _search_hotels(self, params: Dict) -> Dict:
+        results = cached_serpapi_search(self._hotel_search_params(params), self.cache)
+        self._log_response(results)
+        return results
+    
+    async def _asearch_hotels(self, params: Dict) -> Dict:
+        results = await acached_serpapi_search(self._hotel_search_params(params), self.cache)
+        self._log_response(results)
         return results
     
+    def _log_response(self, results: Dict) -> None:
+        print("📥 Raw SerpAPI response keys:", results.keys())
+        print("📥 Full SerpAPI response preview:", results if len(str(results)) < 500 else str(results)[:500] + "...")
+    
     def _parse_hotels(self, data: Dict, budget: float) -> List[HotelOption]:
         hotels = []
         
@@ -69,14 +84,22 @@ class SerpAPIHotelTool:
         return sorted(hotels, key=lambda x: x.price_per_night)
     
     def search_hotels_runnable(self):
+        """The hotel search Runnable, built on first use and reused by every search"""
+        if self._runnable is None:
+            self._runnable = self._build_hotels_runnable()
+        return self._runnable
+    
+    def _build_hotels_runnable(self):
         def search_lambda(x: Dict[str, Any]):
             return self._search_hotels(x)
+        async def asearch_lambda(x: Dict[str, Any]):
+            return await self._asearch_hotels(x)
         def parse_lambda(x: Dict[str, Any]):
             return self._parse_hotels(
                 x['data'],
                 x['budget']
             )
-        search_runnable = RunnableLambda(search_lambda)
+        search_runnable = RunnableLambda(search_lambda, afunc=asearch_lambda)
         parse_runnable = RunnableLambda(parse_lambda)
         
         chain = (
@@ -85,21 +108,56 @@ class SerpAPIHotelTool:
         return chain
     
     def search_hotels(self, destination: str, check_in: str, check_out: str, budget: float, adults: int = 1) -> List[HotelOption]:
+        """Search for hotels, coalescing identical concurrent searches"""
+        key = normalize_key(f"{destination}|{check_in}|{check_out}|{budget:.2f}|{adults}")
+        return hotel_searches.do(
+            key,
+            lambda: self._run_hotel_search(destination, check_in, check_out, budget, adults)
+        )
+    
+    async def asearch_hotels(self, destination: str, check_in: str, check_out: str, budget: float, adults: int = 1) -> List[HotelOption]:
+        """Async variant of search_hotels; shares in-flight searches with sync callers"""
+        key = normalize_key(f"{destination}|{check_in}|{check_out}|{budget:.2f}|{adults}")
+        return await hotel_searches.ado(
+            key,
+            lambda: self._arun_hotel_search(destination, check_in, check_out, budget, adults)
+        )
+    
+    def _hotel_params(self, destination: str, check_in: str, check_out: str, budget: float, adults: int) -> Dict[str, Any]:
+        budget_per_night = budget * 0.3 / 7  # Assume 30% budget, 7 nights
+        return {
+            "destination": destination,
+            "check_in": check_in,
+            "check_out": check_out,
+            "adults": adults,
+            "currency": "USD",
+            "budget": budget_per_night
+        }
+    
+    def _run_hotel_search(self, destination: str, check_in: str, check_out: str, budget: float, adults: int = 1) -> List[HotelOption]:
         """Search for hotels using Runnable"""
         try:
             runnable = self.search_hotels_runnable()
-            budget_per_night = budget * 0.3 / 7  # Assume 30% budget, 7 nights
             
-            result = runnable.invoke({
-                "destination": destination,
-                "check_in": check_in,
-                "check_out": check_out,
-                "adults": adults,
-                "currency": "USD",
-                "budget": budget_per_night
-            })
+            with track("trip_tool_call", {"tool": "hotels"}) as status:
+                result = runnable.invoke(self._hotel_params(destination, check_in, check_out, budget, adults))
+                status["outcome"] = "ok" if result else "empty"
+            
+            return result
+        except Exception as e:
+            print(f"Hotel search error: {e}")
+            return []
+    
+    async def _arun_hotel_search(self, destination: str, check_in: str, check_out: str, budget: float, adults: int = 1) -> List[HotelOption]:
+        """Async variant of _run_hotel_search"""
+        try:
+            runnable = self.search_hotels_runnable()
+            
+            with track("trip_tool_call", {"tool": "hotels"}) as status:
+                result = await runnable.ainvoke(self._hotel_params(destination, check_in, check_out, budget, adults))
+                status["outcome"] = "ok" if result else "empty"
             
             return result
         except Exception as e:
             print(f"Hotel search error: {e}")
-            return []
\ No newline at end of file
+            return []
@@ -0,0 +1,215 @@
+from typing import Dict, Any, Optional
+from urllib.parse import urlsplit
+import asyncio
+import random
+import threading
+import weakref
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from config import Config
+from metrics import track
+from tools.disk_cache import make_key
+from tools.fixtures import record_http_response
+
+SERPAPI_URL = Config.SERPAPI_BASE_URL
+
+# Transient upstream failures worth retrying
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def _build_session() -> requests.Session:
+    '''Session with keep-alive pools per host, bounded connections and jittered retries'''
+    retry = Retry(
+        total=Config.HTTP_MAX_RETRIES,
+        connect=Config.HTTP_MAX_RETRIES,
+        read=Config.HTTP_MAX_RETRIES,
+        status=Config.HTTP_MAX_RETRIES,
+        backoff_factor=Config.HTTP_BACKOFF_FACTOR,
+        backoff_jitter=Config.HTTP_BACKOFF_JITTER,
+        status_forcelist=RETRY_STATUS_CODES,
+        allowed_methods=frozenset(["GET"]),
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(
+        pool_connections=Config.HTTP_POOL_HOSTS,
+        pool_maxsize=Config.HTTP_MAX_CONNECTIONS_PER_HOST,
+        pool_block=True,
+        max_retries=retry
+    )
+
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_session() -> requests.Session:
+    '''Process-wide HTTP session shared by all tools'''
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+
+def _ensure_standin() -> None:
+    '''In replay mode the stand-in server is started on first use'''
+    if Config.API_MODE == "replay" and Config.STANDIN_AUTOSTART:
+        from tools.standin_server import start_standin_server
+        start_standin_server()
+
+
+def http_get(url: str, params: Dict[str, Any]) -> requests.Response:
+    '''GET through the shared session with connect/read timeouts, timed per host'''
+    _ensure_standin()
+    with track("trip_http_request", {"host": urlsplit(url).hostname or ""}) as status:
+        response = get_session().get(
+            url,
+            params=params,
+            timeout=(Config.HTTP_CONNECT_TIMEOUT, Config.HTTP_READ_TIMEOUT)
+        )
+        status["outcome"] = f"{response.status_code // 100}xx"
+    record_http_response(url, params, response)
+    return response
+
+
+def http_get_json(url: str, params: Dict[str, Any]) -> Dict:
+    '''GET a JSON document, raising for HTTP errors'''
+    response = http_get(url, params)
+    response.raise_for_status()
+    return response.json()
+
+
+def serpapi_search(params: Dict[str, Any]) -> Dict:
+    '''
+    Run a SerpAPI search over the pooled session.
+    Like GoogleSearch.get_dict, API errors come back as an "error" key in the dict.
+    '''
+    query = dict(params)
+    query["output"] = "json"
+    query["source"] = "python"
+
+    response = http_get(SERPAPI_URL, query)
+    try:
+        return response.json()
+    except ValueError:
+        response.raise_for_status()
+        raise
+
+
+def cached_serpapi_search(params: Dict[str, Any], cache=None) -> Dict:
+    '''SerpAPI search served from `cache` when fresh; error responses are never stored'''
+    key = make_key({k: v for k, v in params.items() if k != "api_key"})
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            print(f"⚡ {params.get('engine', 'SerpAPI')} results served from cache")
+            return cached
+
+    results = serpapi_search(params)
+    if cache is not None and results and "error" not in results:
+        cache.set(key, results)
+    return results
+
+
+# Async transport: httpx pools are bound to an event loop, so each loop gets its own client
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+
+
+def get_async_client() -> httpx.AsyncClient:
+    '''Shared async HTTP client for the running event loop'''
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = httpx.AsyncClient(
+            timeout=httpx.Timeout(Config.HTTP_READ_TIMEOUT, connect=Config.HTTP_CONNECT_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=Config.HTTP_POOL_HOSTS * Config.HTTP_MAX_CONNECTIONS_PER_HOST,
+                max_keepalive_connections=Config.HTTP_POOL_HOSTS * Config.HTTP_MAX_CONNECTIONS_PER_HOST
+            )
+        )
+        _async_clients[loop] = client
+    return client
+
+
+async def aclose_async_client() -> None:
+    '''Close the running loop's client, e.g. before the loop shuts down'''
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+def _retry_delay(attempt: int, response: Optional[httpx.Response] = None) -> float:
+    '''Same policy as the sync session: Retry-After if given, else jittered exponential backoff'''
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+    if retry_after and retry_after.isdigit():
+        return float(retry_after)
+    return Config.HTTP_BACKOFF_FACTOR * (2 ** attempt) + random.uniform(0, Config.HTTP_BACKOFF_JITTER)
+
+
+async def ahttp_get(url: str, params: Dict[str, Any]) -> httpx.Response:
+    '''Async GET with connect/read timeouts and retries on transient failures'''
+    _ensure_standin()
+    # requests leaves out None values; do the same so both transports send one query
+    params = {k: v for k, v in params.items() if v is not None}
+    client = get_async_client()
+    with track("trip_http_request", {"host": urlsplit(url).hostname or ""}) as status:
+        attempt = 0
+        while True:
+            try:
+                response = await client.get(url, params=params)
+            except httpx.TransportError:
+                if attempt >= Config.HTTP_MAX_RETRIES:
+                    raise
+                delay = _retry_delay(attempt)
+            else:
+                if response.status_code not in RETRY_STATUS_CODES or attempt >= Config.HTTP_MAX_RETRIES:
+                    status["outcome"] = f"{response.status_code // 100}xx"
+                    record_http_response(url, params, response)
+                    return response
+                delay = _retry_delay(attempt, response)
+            attempt += 1
+            await asyncio.sleep(delay)
+
+
+async def ahttp_get_json(url: str, params: Dict[str, Any]) -> Dict:
+    '''Async GET of a JSON document, raising for HTTP errors'''
+    response = await ahttp_get(url, params)
+    response.raise_for_status()
+    return response.json()
+
+
+async def aserpapi_search(params: Dict[str, Any]) -> Dict:
+    '''Async SerpAPI search; API errors come back as an "error" key like serpapi_search'''
+    query = dict(params)
+    query["output"] = "json"
+    query["source"] = "python"
+
+    response = await ahttp_get(SERPAPI_URL, query)
+    try:
+        return response.json()
+    except ValueError:
+        response.raise_for_status()
+        raise
+
+
+async def acached_serpapi_search(params: Dict[str, Any], cache=None) -> Dict:
+    '''Async counterpart of cached_serpapi_search (cache lookups are local and fast)'''
+    key = make_key({k: v for k, v in params.items() if k != "api_key"})
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            print(f"⚡ {params.get('engine', 'SerpAPI')} results served from cache")
+            return cached
+
+    results = await aserpapi_search(params)
+    if cache is not None and results and "error" not in results:
+        cache.set(key, results)
+    return results
@@ -0,0 +1,128 @@
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, Union
+from concurrent.futures import Future, ThreadPoolExecutor
+import asyncio
+import threading
+import time
+from config import Config
+from models import TripRequest
+from metrics import registry
+
+Work = Union[Future, asyncio.Task]
+
+
+class SpeculativeSearch:
+    '''
+    Searches started ahead of the node that needs them, keyed by planner run.
+
+    A node registers its sync and async search with set_search; an earlier node
+    starts it with start/astart and the owning node claims it with take. Entries
+    carry the run id from the planner state, so concurrent plans for the same
+    trip never see each other's speculation, and async entries remember their
+    event loop, so a task is only handed to a caller running on that loop.
+    '''
+
+    def __init__(self, name: str, workers: int, max_age: float = 120.0):
+        self.name = name
+        # Speculations nobody claimed within this many seconds are dropped
+        self.max_age = max_age
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"{name}-prefetch")
+        self._entries: Dict[Tuple, Tuple[float, Work, Optional[asyncio.AbstractEventLoop]]] = {}
+        self._lock = threading.Lock()
+        self._search: Optional[Callable[[TripRequest], Any]] = None
+        self._asearch: Optional[Callable[[TripRequest], Awaitable[Any]]] = None
+
+    def set_search(self, search: Callable[[TripRequest], Any],
+                   asearch: Callable[[TripRequest], Awaitable[Any]]) -> None:
+        self._search = search
+        self._asearch = asearch
+
+    def count(self, outcome: str) -> None:
+        registry.inc(f"trip_{self.name}_prefetch_total", {"outcome": outcome})
+
+    @staticmethod
+    def _key(run_id: str, trip_request: TripRequest) -> Tuple:
+        return (run_id, trip_request.origin, trip_request.destination, trip_request.start_date,
+                trip_request.end_date, trip_request.budget, trip_request.flexible_days)
+
+    def _expire(self, now: float) -> None:
+        '''Drop speculations left behind by runs that never reached the owning node (lock held)'''
+        for key, (started, _, _) in list(self._entries.items()):
+            if now - started > self.max_age:
+                del self._entries[key]
+                self.count("expired")
+
+    def start(self, run_id: Optional[str], trip_request: TripRequest) -> None:
+        '''Run the search for this trip on the worker pool; no-op without a run id'''
+        if not run_id or self._search is None:
+            return
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            key = self._key(run_id, trip_request)
+            if key in self._entries:
+                return
+            self._entries[key] = (now, self._executor.submit(self._search, trip_request), None)
+        self.count("started")
+
+    def astart(self, run_id: Optional[str], trip_request: TripRequest) -> None:
+        '''Async variant of start: a task on the running event loop'''
+        if not run_id or self._asearch is None:
+            return
+        now = time.monotonic()
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self._expire(now)
+            key = self._key(run_id, trip_request)
+            if key in self._entries:
+                return
+            task = loop.create_task(self._asearch(trip_request))
+            # A discarded speculation may still fail; nobody else will look at its exception
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            self._entries[key] = (now, task, loop)
+        self.count("started")
+
+    def take(self, run_id: Optional[str], trip_request: TripRequest) -> Optional[Work]:
+        '''
+        This run's speculation, if the caller can wait on it: a Future from any
+        thread, a Task only from the loop it runs on. The caller counts the hit
+        or miss, since only it knows whether the result is used.
+        '''
+        if not run_id:
+            return None
+        with self._lock:
+            entry = self._entries.pop(self._key(run_id, trip_request), None)
+        if entry is None:
+            return None
+        _, work, loop = entry
+        if loop is not None:
+            try:
+                current = asyncio.get_running_loop()
+            except RuntimeError:
+                current = None
+            if current is not loop:
+                # Left to finish on its own loop; its responses still land in the cache
+                self.count("wasted")
+                return None
+        return work
+
+    def discard(self, run_id: Optional[str], trip_request: TripRequest) -> None:
+        '''
+        Drop this run's speculation after a failed gate. A search that has not
+        started is cancelled; one already running is left to finish so its
+        responses are parked in the cache, and counted as wasted.
+        '''
+        if not run_id:
+            return
+        with self._lock:
+            entry = self._entries.pop(self._key(run_id, trip_request), None)
+        if entry is None:
+            return
+        work = entry[1]
+        if isinstance(work, Future) and work.cancel():
+            self.count("cancelled")
+        else:
+            self.count("wasted")
+
+
+# Flight searches started by the weather check; nodes/flight_search registers the search
+flight_prefetch = SpeculativeSearch("flight", workers=Config.PREFETCH_WORKERS)
@@ -0,0 +1,93 @@
+from typing import Any, Awaitable, Callable, Dict, List, Tuple, TypeVar
+from concurrent.futures import Future
+import asyncio
+import copy
+import threading
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    '''
+    Collapse identical concurrent calls onto one execution.
+
+    The first caller for a key runs the function; callers arriving with the same
+    key while it is in flight wait on its future and share the result (or error).
+    Sync (do) and async (ado) callers share the same in-flight table.
+    '''
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, Future] = {}
+        self.calls = 0
+        self.executions = 0
+        self.collapsed = 0
+        _groups.append(self)
+
+    def _join(self, key: str) -> Tuple[Future, bool]:
+        '''The in-flight future for key, and whether this caller has to run it'''
+        with self._lock:
+            self.calls += 1
+            future = self._inflight.get(key)
+            if future is None:
+                future = Future()
+                self._inflight[key] = future
+                self.executions += 1
+                return future, True
+            self.collapsed += 1
+            return future, False
+
+    def do(self, key: str, fn: Callable[[], T]) -> T:
+        future, leader = self._join(key)
+        if not leader:
+            # Followers get their own shallow copy so callers can't trip over each other
+            return copy.copy(future.result())
+
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+        future.set_result(result)
+        return result
+
+    async def ado(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        '''Async variant: followers await the leader without blocking the event loop'''
+        future, leader = self._join(key)
+        if not leader:
+            return copy.copy(await asyncio.wrap_future(future))
+
+        try:
+            result = await fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+        future.set_result(result)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "name": self.name,
+                "calls": self.calls,
+                "executions": self.executions,
+                "collapsed": self.collapsed,
+                "in_flight": len(self._inflight)
+            }
+
+
+_groups: List[SingleFlight] = []
+
+
+def singleflight_stats() -> List[Dict[str, Any]]:
+    '''Counters for every coalescing group in the process'''
+    return [group.stats() for group in _groups]
@@ -0,0 +1,167 @@
+'''
+Local stand-in for SerpAPI and OpenWeather that serves recorded fixtures.
+
+    python -m tools.standin_server --port 8765 --latency-ms 300 --error-rate 0.05 --rate-limit 20
+
+Any GET is answered from the fixture recorded for the same endpoint and query
+(e.g. /search?engine=google_hotels&... or /data/2.5/weather?q=Paris). Latency,
+random failures and a request rate limit can be injected to mimic the real
+services under load. With API_MODE=replay the planner points at it by default.
+'''
+from typing import Any, Dict, Optional
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+import argparse
+import json
+import random
+import threading
+import time
+from config import Config
+from tools import fixtures
+from tools.fixtures import FixtureStore, endpoint_of
+
+
+class TokenBucket:
+    '''Requests per second with a one-second burst; rate 0 means unlimited'''
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.tokens = max(rate, 1.0)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def take(self) -> bool:
+        if self.rate <= 0:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(max(self.rate, 1.0), self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+
+class StandinServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Bulk lookups open many connections at once; the default backlog of 5 drops some
+    request_queue_size = 128
+
+    def __init__(self, address, store: FixtureStore, latency_ms: float = 0.0, jitter_ms: float = 0.0,
+                 error_rate: float = 0.0, rate_limit: float = 0.0, seed: Optional[int] = None):
+        super().__init__(address, _StandinHandler)
+        self.store = store
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.bucket = TokenBucket(rate_limit)
+        self.random = random.Random(seed)
+        self._stats_lock = threading.Lock()
+        self.counts: Dict[str, int] = {}
+
+    def count(self, outcome: str) -> None:
+        with self._stats_lock:
+            self.counts[outcome] = self.counts.get(outcome, 0) + 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._stats_lock:
+            return dict(self.counts)
+
+
+class _StandinHandler(BaseHTTPRequestHandler):
+    server: StandinServer
+
+    def _send(self, status: int, body: Any, headers: Optional[Dict[str, str]] = None) -> None:
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        server = self.server
+        parts = urlsplit(self.path)
+        if parts.path == "/_stats":
+            self._send(200, server.stats())
+            return
+
+        if not server.bucket.take():
+            server.count("rate_limited")
+            self._send(429, {"error": "Rate limit exceeded (stand-in)"}, {"Retry-After": "1"})
+            return
+
+        delay = server.latency_ms + server.random.uniform(-server.jitter_ms, server.jitter_ms)
+        if delay > 0:
+            time.sleep(delay / 1000)
+
+        if server.error_rate and server.random.random() < server.error_rate:
+            server.count("injected_error")
+            self._send(503, {"error": "Injected failure (stand-in)"})
+            return
+
+        fixture = server.store.load_http(endpoint_of(parts.path), dict(parse_qsl(parts.query)))
+        if fixture is None:
+            server.count("missing")
+            self._send(404, {"error": f"No recorded response for {parts.path}?{parts.query}"})
+            return
+
+        server.count("served")
+        self._send(fixture.get("status", 200), fixture["body"])
+
+    def log_message(self, format, *args):
+        pass
+
+
+_server: Optional[StandinServer] = None
+_server_lock = threading.Lock()
+
+
+def start_standin_server(port: int = Config.STANDIN_PORT, host: str = Config.STANDIN_HOST,
+                         store: Optional[FixtureStore] = None) -> StandinServer:
+    '''Serve fixtures from a daemon thread with the STANDIN_* settings; safe to call repeatedly'''
+    global _server
+    with _server_lock:
+        if _server is None:
+            store = store or fixtures.fixture_store
+            _server = StandinServer(
+                (host, port),
+                store,
+                latency_ms=Config.STANDIN_LATENCY_MS,
+                jitter_ms=Config.STANDIN_JITTER_MS,
+                error_rate=Config.STANDIN_ERROR_RATE,
+                rate_limit=Config.STANDIN_RATE_LIMIT
+            )
+            threading.Thread(target=_server.serve_forever, name="standin-server", daemon=True).start()
+            print(f"🧪 Stand-in APIs on http://{host}:{_server.server_address[1]} ({type(store).__name__})")
+    return _server
+
+
+def main(argv: Optional[list] = None) -> None:
+    parser = argparse.ArgumentParser(description="Serve recorded SerpAPI/OpenWeather responses locally")
+    parser.add_argument("--host", default=Config.STANDIN_HOST)
+    parser.add_argument("--port", type=int, default=Config.STANDIN_PORT)
+    parser.add_argument("--fixtures", default=Config.FIXTURE_DIR)
+    parser.add_argument("--latency-ms", type=float, default=Config.STANDIN_LATENCY_MS)
+    parser.add_argument("--jitter-ms", type=float, default=Config.STANDIN_JITTER_MS)
+    parser.add_argument("--error-rate", type=float, default=Config.STANDIN_ERROR_RATE)
+    parser.add_argument("--rate-limit", type=float, default=Config.STANDIN_RATE_LIMIT, help="requests per second, 0 = unlimited")
+    parser.add_argument("--seed", type=int, default=None, help="seed for injected jitter and errors")
+    args = parser.parse_args(argv)
+
+    store = FixtureStore(args.fixtures)
+    server = StandinServer((args.host, args.port), store, args.latency_ms, args.jitter_ms,
+                           args.error_rate, args.rate_limit, args.seed)
+    print(f"🧪 Stand-in APIs on http://{args.host}:{server.server_address[1]} "
+          f"({store.stats()['http']} recorded responses in {store.root})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
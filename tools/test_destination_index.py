@@ -0,0 +1,42 @@
+"""
+Tests for alternative destinations from the bundled index
+"""
+from tools.destination_index import destination_index
+from models import TripRequest
+
+
+def _trip(origin: str = "Lisbon", destination: str = "Reykjavik") -> TripRequest:
+    return TripRequest(origin=origin, destination=destination, start_date="2026-11-02",
+                       duration_days=5, budget=3500)
+
+
+def _names(trip_request: TripRequest, **kwargs):
+    return [alt.name for alt in destination_index.suggest(trip_request, limit=100, **kwargs)]
+
+
+def test_suggestions_are_best_first():
+    suggested = destination_index.suggest(_trip(), limit=10)
+    assert suggested
+    scores = [alt.score for alt in suggested]
+    assert scores == sorted(scores, reverse=True)
+
+
+def test_destination_is_never_suggested():
+    """Also when given with its country, as the app's form allows"""
+    city = _names(_trip())[0]
+    assert city not in _names(_trip(destination=city))
+    assert city not in _names(_trip(destination=f"{city}, Somewhere"))
+
+
+def test_origin_is_never_suggested():
+    city = _names(_trip())[0]
+    assert city not in _names(_trip(origin=city))
+
+
+def test_excluded_places_are_left_out():
+    first, second = _names(_trip())[:2]
+    assert not {first, second} & set(_names(_trip(), exclude=[first, second]))
+
+
+def test_unknown_places_exclude_nothing():
+    assert _names(_trip(destination="Atlantis")) == _names(_trip(destination="El Dorado"))
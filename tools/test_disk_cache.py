@@ -0,0 +1,86 @@
+"""
+Tests for the SQLite result cache: size cap (least recently used first) and TTL
+"""
+from types import SimpleNamespace
+import pytest
+from tools import disk_cache
+from tools.disk_cache import SQLiteCache
+
+
+class Clock:
+    """Stands in for time.time so access order and expiry are exact"""
+
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+    def tick(self, seconds: float = 1.0) -> None:
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(disk_cache, "time", SimpleNamespace(time=clock))
+    return clock
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return SQLiteCache(str(tmp_path / "cache.sqlite3"), ttls={"flights": 60}, max_entries={"flights": 2})
+
+
+def test_cap_trims_least_recently_used(cache, clock):
+    """A read refreshes an entry, so the untouched one is trimmed first"""
+    cache.set("flights", "a", {"price": 1})
+    clock.tick()
+    cache.set("flights", "b", {"price": 2})
+    clock.tick()
+    assert cache.get("flights", "a") == {"price": 1}
+    clock.tick()
+    cache.set("flights", "c", {"price": 3})
+
+    assert cache.get("flights", "b") is None
+    assert cache.get("flights", "a") == {"price": 1}
+    assert cache.get("flights", "c") == {"price": 3}
+    assert cache.stats()["entries"] == {"flights": 2}
+
+
+def test_cap_is_per_namespace(cache, clock):
+    """Filling one namespace never trims another"""
+    cache.set("hotels", "h", [1])
+    for key in "abc":
+        clock.tick()
+        cache.set("flights", key, [key])
+    assert cache.get("hotels", "h") == [1]
+    assert cache.stats()["entries"] == {"flights": 2, "hotels": 1}
+
+
+def test_entries_expire_after_namespace_ttl(cache, clock):
+    cache.set("flights", "a", "fare")
+    clock.tick(59)
+    assert cache.get("flights", "a") == "fare"
+    clock.tick(1)
+    assert cache.get("flights", "a") is None
+    assert cache.stats()["entries"] == {}
+
+
+def test_explicit_ttl_overrides_namespace_default(cache, clock):
+    cache.set("flights", "short", 1, ttl_seconds=5)
+    cache.set("other", "default", 2)
+    clock.tick(10)
+    assert cache.get("flights", "short") is None
+    assert cache.get("other", "default") == 2
+    clock.tick(cache.default_ttl)
+    assert cache.get("other", "default") is None
+
+
+def test_hits_and_misses_are_counted(cache, clock):
+    cache.set("flights", "a", 1)
+    cache.get("flights", "a")
+    cache.get("flights", "missing")
+    stats = cache.stats()
+    assert stats["hits"] == {"flights": 1}
+    assert stats["misses"] == {"flights": 1}
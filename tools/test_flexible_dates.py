@@ -0,0 +1,54 @@
+"""
+Tests for the flexible-date window used by the flight search
+"""
+from datetime import date, timedelta
+from tools import flight_tool
+from tools.flight_tool import flexible_dates, price_calendar
+from models import FlightOption
+
+# Far enough ahead that no date in the window is in the past
+SOON = (date.today() + timedelta(days=30)).isoformat()
+
+
+def _days(offset: int, base: str = SOON) -> str:
+    return (date.fromisoformat(base) + timedelta(days=offset)).isoformat()
+
+
+def test_window_zero_is_just_the_requested_dates():
+    assert flexible_dates(SOON, _days(4), 0) == [(SOON, _days(4))]
+
+
+def test_window_keeps_the_trip_length():
+    pairs = flexible_dates(SOON, _days(4), 2)
+    assert pairs == [(_days(offset), _days(offset + 4)) for offset in range(-2, 3)]
+
+
+def test_one_way_keeps_no_return_date():
+    assert flexible_dates(SOON, None, 1) == [(_days(-1), None), (SOON, None), (_days(1), None)]
+    assert flexible_dates(SOON, "", 1)[0] == (_days(-1), "")
+
+
+def test_past_departures_are_left_out_but_not_the_requested_date(monkeypatch):
+    """A date already gone is never searched, except the one the user asked for"""
+    today = date(2026, 11, 2)
+
+    class FixedDate(date):
+        @classmethod
+        def today(cls):
+            return today
+
+    monkeypatch.setattr(flight_tool, "Date", FixedDate)
+    assert [out for out, _ in flexible_dates("2026-11-03", None, 3)] == [
+        "2026-11-02", "2026-11-03", "2026-11-04", "2026-11-05", "2026-11-06"
+    ]
+    assert flexible_dates("2026-10-30", None, 1) == [("2026-10-30", None)]
+
+
+def test_price_calendar_marks_dates_without_flights():
+    def option(price: float) -> FlightOption:
+        return FlightOption(airline="TP", departure_time="", arrival_time="",
+                            duration="", price=price, stops=0)
+
+    calendar = price_calendar({_days(1): [option(420), option(380)], SOON: [], _days(-1): [option(510)]})
+    assert calendar == {_days(-1): 510, SOON: None, _days(1): 380}
+    assert list(calendar) == sorted(calendar)
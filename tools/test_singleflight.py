@@ -0,0 +1,106 @@
+"""
+Tests for SingleFlight: followers share the leader's result or error
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from tools.singleflight import SingleFlight
+
+
+class UpstreamDown(Exception):
+    pass
+
+
+def _wait_for_leader(group: SingleFlight) -> None:
+    """Block until the leader has registered its key"""
+    while group.stats()["in_flight"] < 1:
+        threading.Event().wait(0.001)
+
+
+def _wait_for_followers(group: SingleFlight, count: int) -> None:
+    """Block until `count` callers are waiting on the leader"""
+    while group.stats()["collapsed"] < count:
+        threading.Event().wait(0.001)
+
+
+def test_followers_share_the_leaders_result():
+    group = SingleFlight("test-result")
+    release = threading.Event()
+    runs = []
+
+    def search():
+        runs.append(1)
+        release.wait(5)
+        return {"flights": [1, 2]}
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        leader = pool.submit(group.do, "k", search)
+        _wait_for_leader(group)
+        followers = [pool.submit(group.do, "k", search) for _ in range(3)]
+        _wait_for_followers(group, 3)
+        release.set()
+        results = [leader.result()] + [f.result() for f in followers]
+
+    assert len(runs) == 1
+    assert all(result == {"flights": [1, 2]} for result in results)
+    # Followers get copies, so one caller mutating its dict cannot affect another
+    assert len({id(result) for result in results}) == 4
+
+
+def test_leader_error_reaches_every_follower():
+    group = SingleFlight("test-error")
+    release = threading.Event()
+
+    def search():
+        release.wait(5)
+        raise UpstreamDown("503")
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        leader = pool.submit(group.do, "k", search)
+        _wait_for_leader(group)
+        followers = [pool.submit(group.do, "k", search) for _ in range(3)]
+        _wait_for_followers(group, 3)
+        release.set()
+        for future in [leader] + followers:
+            with pytest.raises(UpstreamDown, match="503"):
+                future.result()
+
+    assert group.stats() == {"name": "test-error", "calls": 4, "executions": 1, "collapsed": 3, "in_flight": 0}
+
+
+def test_failed_key_is_retried_by_the_next_caller():
+    """An error is not cached: the next call runs the function again"""
+    group = SingleFlight("test-retry")
+
+    def failing():
+        raise UpstreamDown()
+
+    with pytest.raises(UpstreamDown):
+        group.do("k", failing)
+    assert group.do("k", lambda: "ok") == "ok"
+    assert group.stats()["executions"] == 2
+
+
+def test_async_leader_error_reaches_every_follower():
+    group = SingleFlight("test-async-error")
+
+    async def main():
+        release = asyncio.Event()
+        runs = []
+
+        async def search():
+            runs.append(1)
+            await release.wait()
+            raise UpstreamDown("timeout")
+
+        calls = [asyncio.create_task(group.ado("k", search)) for _ in range(4)]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*calls, return_exceptions=True)
+        return runs, results
+
+    runs, results = asyncio.run(main())
+    assert len(runs) == 1
+    assert all(isinstance(result, UpstreamDown) for result in results)
+    assert group.stats()["in_flight"] == 0
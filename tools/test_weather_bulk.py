@@ -0,0 +1,74 @@
+"""
+Tests for the bulk weather lookup in forecast mode
+"""
+import asyncio
+from datetime import datetime, timedelta, timezone
+import pytest
+from tools import weather_tool
+from tools.cache import TTLCache
+from tools.weather_tool import WeatherTool
+
+NOON = datetime(2026, 11, 2, 12, tzinfo=timezone.utc)
+
+
+def _forecast(temp: float) -> dict:
+    """A one-slot forecast for 2026-11-02 at noon UTC"""
+    return {"city": {"timezone": 0}, "list": [{
+        "dt": int(NOON.timestamp()),
+        "main": {"temp": temp, "humidity": 50},
+        "wind": {"speed": 3.0},
+        "weather": [{"main": "Clear"}],
+        "pop": 0.1,
+    }]}
+
+
+@pytest.fixture
+def hour_rolls_over(monkeypatch):
+    """Every datetime.now() in the weather tool is an hour later than the last"""
+    class RollingClock(datetime):
+        calls = 0
+
+        @classmethod
+        def now(cls, tz=None):
+            cls.calls += 1
+            return datetime(2026, 11, 2, 9, 59, tzinfo=tz) + timedelta(hours=cls.calls)
+
+    monkeypatch.setattr(weather_tool, "datetime", RollingClock)
+
+
+@pytest.fixture
+def tool():
+    return WeatherTool("test-key", cache=TTLCache(ttl_seconds=3600, max_entries=100, name="test-weather"),
+                       mode="forecast")
+
+
+def test_results_survive_an_hour_change_mid_batch(tool, hour_rolls_over, monkeypatch):
+    payloads = {"Lisbon": _forecast(21.0), "Seville": _forecast(24.0)}
+    monkeypatch.setattr(tool, "_request_one", lambda key, city: payloads[city])
+
+    weather = tool.get_weather_many(["Lisbon", "Seville", "Lisbon"], "2026-11-02")
+
+    assert [w.temperature for w in weather] == [21.0, 24.0, 21.0]
+    assert all(w.source == "forecast" for w in weather)
+
+
+def test_async_results_survive_an_hour_change_mid_batch(tool, hour_rolls_over, monkeypatch):
+    payloads = {"Lisbon": _forecast(21.0), "Seville": _forecast(24.0)}
+
+    async def request_one(key, city, slots):
+        return payloads[city]
+
+    monkeypatch.setattr(tool, "_arequest_one", request_one)
+
+    weather = asyncio.run(tool.aget_weather_many(["Seville", "Lisbon"], "2026-11-02"))
+
+    assert [w.temperature for w in weather] == [24.0, 21.0]
+
+
+def test_failed_city_is_none_and_others_still_parse(tool, monkeypatch):
+    monkeypatch.setattr(tool, "_request_one", lambda key, city: _forecast(19.0) if city == "Porto" else None)
+
+    weather = tool.get_weather_many(["Atlantis", "Porto"], "2026-11-02")
+
+    assert weather[0] is None
+    assert weather[1].temperature == 19.0
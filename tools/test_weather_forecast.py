@@ -0,0 +1,49 @@
+"""
+Tests for per-day weather in forecast mode: forecast, climatology and estimates
+"""
+from datetime import datetime, timedelta, timezone
+from tools.weather_tool import WeatherTool
+
+FIRST_DAY = datetime(2026, 11, 2, 12, tzinfo=timezone.utc)
+
+
+def _forecast(days: int, condition: str = "Clear", temp: float = 21.0) -> dict:
+    """A noon slot per day for `days` days from 2026-11-02"""
+    return {"city": {"timezone": 0}, "list": [{
+        "dt": int((FIRST_DAY + timedelta(days=i)).timestamp()),
+        "main": {"temp": temp, "humidity": 50},
+        "wind": {"speed": 3.0},
+        "weather": [{"main": condition}],
+        "pop": 0.1,
+    } for i in range(days)]}
+
+
+def _daily(city: str, dates, **forecast):
+    tool = WeatherTool("test-key", cache=None, mode="forecast")
+    days = tool._parse_forecast(_forecast(3, **forecast), city)
+    return [tool._weather_on(days, city, date) for date in dates]
+
+
+def test_dates_within_the_horizon_are_forecast():
+    weather = _daily("Lisbon", ["2026-11-02", "2026-11-04"])
+    assert [(w.date, w.source) for w in weather] == [("2026-11-02", "forecast"), ("2026-11-04", "forecast")]
+
+
+def test_dates_past_the_horizon_use_climatology():
+    weather, = _daily("Lisbon", ["2026-11-20"])
+    assert (weather.date, weather.source) == ("2026-11-20", "climatology")
+
+
+def test_unknown_city_past_the_horizon_is_an_estimate_not_a_forecast():
+    """The nearest forecast day stands in, but is labelled and never fails the check"""
+    weather, = _daily("Atlantis", ["2026-11-20"], condition="Thunderstorm")
+    assert weather.date == "2026-11-20"
+    assert weather.source == "extrapolated"
+    assert weather.is_favorable
+    assert "2026-11-04" in weather.alert
+
+
+def test_date_before_the_first_forecast_day_is_an_estimate():
+    weather, = _daily("Lisbon", ["2026-11-01"])
+    assert weather.source == "extrapolated"
+    assert "2026-11-02" in weather.alert
@@ -1,53 +1,173 @@
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import threading
+import time
+import numpy as np
 from models import WeatherData
 from langchain_core.runnables import RunnableLambda, RunnablePassthrough
-import requests
-from datetime import datetime
+from tools.cache import TTLCache, normalize_key
+from config import Config
+from tools.http_client import http_get_json, ahttp_get_json
+from metrics import track
+from datetime import datetime, timedelta, timezone
+from tools.destination_index import destination_index, DAYS_PER_MONTH, MAX_WET_SHARE, MIN_TEMP, MAX_TEMP
+
+SEVERE_CONDITIONS = ['Thunderstorm', 'Snow']
+
+# Shared by every WeatherTool in the process, so all sessions reuse each other's lookups
+weather_cache = TTLCache(
+    ttl_seconds=Config.WEATHER_CACHE_TTL,
+    max_entries=Config.WEATHER_CACHE_MAX_ENTRIES,
+    name="weather"
+)
+
+
+class RequestPacer:
+    '''Spaces request starts to at most `rate` per second; rate 0 means unlimited'''
+    
+    def __init__(self, rate: float):
+        self.rate = rate
+        self._next = 0.0
+        self._lock = threading.Lock()
+    
+    def delay(self) -> float:
+        '''Seconds the caller has to wait before its request may start'''
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + 1 / self.rate
+            return start - now
+
+# OpenWeather's limit is per API key, so bulk lookups share one pacer
+weather_pacer = RequestPacer(Config.WEATHER_RATE_LIMIT)
 
 class WeatherTool:
     '''OpenWeatherMap API Tool'''
     
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, cache=weather_cache, mode: str = Config.WEATHER_MODE):
         self.api_key = api_key
-        self.base_url = "http://api.openweathermap.org/data/2.5"
+        self.base_url = Config.OPENWEATHER_BASE_URL
+        self.cache = cache
+        # "current": today's conditions; "forecast": the conditions on the trip date
+        self.mode = mode
+        self._runnable = None
         
     def _fetch_weather(self, city: str) -> Dict:
-        '''Fetch weather for the day'''
-        url = f"{self.base_url}/weather"
-        params = {
+        '''Fetch weather for the day, served from the cache while it is fresh'''
+        key = normalize_key(city)
+        with track("trip_tool_call", {"tool": "weather"}):
+            if self.cache is not None:
+                cached = self.cache.get(key)
+                if cached is not None:
+                    return cached
+            
+            data = self._request_weather(city)
+            if self.cache is not None:
+                self.cache.set(key, data)
+            return data
+    
+    async def _afetch_weather(self, city: str) -> Dict:
+        '''Async variant of _fetch_weather'''
+        key = normalize_key(city)
+        with track("trip_tool_call", {"tool": "weather"}):
+            if self.cache is not None:
+                cached = self.cache.get(key)
+                if cached is not None:
+                    return cached
+            
+            data = await self._arequest_weather(city)
+            if self.cache is not None:
+                self.cache.set(key, data)
+            return data
+    
+    def _weather_request(self, city: str):
+        '''URL and query for the OpenWeather current weather endpoint'''
+        return f"{self.base_url}/weather", {
             "q": city,
             "appid": self.api_key,
             "units": "metric"
         }
+    
+    def _request_weather(self, city: str) -> Dict:
+        '''Call the OpenWeather current weather endpoint'''
+        return http_get_json(*self._weather_request(city))
+    
+    async def _arequest_weather(self, city: str) -> Dict:
+        '''Call the OpenWeather current weather endpoint without blocking the event loop'''
+        return await ahttp_get_json(*self._weather_request(city))
+    
+    def _forecast_key(self, city: str) -> str:
+        '''One forecast per city and hour; every trip date is served from it'''
+        return f"forecast|{normalize_key(city)}|{datetime.now().strftime('%Y-%m-%d %H')}"
+    
+    def _forecast_request(self, city: str):
+        '''URL and query for the OpenWeather 5 day / 3 hour forecast endpoint'''
+        return f"{self.base_url}/forecast", {
+            "q": city,
+            "appid": self.api_key,
+            "units": "metric"
+        }
+    
+    def _fetch_forecast(self, city: str) -> Dict:
+        '''Fetch the multi-day forecast, served from the cache within the same hour'''
+        key = self._forecast_key(city)
+        with track("trip_tool_call", {"tool": "weather_forecast"}):
+            if self.cache is not None:
+                cached = self.cache.get(key)
+                if cached is not None:
+                    return cached
             
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        return response.json()
-            
-    def _parse_weather(self, data: Dict, city: str, date: Optional[str]=None) -> WeatherData:
-        '''
-        Parse weather API response into WeatherData model
-        '''
-        temp = data['main']['temp']
-        condition = data['weather'][0]['main']
-        rain_chance = data.get("rain", {}).get("1h", 0)
+            data = http_get_json(*self._forecast_request(city))
+            if self.cache is not None:
+                self.cache.set(key, data)
+            return data
+    
+    async def _afetch_forecast(self, city: str) -> Dict:
+        '''Async variant of _fetch_forecast'''
+        key = self._forecast_key(city)
+        with track("trip_tool_call", {"tool": "weather_forecast"}):
+            if self.cache is not None:
+                cached = self.cache.get(key)
+                if cached is not None:
+                    return cached
             
+            data = await ahttp_get_json(*self._forecast_request(city))
+            if self.cache is not None:
+                self.cache.set(key, data)
+            return data
+    
+    def _assess(self, temp: float, condition: str, rain_chance: float, rain_limit: float = 10):
+        '''Whether the weather suits travel, and the alert to show when it does not'''
         is_favorable = (
-            15 <= temp <= 30 and
-            condition not in ['Thunderstorm', 'Snow'] and
-            rain_chance < 10
+            MIN_TEMP <= temp <= MAX_TEMP and
+            condition not in SEVERE_CONDITIONS and
+            rain_chance < rain_limit
         )
         
         alert = None
         if not is_favorable:
-            if temp < 15:
+            if temp < MIN_TEMP:
                 alert = "Cold weather expected."
-            elif temp > 30:
+            elif temp > MAX_TEMP:
                 alert = "Very hot weather expected."
-            elif condition in ['Thunderstorm', 'Snow']:
+            elif condition in SEVERE_CONDITIONS:
                 alert = f"Severe weather: {condition}"
-            elif rain_chance >= 10:
+            elif rain_chance >= rain_limit:
                 alert = "High chance of rain."
+        return is_favorable, alert
+            
+    def _parse_weather(self, data: Dict, city: str, date: Optional[str]=None) -> WeatherData:
+        '''
+        Parse weather API response into WeatherData model
+        '''
+        temp = data['main']['temp']
+        condition = data['weather'][0]['main']
+        rain_chance = data.get("rain", {}).get("1h", 0)
+        is_favorable, alert = self._assess(temp, condition, rain_chance)
                 
         return WeatherData(
             location=city,
@@ -61,19 +181,268 @@ class WeatherTool:
             alert=alert
         )
     
+    def _parse_weather_many(self, datas: List[Dict], cities: List[str], date: Optional[str]=None) -> List[WeatherData]:
+        '''
+        _parse_weather over many responses at once: the favorability rules and
+        alerts are evaluated as array operations, one result per response
+        '''
+        if not datas:
+            return []
+        temps = np.array([d['main']['temp'] for d in datas], dtype=float)
+        conditions = np.array([d['weather'][0]['main'] for d in datas])
+        rain = np.array([d.get("rain", {}).get("1h", 0) for d in datas], dtype=float)
+        
+        cold, hot = temps < MIN_TEMP, temps > MAX_TEMP
+        severe = np.isin(conditions, SEVERE_CONDITIONS)
+        wet = rain >= 10
+        favorable = ~(cold | hot | severe | wet)
+        # First matching rule wins, in the same order as _assess
+        alert_kind = np.select([cold, hot, severe, wet], [0, 1, 2, 3], default=-1)
+        
+        day = date or datetime.now().strftime("%Y-%m-%d")
+        alerts = ["Cold weather expected.", "Very hot weather expected.", None, "High chance of rain."]
+        return [
+            WeatherData(
+                location=city,
+                date=day,
+                temperature=data['main']['temp'],
+                condition=data['weather'][0]['main'],
+                humidity=data['main']['humidity'],
+                wind_speed=data['wind']['speed'],
+                precipitation_chance=data.get("rain", {}).get("1h", 0),
+                is_favorable=bool(ok),
+                alert=None if kind < 0 else alerts[kind] or f"Severe weather: {data['weather'][0]['main']}"
+            )
+            for data, city, ok, kind in zip(datas, cities, favorable, alert_kind.tolist())
+        ]
+    
+    def _parse_forecast(self, data: Dict, city: str) -> Dict[str, WeatherData]:
+        '''
+        One WeatherData per local calendar day of the forecast. Daytime slots
+        (09:00-18:00) decide temperature and condition; the rain chance is the
+        highest probability of precipitation of the day. Days at the edges of
+        the horizon with no daytime slot are left out.
+        '''
+        offset = timedelta(seconds=data.get("city", {}).get("timezone", 0))
+        slots: Dict[str, List[Dict]] = {}
+        for entry in data.get("list", []):
+            local = datetime.fromtimestamp(entry["dt"], tz=timezone.utc) + offset
+            slots.setdefault(local.strftime("%Y-%m-%d"), []).append(dict(entry, hour=local.hour))
+        
+        days = {}
+        for day, entries in slots.items():
+            daytime = [e for e in entries if 9 <= e["hour"] <= 18]
+            if not daytime:
+                continue
+            conditions = [e["weather"][0]["main"] for e in daytime]
+            severe = [c for c in conditions if c in SEVERE_CONDITIONS]
+            condition = severe[0] if severe else Counter(conditions).most_common(1)[0][0]
+            temp = round(sum(e["main"]["temp"] for e in daytime) / len(daytime), 1)
+            rain_chance = round(max(e.get("pop", 0) for e in entries) * 100)
+            is_favorable, alert = self._assess(temp, condition, rain_chance, MAX_WET_SHARE * 100)
+            days[day] = WeatherData(
+                location=city,
+                date=day,
+                temperature=temp,
+                condition=condition,
+                humidity=round(sum(e["main"]["humidity"] for e in daytime) / len(daytime)),
+                wind_speed=round(sum(e["wind"]["speed"] for e in daytime) / len(daytime), 1),
+                precipitation_chance=rain_chance,
+                is_favorable=is_favorable,
+                alert=alert,
+                source="forecast"
+            )
+        return days
+    
+    def _climatology(self, city: str, date: str) -> Optional[WeatherData]:
+        '''Typical weather for the month from the bundled destination data'''
+        climate = destination_index.climate(city, datetime.strptime(date, "%Y-%m-%d").month)
+        if climate is None:
+            return None
+        rain_chance = round(climate["rain_days"] / DAYS_PER_MONTH * 100)
+        condition = "Rain" if rain_chance >= MAX_WET_SHARE * 100 else "Typical"
+        is_favorable, alert = self._assess(climate["temperature"], condition, rain_chance, MAX_WET_SHARE * 100)
+        return WeatherData(
+            location=city,
+            date=date,
+            temperature=climate["temperature"],
+            condition=condition,
+            humidity=0,
+            wind_speed=0.0,
+            precipitation_chance=rain_chance,
+            is_favorable=is_favorable,
+            alert=alert,
+            source="climatology"
+        )
+    
+    def _weather_on(self, days: Dict[str, WeatherData], city: str, date: Optional[str]) -> WeatherData:
+        '''
+        Weather for one date: the forecast day when it is within the horizon,
+        the monthly climatology beyond it, and otherwise the nearest forecast
+        day marked "extrapolated". An extrapolated day is an estimate, not a
+        forecast, so it never fails the weather check by itself.
+        '''
+        if not days:
+            raise ValueError(f"Empty forecast for {city}")
+        date = date or datetime.now().strftime("%Y-%m-%d")
+        if date in days:
+            return days[date]
+        first, last = min(days), max(days)
+        if date > last:
+            typical = self._climatology(city, date)
+            if typical is not None:
+                return typical
+        nearest = last if date > last else first
+        print(f"⚠️ No forecast or climatology for {city} on {date}, estimating from {nearest}")
+        return days[nearest].model_copy(update={
+            "date": date,
+            "source": "extrapolated",
+            "is_favorable": True,
+            "alert": f"No forecast for this date; estimated from {nearest}."
+        })
+    
+    def get_daily_weather(self, city: str, dates: List[str]) -> List[WeatherData]:
+        '''Weather for each date, in order, from a single forecast request'''
+        try:
+            days = self._parse_forecast(self._fetch_forecast(city), city)
+            return [self._weather_on(days, city, date) for date in dates]
+        except Exception as e:
+            raise Exception(f"Weather API error: {str(e)}")
+    
+    async def aget_daily_weather(self, city: str, dates: List[str]) -> List[WeatherData]:
+        '''Async variant of get_daily_weather'''
+        try:
+            days = self._parse_forecast(await self._afetch_forecast(city), city)
+            return [self._weather_on(days, city, date) for date in dates]
+        except Exception as e:
+            raise Exception(f"Weather API error: {str(e)}")
+    
+    def _bulk_plan(self, cities: List[str]):
+        '''
+        Cache key per city, distinct cities by key, and the responses already
+        in the cache. The keys are computed once: forecast keys carry the hour,
+        so rebuilding them after the fetch could miss what was just stored.
+        '''
+        key_of = self._forecast_key if self.mode == "forecast" else normalize_key
+        keys = [key_of(city) for city in cities]
+        unique: Dict[str, str] = {}
+        for key, city in zip(keys, cities):
+            unique.setdefault(key, city)
+        found = {}
+        if self.cache is not None:
+            for key in unique:
+                cached = self.cache.get(key)
+                if cached is not None:
+                    found[key] = cached
+        missing = {key: city for key, city in unique.items() if key not in found}
+        return keys, found, missing
+    
+    def _bulk_results(self, cities: List[str], keys: List[str], found: Dict[str, Dict],
+                      date: Optional[str]) -> List[Optional[WeatherData]]:
+        '''Parsed weather in input order, looked up by the keys from _bulk_plan; None where the lookup failed'''
+        if self.mode == "forecast":
+            parsed = {}
+            for key, city in zip(keys, cities):
+                if key in found and key not in parsed:
+                    try:
+                        parsed[key] = self._weather_on(self._parse_forecast(found[key], city), city, date)
+                    except Exception as e:
+                        print(f"   ⚠️ Weather check failed for {city}: {e}")
+            return [parsed.get(key) for key in keys]
+        
+        present = [i for i, key in enumerate(keys) if key in found]
+        results: List[Optional[WeatherData]] = [None] * len(cities)
+        weather = self._parse_weather_many([found[keys[i]] for i in present], [cities[i] for i in present], date)
+        for i, item in zip(present, weather):
+            results[i] = item
+        return results
+    
+    def _request_one(self, key: str, city: str) -> Optional[Dict]:
+        '''One uncached bulk lookup, paced and stored in the cache; None on failure'''
+        time.sleep(weather_pacer.delay())
+        try:
+            with track("trip_tool_call", {"tool": "weather_forecast" if self.mode == "forecast" else "weather"}):
+                if self.mode == "forecast":
+                    data = http_get_json(*self._forecast_request(city))
+                else:
+                    data = self._request_weather(city)
+        except Exception as e:
+            print(f"   ⚠️ Weather check failed for {city}: {e}")
+            return None
+        if self.cache is not None:
+            self.cache.set(key, data)
+        return data
+    
+    async def _arequest_one(self, key: str, city: str, slots: asyncio.Semaphore) -> Optional[Dict]:
+        '''Async variant of _request_one'''
+        async with slots:
+            await asyncio.sleep(weather_pacer.delay())
+            try:
+                with track("trip_tool_call", {"tool": "weather_forecast" if self.mode == "forecast" else "weather"}):
+                    if self.mode == "forecast":
+                        data = await ahttp_get_json(*self._forecast_request(city))
+                    else:
+                        data = await self._arequest_weather(city)
+            except Exception as e:
+                print(f"   ⚠️ Weather check failed for {city}: {e}")
+                return None
+        if self.cache is not None:
+            self.cache.set(key, data)
+        return data
+    
+    def get_weather_many(self, cities: List[str], date: Optional[str]=None) -> List[Optional[WeatherData]]:
+        '''
+        Weather for many cities in one pass, aligned with `cities` (None where the
+        lookup failed). Duplicates are fetched once, cached responses are reused
+        and the rest are fetched concurrently within WEATHER_BULK_CONCURRENCY and
+        WEATHER_RATE_LIMIT, so the pass takes about as long as the slowest fetch.
+        '''
+        keys, found, missing = self._bulk_plan(cities)
+        if missing:
+            workers = max(1, min(len(missing), Config.WEATHER_BULK_CONCURRENCY))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="weather") as executor:
+                fetched = list(executor.map(self._request_one, missing.keys(), missing.values()))
+            found.update({key: data for key, data in zip(missing, fetched) if data is not None})
+        return self._bulk_results(cities, keys, found, date)
+    
+    async def aget_weather_many(self, cities: List[str], date: Optional[str]=None) -> List[Optional[WeatherData]]:
+        '''Async variant of get_weather_many'''
+        keys, found, missing = self._bulk_plan(cities)
+        if missing:
+            slots = asyncio.Semaphore(max(1, Config.WEATHER_BULK_CONCURRENCY))
+            fetched = await asyncio.gather(*(self._arequest_one(key, city, slots) for key, city in missing.items()))
+            found.update({key: data for key, data in zip(missing, fetched) if data is not None})
+        return self._bulk_results(cities, keys, found, date)
+    
     def get_weather_runnable(self):
+        '''
+        The Runnable for weather fetching and parsing, built on first use and
+        reused by every lookup
+        '''
+        if self._runnable is None:
+            self._runnable = self._build_weather_runnable()
+        return self._runnable
+    
+    def _build_weather_runnable(self):
         '''
         Create a Runnable for weather fetching and parsing
         '''
         def fetch_step(x: Dict[str, Any]) -> str:
             return x["city"]
+        # The mode is looked up per call, so the chain stays valid if it changes
+        def fetch(city: str) -> Dict:
+            return self._fetch_forecast(city) if self.mode == "forecast" else self._fetch_weather(city)
+        async def afetch(city: str) -> Dict:
+            return await (self._afetch_forecast(city) if self.mode == "forecast" else self._afetch_weather(city))
         def parse_step(x: Dict[str, Any]) -> WeatherData:
+            if self.mode == "forecast":
+                return self._weather_on(self._parse_forecast(x["data"], x["city"]), x["city"], x.get("date"))
             return self._parse_weather(
                 x["data"],
                 x["city"],
                 x.get("date")
             )
-        fetch_runnable = RunnableLambda(fetch_step) | RunnableLambda(self._fetch_weather)
+        fetch_runnable = RunnableLambda(fetch_step) | RunnableLambda(fetch, afunc=afetch)
         parse_runnable = RunnableLambda(parse_step)
         
         chain = (
@@ -90,4 +459,15 @@ class WeatherTool:
             })
             return result
         except Exception as e:
-            raise Exception(f"Weather API error: {str(e)}")
\ No newline at end of file
+            raise Exception(f"Weather API error: {str(e)}")
+    
+    async def aget_weather_forecast(self, city: str, date: Optional[str]=None) -> WeatherData:
+        try: 
+            runnable = self.get_weather_runnable()
+            result = await runnable.ainvoke({
+                "city": city,
+                "date": date
+            })
+            return result
+        except Exception as e:
+            raise Exception(f"Weather API error: {str(e)}")